@@ -3,6 +3,9 @@ from logging.config import fileConfig
 from app.database.database import engine, Base
 from app.models.user import User  # Import all models
 from app.models.todo import Todo
+from app.models.refresh_token import RefreshToken
+from app.models.todo_stats import TodoDailyCompletions, TodoStats
+from app.models.rollup import DailyActiveUser, DailyTodoRollup, RollupWatermark
 from app.core.load_env import ENVConfig
 
 from alembic import context
@@ -0,0 +1,47 @@
+"""add todo stats tables
+
+Revision ID: 5d8e1f0b7a31
+Revises: 9a4e6c1b2d57
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e1f0b7a31'
+down_revision: Union[str, None] = '9a4e6c1b2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('todo_stats',
+    sa.Column('user_id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('open_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('completed_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('timed_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('completion_seconds', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'priority')
+    )
+    op.create_table('todo_daily_completions',
+    sa.Column('user_id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('completed_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    # Existing todos are counted by running the recompute job once
+    # (python -m app.jobs.recompute_todo_stats)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('todo_daily_completions')
+    op.drop_table('todo_stats')
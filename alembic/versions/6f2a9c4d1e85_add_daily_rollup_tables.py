@@ -0,0 +1,51 @@
+"""add daily rollup tables
+
+Revision ID: 6f2a9c4d1e85
+Revises: 5d8e1f0b7a31
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2a9c4d1e85'
+down_revision: Union[str, None] = '5d8e1f0b7a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_todo_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('created_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('completed_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'priority')
+    )
+    op.create_table('daily_active_users',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.VARCHAR(length=36), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'user_id')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('processed_until', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index(op.f('ix_todos_created_at'), 'todos', ['created_at'], unique=False)
+    op.create_index(op.f('ix_todos_finished_at'), 'todos', ['finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_todos_finished_at'), table_name='todos')
+    op.drop_index(op.f('ix_todos_created_at'), table_name='todos')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('daily_active_users')
+    op.drop_table('daily_todo_rollups')
@@ -0,0 +1,44 @@
+"""add todo updated_at and tombstones for delta sync
+
+Revision ID: 8b3e7d2f4c19
+Revises: 6f2a9c4d1e85
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e7d2f4c19'
+down_revision: Union[str, None] = '6f2a9c4d1e85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('todos', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+    # Existing todos last changed when they were created or completed
+    op.execute("UPDATE todos SET updated_at = COALESCE(finished_at, created_at, updated_at)")
+    op.create_index('ix_todos_owner_id_updated_at', 'todos', ['owner_id', 'updated_at'], unique=False)
+    op.create_table('todo_tombstones',
+    sa.Column('todo_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('owner_id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('todo_id')
+    )
+    op.create_index(op.f('ix_todo_tombstones_deleted_at'), 'todo_tombstones', ['deleted_at'], unique=False)
+    op.create_index('ix_todo_tombstones_owner_id_deleted_at', 'todo_tombstones', ['owner_id', 'deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todo_tombstones_owner_id_deleted_at', table_name='todo_tombstones')
+    op.drop_index(op.f('ix_todo_tombstones_deleted_at'), table_name='todo_tombstones')
+    op.drop_table('todo_tombstones')
+    op.drop_index('ix_todos_owner_id_updated_at', table_name='todos')
+    op.drop_column('todos', 'updated_at')
@@ -0,0 +1,45 @@
+"""recreate users search index
+
+Revision ID: 9a4e6c1b2d57
+Revises: 4c2ced8a2053
+Create Date: 2026-10-19 09:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e6c1b2d57'
+down_revision: Union[str, None] = '4c2ced8a2053'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = "username, email, first_name, last_name, country_code, phone_number"
+
+
+def _drop_fulltext_indexes() -> None:
+    # The index used to be created by hand, so its name depends on the install;
+    # an unnamed one is called after its first column (`id`).
+    inspector = sa.inspect(op.get_bind())
+    for index in inspector.get_indexes('users'):
+        if index.get('dialect_options', {}).get('mysql_prefix') == 'FULLTEXT':
+            op.drop_index(index['name'], table_name='users')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    _drop_fulltext_indexes()
+    op.execute(f"ALTER TABLE users ADD FULLTEXT users_search_IDX ({SEARCH_COLUMNS})")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    _drop_fulltext_indexes()
+    op.execute(f"ALTER TABLE users ADD FULLTEXT users_search_IDX (id, {SEARCH_COLUMNS})")
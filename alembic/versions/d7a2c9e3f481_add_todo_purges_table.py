@@ -0,0 +1,47 @@
+"""add todo purges table for background bulk deletes
+
+Revision ID: d7a2c9e3f481
+Revises: c4f1a8e25b07
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a2c9e3f481'
+down_revision: Union[str, None] = 'c4f1a8e25b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('todo_purges',
+    sa.Column('id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('owner_id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('requested_by', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('kind', sa.Enum('todos', 'completed', 'user', name='purge_kinds'), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'running', 'done', name='purge_statuses'), server_default='pending', nullable=False),
+    sa.Column('max_todo_id', sa.Integer(), nullable=True),
+    sa.Column('last_todo_id', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('deleted_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('lease_owner', sa.VARCHAR(length=32), nullable=True),
+    sa.Column('lease_until', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_todo_purges_owner_id'), 'todo_purges', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_todo_purges_status'), 'todo_purges', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_todo_purges_status'), table_name='todo_purges')
+    op.drop_index(op.f('ix_todo_purges_owner_id'), table_name='todo_purges')
+    op.drop_table('todo_purges')
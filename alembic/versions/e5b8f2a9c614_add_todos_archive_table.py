@@ -0,0 +1,44 @@
+"""add todos archive table for old completed todos
+
+Revision ID: e5b8f2a9c614
+Revises: d7a2c9e3f481
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8f2a9c614'
+down_revision: Union[str, None] = 'd7a2c9e3f481'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('todos_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.String(length=500), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('complete', sa.Boolean(), server_default=sa.text('1'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('owner_id', sa.VARCHAR(length=36), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_todos_archive_owner_id_priority_created_at', 'todos_archive', ['owner_id', 'priority', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_archive_owner_id_priority_created_at', table_name='todos_archive')
+    op.drop_table('todos_archive')
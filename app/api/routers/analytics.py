@@ -0,0 +1,64 @@
+from datetime import date
+from typing import Annotated, Dict, List, Optional
+from fastapi import APIRouter, Depends, Query
+
+from app.core.admission import admit_low
+from app.core.logger_config import get_logger
+from app.models.user import User
+from app.schemas.analytics import DailyTrend, PriorityDistribution
+from app.services.analytics_service import AnalyticsService
+from app.services.auth_service import AuthService
+
+router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
+analytics_service_dependency = Annotated[
+    AnalyticsService, Depends(AnalyticsService.get_analytics_service)
+]
+logger = get_logger(__name__)
+
+
+@router.get(
+    "/daily",
+    response_model=List[DailyTrend],
+    dependencies=[Depends(admit_low)],
+)
+async def get_daily_trends(
+    analytics_service: analytics_service_dependency,
+    start: Optional[date] = Query(None, description="First day (UTC), default 30 days ago"),
+    end: Optional[date] = Query(None, description="Last day (UTC), default today"),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    """Todos created and completed, and active users, per day."""
+    logger.info(f"User '{curr_user.email}' is fetching daily trends ({start} - {end}).")
+    return await analytics_service.get_daily_trends(curr_user, start, end)
+
+
+@router.get(
+    "/priorities",
+    response_model=PriorityDistribution,
+    dependencies=[Depends(admit_low)],
+)
+async def get_priority_distribution(
+    analytics_service: analytics_service_dependency,
+    start: Optional[date] = Query(None, description="First day (UTC), default 30 days ago"),
+    end: Optional[date] = Query(None, description="Last day (UTC), default today"),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    """Todos created and completed per priority over a range of days."""
+    logger.info(
+        f"User '{curr_user.email}' is fetching the priority distribution ({start} - {end})."
+    )
+    return await analytics_service.get_priority_distribution(curr_user, start, end)
+
+
+@router.post(
+    "/rollups/run",
+    response_model=Dict[str, int],
+    dependencies=[Depends(admit_low)],
+)
+async def run_rollups(
+    analytics_service: analytics_service_dependency,
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    """Fold recent todo changes into the rollups now; returns changes counted."""
+    logger.info(f"User '{curr_user.email}' triggered the rollup aggregator.")
+    return await analytics_service.run_rollups(curr_user)
@@ -1,32 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, OAuth2PasswordRequestForm
+from redis import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
+from app.core.admission import admit_high
 from app.core.logger_config import get_logger
-from app.schemas.user import AuthRequest, UserCreate, UserResponse
-from app.services.auth_service import AuthService
+from app.core.rate_limiter import client_ip, login_rate_limiter, register_rate_limiter
+from app.schemas.user import (
+    AuthRequest,
+    LogoutRequest,
+    RefreshRequest,
+    UserCreate,
+    UserResponse,
+)
+from app.services.auth_service import AuthService, security
+from app.services.user_service import UserService
 from app.database.database import get_db, User
+from app.database.redis_cahce import CacheOps, get_redis_cache
 from app.exceptions import UserNotAuthorizedException
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 logger = get_logger(__name__)
 
 
-@router.get("", status_code=status.HTTP_200_OK, response_model=UserResponse)
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    response_model=UserResponse,
+    dependencies=[Depends(admit_high)],
+)
 async def get_current_user(curr_user: User = Depends(AuthService.get_current_user)):
     """Fetch the currently authenticated user."""
     logger.info(f"User '{curr_user.email}' fetched their profile.")
     return UserResponse.model_validate(curr_user.__dict__)
 
 
-@router.post("/login", response_model=dict)
+@router.post("/login", response_model=dict, dependencies=[Depends(admit_high)])
 async def login(
     # form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     form_data: AuthRequest,
+    request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis_cache)],
 ):
     """Authenticate user and generate access token."""
     logger.info(f"Login attempt for user: {form_data.email}")
+    # Reject floods before the bcrypt verify
+    await login_rate_limiter.check(CacheOps(redis), client_ip(request), form_data.email)
     user = await AuthService.authenticate_user(
         db, form_data.email, form_data.password
     )
@@ -37,24 +57,84 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
 
-    token = await AuthService.create_access_token(user.email)
+    token = await AuthService.create_access_token(user.email, user.token_version)
+    refresh_token = await AuthService.create_refresh_token(db, user.id)
     logger.info(f"User '{user.email}' logged in successfully.")
-    return {"access_token": token, "token_type": "bearer"}
+    return {
+        "access_token": token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/refresh", response_model=dict, dependencies=[Depends(admit_high)])
+async def refresh(
+    refresh_request: RefreshRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Exchange a refresh token for a new access token and refresh token."""
+    user, refresh_token = await AuthService.rotate_refresh_token(
+        db, refresh_request.refresh_token
+    )
+    token = await AuthService.create_access_token(user.email, user.token_version)
+    logger.info(f"User '{user.email}' refreshed their session.")
+    return {
+        "access_token": token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
 
 
 @router.post(
-    "/register", status_code=status.HTTP_201_CREATED, response_model=UserResponse
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(admit_high)],
+)
+async def logout(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis_cache)],
+    logout_request: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """Revoke the current access token and, if given, its refresh token."""
+    cache = CacheOps(redis)
+    # Authenticated here rather than with get_current_user, which drops the claims
+    curr_user, claims = await AuthService.authenticate_token(
+        db, cache, credentials.credentials
+    )
+    refresh_token = logout_request.refresh_token if logout_request else None
+    await AuthService.logout(db, cache, curr_user, claims, refresh_token)
+    logger.info(f"User '{curr_user.email}' logged out.")
+
+
+@router.post(
+    "/register",
+    status_code=status.HTTP_201_CREATED,
+    response_model=UserResponse,
+    dependencies=[Depends(admit_high)],
 )
 async def register_user(
-    new_user: UserCreate, db: Annotated[AsyncSession, Depends(get_db)]
+    new_user: UserCreate,
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis_cache)],
 ):
     """Register a new user."""
     logger.info(f"New user registration attempt: {new_user.email}")
+    # Reject floods before the bcrypt hash
+    await register_rate_limiter.check(
+        CacheOps(redis), client_ip(request), new_user.email
+    )
 
     try:
         user = await AuthService.create_user(db, new_user)
-        logger.info(f"User '{user.email}' registered successfully.")
+        await UserService.suggestions(CacheOps(redis)).add(
+            (user.id, user.username), (user.id, new_user.email)
+        )
+        logger.info(f"User '{new_user.email}' registered successfully.")
         return user
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error registering user '{new_user.email}': {str(e)}")
         raise HTTPException(
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, status
+
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException
+from app.models.user import User
+from app.services.auth_service import AuthService
+
+router = APIRouter(prefix="/api/v1/metrics", tags=["metrics"])
+logger = get_logger(__name__)
+
+
+@router.get("", status_code=status.HTTP_200_OK, response_model=dict)
+async def get_metrics(curr_user: User = Depends(AuthService.get_current_user)):
+    """Return this worker's in-process metrics (admin only)."""
+    if curr_user.role != "ADMIN":
+        logger.warning(f"User {curr_user.id} is not authorized to view metrics.")
+        raise UserNotAuthorizedException()
+    logger.debug("Metrics snapshot requested.")
+    return metrics.snapshot()
@@ -1,33 +1,75 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, Path, Query, status, HTTPException
+from typing import Annotated, List, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    status,
+)
+from redis.exceptions import RedisError
 
+from app.core.admission import admit_high, admit_low, admit_normal
+from app.core.change_feed import change_feed, stream_events
+from app.core.etag import set_etag
 from app.core.logger_config import get_logger
+from app.core.revocation import revocation_list
+from app.database.database import SessionLocal
+from app.database.redis_cahce import CacheOps, get_redis_cache
 from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException
 from app.models.user import User
 from app.schemas.page import Page
-from app.schemas.todo import TodoCreate, TodoResponse, TodoUpdate
+from app.schemas.purge import TodoPurgeResponse
+from app.schemas.search import SearchMode, Suggestion
+from app.schemas.todo import (
+    TodoBatchResponse,
+    TodoChanges,
+    TodoCreate,
+    TodoResponse,
+    TodoStatsResponse,
+    TodoUpdate,
+)
 from app.services.auth_service import AuthService
+from app.services.purge_service import PurgeService
 from app.services.todo_service import TodoService
 
 router = APIRouter(prefix="/api/v1/todos", tags=["todos"])
 todo_service_dependency = Annotated[TodoService, Depends(TodoService.get_todo_service)]
+purge_service_dependency = Annotated[
+    PurgeService, Depends(PurgeService.get_purge_service)
+]
 logger = get_logger(__name__)
 
 
-@router.get("", response_model=Page[TodoResponse])
+@router.get("", response_model=Page[TodoResponse], dependencies=[Depends(admit_low)])
 async def get_all_todos(
     todo_service: todo_service_dependency,
+    response: Response,
     curr_user: User = Depends(AuthService.get_current_user),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
 ):
     logger.info(
         f"Fetching all todos for user {curr_user.id} with limit={limit}, offset={offset}"
     )
-    return await todo_service.get_all_todos(curr_user, limit, offset)
+    todo_page, etag = await todo_service.get_all_todos(
+        curr_user, limit, offset, if_none_match
+    )
+    set_etag(response, etag)
+    return todo_page
 
 
-@router.post("", response_model=TodoResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=TodoResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admit_normal)],
+)
 async def add_new_todo(
     todo_service: todo_service_dependency,
     new_todo: TodoCreate,
@@ -37,102 +79,306 @@ async def add_new_todo(
     return await todo_service.create_todo(curr_user, new_todo)
 
 
-@router.get("/user/{user_id}/uncompleted", response_model=Page[TodoResponse])
+@router.get(
+    "/batch",
+    response_model=TodoBatchResponse,
+    dependencies=[Depends(admit_normal)],
+)
+async def get_todos_batch(
+    todo_service: todo_service_dependency,
+    ids: List[int] = Query(..., min_length=1, max_length=100),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    logger.info(f"User {curr_user.id} is fetching {len(ids)} todos by id")
+    return await todo_service.get_todos(curr_user, ids)
+
+
+@router.get(
+    "/user/{user_id}/uncompleted",
+    response_model=Page[TodoResponse],
+    dependencies=[Depends(admit_normal)],
+)
 async def get_user_uncompleted_todos(
     todo_service: todo_service_dependency,
+    response: Response,
     user_id: str = Path(min_length=36, max_length=36),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     logger.info(f"Fetching uncompleted todos for user {user_id} by {curr_user.id}")
-    return await todo_service.get_uncompleted_todos(curr_user, user_id, limit, offset)
+    todo_page, etag = await todo_service.get_uncompleted_todos(
+        curr_user, user_id, limit, offset, if_none_match
+    )
+    set_etag(response, etag)
+    return todo_page
 
 
-@router.get("/user/{user_id}/completed", response_model=Page[TodoResponse])
+@router.get(
+    "/user/{user_id}/completed",
+    response_model=Page[TodoResponse],
+    dependencies=[Depends(admit_normal)],
+)
 async def get_user_completed_todos(
     todo_service: todo_service_dependency,
+    response: Response,
     user_id: str = Path(min_length=36, max_length=36),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     logger.info(f"Fetching completed todos for user {user_id} by {curr_user.id}")
-    return await todo_service.get_completed_todos(curr_user, user_id, limit, offset)
+    todo_page, etag = await todo_service.get_completed_todos(
+        curr_user, user_id, limit, offset, if_none_match
+    )
+    set_etag(response, etag)
+    return todo_page
 
 
-@router.get("/user/{user_id}/search", response_model=Page[TodoResponse])
+@router.get(
+    "/user/{user_id}/search",
+    response_model=Page[TodoResponse],
+    dependencies=[Depends(admit_low)],
+)
 async def search(
     todo_service: todo_service_dependency,
     user_id: str = Path(min_length=36, max_length=36),
     search_term: str = Query(),
+    mode: SearchMode = Query(SearchMode.natural),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     logger.info(
         f"User {curr_user.id} is searching todos for user {user_id} with term '{search_term}'"
     )
     return await todo_service.search_by_fulltext(
-        curr_user, user_id, search_term, limit, offset
+        curr_user, user_id, search_term, limit, offset, mode, cursor
     )
 
 
-@router.get("/user/{user_id}", response_model=Page[TodoResponse])
+@router.get(
+    "/user/{user_id}/suggest",
+    response_model=List[Suggestion],
+    dependencies=[Depends(admit_high)],
+)
+async def suggest(
+    todo_service: todo_service_dependency,
+    user_id: str = Path(min_length=36, max_length=36),
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    logger.info(
+        f"User {curr_user.id} is requesting title suggestions for user {user_id} with prefix '{prefix}'"
+    )
+    return await todo_service.suggest_titles(curr_user, user_id, prefix, limit)
+
+
+@router.get(
+    "/user/{user_id}/stats",
+    response_model=TodoStatsResponse,
+    dependencies=[Depends(admit_high)],
+)
+async def get_user_todo_stats(
+    todo_service: todo_service_dependency,
+    user_id: str = Path(min_length=36, max_length=36),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    logger.info(f"Fetching todo statistics for user {user_id} by {curr_user.id}")
+    return await todo_service.get_todo_stats(curr_user, user_id)
+
+
+@router.post(
+    "/user/{user_id}/stats/recompute",
+    response_model=TodoStatsResponse,
+    dependencies=[Depends(admit_low)],
+)
+async def recompute_user_todo_stats(
+    todo_service: todo_service_dependency,
+    user_id: str = Path(min_length=36, max_length=36),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    logger.info(f"User {curr_user.id} is recomputing todo statistics for user {user_id}")
+    return await todo_service.recompute_todo_stats(curr_user, user_id)
+
+
+@router.get(
+    "/user/{user_id}/changes",
+    response_model=TodoChanges,
+    dependencies=[Depends(admit_normal)],
+)
+async def get_user_todo_changes(
+    todo_service: todo_service_dependency,
+    user_id: str = Path(min_length=36, max_length=36),
+    since: Optional[str] = Query(None, max_length=200),
+    limit: int = Query(100, ge=1, le=500),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    logger.info(f"User {curr_user.id} is syncing todos of user {user_id} since {since}")
+    return await todo_service.get_todo_changes(curr_user, user_id, since, limit)
+
+
+@router.get(
+    "/user/{user_id}",
+    response_model=Page[TodoResponse],
+    dependencies=[Depends(admit_normal)],
+)
 async def get_user_todos(
     todo_service: todo_service_dependency,
+    response: Response,
     user_id: str = Path(min_length=36, max_length=36),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     logger.info(f"Fetching all todos for user {user_id} by {curr_user.id}")
-    return await todo_service.get_user_todos(curr_user, user_id, limit, offset)
+    todo_page, etag = await todo_service.get_user_todos(
+        curr_user, user_id, limit, offset, if_none_match
+    )
+    set_etag(response, etag)
+    return todo_page
+
+
+@router.websocket("/user/{user_id}/feed")
+async def todo_feed(
+    websocket: WebSocket,
+    user_id: str = Path(min_length=36, max_length=36),
+    token: Optional[str] = Query(None, description="Access token, for browsers"),
+):
+    """
+    Push create, update, delete and clear events of a user's todos.
+
+    Authenticated with the same access token as the REST endpoints, sent as a
+    bearer header or, where a client cannot set headers, as `token`.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[len("bearer "):]
+    if not token:
+        await websocket.close(status.WS_1008_POLICY_VIOLATION, "Not authenticated")
+        return
+
+    redis = await get_redis_cache()
+    cache = CacheOps(redis)
+    try:
+        async with SessionLocal() as db:
+            curr_user, claims = await AuthService.authenticate_token(db, cache, token)
+    except HTTPException as e:
+        await websocket.close(status.WS_1008_POLICY_VIOLATION, str(e.detail))
+        return
+    if user_id != curr_user.id and curr_user.role != "ADMIN":
+        logger.warning(f"User {curr_user.id} is not authorized to follow user {user_id}")
+        await websocket.close(status.WS_1008_POLICY_VIOLATION, "Not authorized")
+        return
+
+    try:
+        subscription = await change_feed.subscribe(redis, user_id)
+    except (RedisError, OSError) as e:
+        logger.error(f"Change feed unavailable: {e!r}")
+        subscription = None
+    if subscription is None:
+        await websocket.close(status.WS_1013_TRY_AGAIN_LATER, "Try again later")
+        return
+
+    async def still_valid() -> bool:
+        jti = claims.get("jti")
+        return not (jti and await revocation_list.is_revoked(cache, jti))
+
+    logger.info(f"User {curr_user.id} is following todo changes of user {user_id}")
+    try:
+        await websocket.accept()
+        await stream_events(websocket, subscription, claims["exp"], still_valid)
+    finally:
+        await change_feed.unsubscribe(subscription)
 
 
 @router.delete(
     "/user/{user_id}/completed",
-    response_model=None,
-    status_code=status.HTTP_204_NO_CONTENT,
+    response_model=TodoPurgeResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(admit_low)],
 )
 async def delete_user_completed(
     todo_service: todo_service_dependency,
+    request: Request,
+    response: Response,
     user_id: str = Path(min_length=36, max_length=36),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     logger.info(f"User {curr_user.id} is deleting completed todos for user {user_id}")
-    await todo_service.delete_completed_todos(curr_user, user_id)
+    purge = await todo_service.delete_completed_todos(curr_user, user_id)
+    response.headers["Location"] = str(request.url_for("get_purge", purge_id=purge.id))
+    return purge
 
 
-@router.get("/{todo_id}", response_model=TodoResponse)
+@router.get(
+    "/purges/{purge_id}",
+    response_model=TodoPurgeResponse,
+    dependencies=[Depends(admit_high)],
+)
+async def get_purge(
+    purge_service: purge_service_dependency,
+    purge_id: str = Path(min_length=36, max_length=36),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    logger.info(f"User {curr_user.id} is checking purge {purge_id}")
+    return await purge_service.get_purge(curr_user, purge_id)
+
+
+@router.get(
+    "/{todo_id}",
+    response_model=TodoResponse,
+    dependencies=[Depends(admit_high)],
+)
 async def get_todo(
     todo_service: todo_service_dependency,
+    response: Response,
     todo_id: int = Path(),
+    if_none_match: Optional[str] = Header(None),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     logger.info(f"User {curr_user.id} is fetching todo {todo_id}")
-    todo = await todo_service.get_todo(curr_user, todo_id)
+    todo, etag = await todo_service.get_todo(curr_user, todo_id, if_none_match)
     if not todo:
         logger.warning(f"Todo {todo_id} not found for user {curr_user.id}")
         raise HTTPException(status_code=404, detail="Todo not found")
+    set_etag(response, etag)
     return todo
 
 
-@router.put("/{todo_id}", response_model=TodoResponse)
+@router.put(
+    "/{todo_id}",
+    response_model=TodoResponse,
+    dependencies=[Depends(admit_normal)],
+)
 async def update_todo(
     todo_service: todo_service_dependency,
+    response: Response,
     update_todo_obj: TodoUpdate,
     todo_id: int = Path(),
+    if_match: Optional[str] = Header(None),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     logger.info(
         f"User {curr_user.id} is updating todo {todo_id} with {update_todo_obj}"
     )
-    return await todo_service.update_todo(curr_user, todo_id, update_todo_obj)
+    todo, etag = await todo_service.update_todo(
+        curr_user, todo_id, update_todo_obj, if_match
+    )
+    set_etag(response, etag)
+    return todo
 
 
 @router.delete(
-    "/{todo_id}", response_model=None, status_code=status.HTTP_204_NO_CONTENT
+    "/{todo_id}",
+    response_model=None,
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(admit_normal)],
 )
 async def delete_todo(
     todo_service: todo_service_dependency,
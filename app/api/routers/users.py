@@ -1,10 +1,20 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, Path, Query, HTTPException, status
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Header, Path, Query, Request, Response, HTTPException, status
+from app.core.admission import admit_high, admit_low, admit_normal
+from app.core.etag import set_etag
 from app.core.logger_config import get_logger
 from app.database.redis_cahce import get_redis_cache, serializer
 from app.models.user import User
 from app.schemas.page import Page
-from app.schemas.user import UserResponse, UserUpdate, PasswordUpdate, RoleUpdate
+from app.schemas.purge import TodoPurgeResponse
+from app.schemas.search import SearchMode, Suggestion
+from app.schemas.user import (
+    UserResponse,
+    UserUpdate,
+    UserWithTodoCountsResponse,
+    PasswordUpdate,
+    RoleUpdate,
+)
 from app.services.auth_service import AuthService
 from app.services.user_service import UserService
 
@@ -13,47 +23,91 @@ user_service_dependency = Annotated[UserService, Depends(UserService.get_user_se
 logger = get_logger(__name__)
 
 
-@router.get("", response_model=Page[UserResponse])
+@router.get(
+    "",
+    response_model=Page[UserWithTodoCountsResponse],
+    dependencies=[Depends(admit_low)],
+)
 async def get_all_users(
     user_service: user_service_dependency,
     curr_user: User = Depends(AuthService.get_current_user),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    include_todo_stats: bool = Query(False, description="Add each user's todo counts"),
 ):
     """Fetch all users with pagination."""
     logger.info(
         f"User '{curr_user.email}' is fetching all users (limit={limit}, offset={offset})."
     )
-    return await user_service.get_all_users(curr_user, limit, offset)
-
-
-@router.get("/{user_id}", response_model=UserResponse)
-async def get_user(
-    user_service: user_service_dependency,
-    user_id: str = Path(min_length=36, max_length=36),
-    curr_user: User = Depends(AuthService.get_current_user),
-):
-    """Fetch a specific user, with caching."""
-    logger.info(f"User '{curr_user.email}' is fetching user '{user_id}'.")
-    return await user_service.get_user(curr_user, user_id)
+    return await user_service.get_all_users(
+        curr_user, limit, offset, include_todo_stats
+    )
 
 
-@router.get("/search", response_model=Page[UserResponse])
+@router.get(
+    "/search",
+    response_model=Page[UserWithTodoCountsResponse],
+    dependencies=[Depends(admit_low)],
+)
 async def search_users_endpoint(
     user_service: user_service_dependency,
     search_term: str = Query(..., description="Search term for users"),
+    mode: SearchMode = Query(SearchMode.natural),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include_todo_stats: bool = Query(False, description="Add each user's todo counts"),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
     """Search for users based on a search term."""
     logger.info(
         f"User '{curr_user.email}' is searching users with term '{search_term}' (limit={limit}, offset={offset})."
     )
-    return await user_service.search_users(curr_user, search_term, limit, offset)
+    return await user_service.search_users(
+        curr_user, search_term, limit, offset, mode, cursor, include_todo_stats
+    )
+
+
+@router.get(
+    "/suggest",
+    response_model=List[Suggestion],
+    dependencies=[Depends(admit_high)],
+)
+async def suggest_users_endpoint(
+    user_service: user_service_dependency,
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    """Suggest usernames and emails starting with a prefix."""
+    logger.info(f"User '{curr_user.email}' is requesting user suggestions for '{prefix}'.")
+    return await user_service.suggest_users(curr_user, prefix, limit)
+
+
+@router.get(
+    "/{user_id}",
+    response_model=UserResponse,
+    dependencies=[Depends(admit_high)],
+)
+async def get_user(
+    user_service: user_service_dependency,
+    response: Response,
+    user_id: str = Path(min_length=36, max_length=36),
+    if_none_match: Optional[str] = Header(None),
+    curr_user: User = Depends(AuthService.get_current_user),
+):
+    """Fetch a specific user, with caching and conditional requests."""
+    logger.info(f"User '{curr_user.email}' is fetching user '{user_id}'.")
+    user, etag = await user_service.get_user(curr_user, user_id, if_none_match)
+    set_etag(response, etag)
+    return user
 
 
-@router.put("/{user_id}", response_model=UserResponse)
+@router.put(
+    "/{user_id}",
+    response_model=UserResponse,
+    dependencies=[Depends(admit_normal)],
+)
 async def update_user(
     update_user: UserUpdate,
     user_service: user_service_dependency,
@@ -64,17 +118,30 @@ async def update_user(
     logger.info(f"User '{curr_user.email}' is updating user '{user_id}'.")
     return await user_service.update_user(curr_user, user_id, update_user)
 
-@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{user_id}",
+    response_model=TodoPurgeResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(admit_normal)],
+)
 async def delete_user(
     user_service: user_service_dependency,
+    request: Request,
+    response: Response,
     user_id: str = Path(min_length=36, max_length=36),
     curr_user: User = Depends(AuthService.get_current_user),
 ):
-    """Delete a user."""
+    """Delete a user; their todos and then the user are deleted in the background."""
     logger.warning(f"User '{curr_user.email}' is deleting user '{user_id}'.")
-    await user_service.delete_user(curr_user, user_id)
+    purge = await user_service.delete_user(curr_user, user_id)
+    response.headers["Location"] = str(request.url_for("get_purge", purge_id=purge.id))
+    return purge
 
-@router.patch("/{user_id}/password", response_model=UserResponse)
+@router.patch(
+    "/{user_id}/password",
+    response_model=UserResponse,
+    dependencies=[Depends(admit_normal)],
+)
 async def update_password(
     user_service: user_service_dependency,
     new_password: PasswordUpdate,
@@ -86,7 +153,11 @@ async def update_password(
     return await user_service.update_password(curr_user, user_id, new_password)
 
 
-@router.patch("/{user_id}/role", response_model=UserResponse)
+@router.patch(
+    "/{user_id}/role",
+    response_model=UserResponse,
+    dependencies=[Depends(admit_normal)],
+)
 async def change_user_role(
     user_service: user_service_dependency,
     new_role: RoleUpdate,
@@ -0,0 +1,185 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from fastapi import Request
+
+from app.core.deadline import (
+    REQUEST_TIMEOUT_HEADER,
+    deadline_for,
+    remaining,
+    request_deadline,
+)
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.exceptions.ServiceUnavailableException import ServiceUnavailableException
+
+logger = get_logger(__name__)
+
+# Lanes in priority order: auth and small reads, regular reads and writes,
+# then searches and full listings. Lanes double as route classes for deadlines.
+LANES = ("high", "normal", "low")
+
+
+class AdmissionController:
+    """
+    Per-worker admission control in front of DB-bound routes.
+
+    At most `limit` requests run at once, and the low lane may only use
+    `low_share` of those slots. Others wait in a bounded FIFO queue per lane and
+    are admitted highest lane first. A request is rejected straight away when the
+    queue is full or its expected wait exceeds its deadline, and rejected when
+    the deadline passes while waiting, so overload turns into fast 503s instead
+    of pile-ups on the connection pool.
+    """
+
+    def __init__(
+        self, limit: int, queue_size: int, max_wait_ms: int, low_share: float
+    ):
+        self.limit = max(1, limit)
+        self.queue_size = queue_size
+        self.max_wait = max_wait_ms / 1000
+        self.low_limit = max(1, int(self.limit * low_share))
+        self.in_flight = 0
+        self.in_flight_by_lane: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {
+            lane: deque() for lane in LANES
+        }
+        # Moving average of how long an admitted request holds its slot
+        self.service_time = 0.0
+
+    def _has_slot(self, lane: str) -> bool:
+        if self.in_flight >= self.limit:
+            return False
+        return lane != "low" or self.in_flight_by_lane["low"] < self.low_limit
+
+    def _queued(self) -> int:
+        return sum(len(waiters) for waiters in self.waiters.values())
+
+    def _queued_ahead(self, lane: str) -> int:
+        """Waiters that would be admitted before a new request in `lane`."""
+        ahead = 0
+        for other in LANES[: LANES.index(lane) + 1]:
+            ahead += len(self.waiters[other])
+        return ahead
+
+    def _expected_wait(self, position: int) -> float:
+        return position * self.service_time / self.limit
+
+    def _retry_after(self, expected_wait: float) -> int:
+        return max(1, math.ceil(expected_wait or self.service_time))
+
+    def _grant(self, lane: str) -> None:
+        self.in_flight += 1
+        self.in_flight_by_lane[lane] += 1
+        metrics.incr(f"admission.admitted.{lane}")
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge("admission.in_flight", self.in_flight)
+        metrics.set_gauge("admission.queued", self._queued())
+
+    def _reject(self, lane: str, reason: str, expected_wait: float):
+        metrics.incr(f"admission.rejected.{lane}")
+        logger.warning(f"Rejected {lane} priority request: {reason}")
+        return ServiceUnavailableException(self._retry_after(expected_wait))
+
+    async def acquire(self, lane: str, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a slot in `lane` for at most `timeout` seconds (the configured
+        maximum wait by default), raising ServiceUnavailableException otherwise.
+        """
+        timeout = self.max_wait if timeout is None else min(timeout, self.max_wait)
+        ahead = self._queued_ahead(lane)
+        if ahead == 0 and self._has_slot(lane):
+            self._grant(lane)
+            return
+
+        expected_wait = self._expected_wait(ahead + 1)
+        if self._queued() >= self.queue_size:
+            raise self._reject(lane, "admission queue is full", expected_wait)
+        if timeout <= 0 or expected_wait > timeout:
+            raise self._reject(lane, "expected wait exceeds deadline", expected_wait)
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[lane].append(future)
+        self._update_gauges()
+        started_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except BaseException as e:
+            # A slot granted just as the wait ended must not be lost
+            if future.done() and not future.cancelled():
+                if not isinstance(e, asyncio.TimeoutError):
+                    self.release(lane, 0.0)
+                    raise
+            else:
+                future.cancel()
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                raise self._reject(lane, "deadline passed while queued", expected_wait)
+        finally:
+            if future in self.waiters[lane]:
+                self.waiters[lane].remove(future)
+            self._update_gauges()
+        metrics.observe("admission.wait_seconds", time.monotonic() - started_at)
+
+    def release(self, lane: str, held: float) -> None:
+        """Free a slot held for `held` seconds and admit whoever is next."""
+        self.in_flight -= 1
+        self.in_flight_by_lane[lane] -= 1
+        self.service_time = (
+            held if not self.service_time else 0.8 * self.service_time + 0.2 * held
+        )
+        self._wake()
+        self._update_gauges()
+
+    def _wake(self) -> None:
+        for lane in LANES:
+            waiters = self.waiters[lane]
+            while waiters and self._has_slot(lane):
+                future = waiters.popleft()
+                if future.done():
+                    continue
+                self._grant(lane)
+                future.set_result(None)
+
+
+admission_controller = AdmissionController(
+    ENVConfig.ADMISSION_CONCURRENCY,
+    ENVConfig.ADMISSION_QUEUE_SIZE,
+    ENVConfig.ADMISSION_MAX_WAIT_MS,
+    ENVConfig.ADMISSION_LOW_PRIORITY_SHARE,
+)
+
+
+def admission(lane: str):
+    """
+    Build a route dependency that starts the request's deadline for `lane` and
+    holds an admission slot in that lane, waiting no longer than the deadline.
+    """
+
+    async def dependency(request: Request):
+        token = request_deadline.set(
+            deadline_for(lane, request.headers.get(REQUEST_TIMEOUT_HEADER))
+        )
+        try:
+            await admission_controller.acquire(lane, remaining())
+            started_at = time.monotonic()
+            try:
+                yield
+            finally:
+                admission_controller.release(lane, time.monotonic() - started_at)
+        finally:
+            request_deadline.reset(token)
+
+    return dependency
+
+
+# Route dependencies, one per lane
+admit_high = admission("high")
+admit_normal = admission("normal")
+admit_low = admission("low")
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+from redis.exceptions import RedisError
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.redis_cahce import CacheOps
+
+logger = get_logger(__name__)
+
+# Pub/sub channel of one owner's todo events
+CHANNEL_PREFIX = "todo-events:owner-"
+
+# Seconds to wait before reading again after the pub/sub connection failed
+_RECONNECT_DELAY = 1.0
+
+# Why a subscription stopped
+SLOW_CONSUMER = "slow consumer"
+DISCONNECTED = "disconnected"
+
+
+def todo_channel(owner_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{owner_id}"
+
+
+async def publish_todo_event(
+    cache: CacheOps, owner_id: str, event: str, **data
+) -> None:
+    """
+    Tell every worker's change feed about a committed change to an owner's todos.
+
+    Events are fire and forget: a client that misses one (Redis down, dropped
+    connection) resyncs from the list endpoints after reconnecting.
+    """
+    message = json.dumps({"event": event, "owner_id": owner_id, **data}, default=str)
+    await cache.publish(todo_channel(owner_id), message)
+
+
+class Subscription:
+    """
+    Events waiting to be sent to one connection.
+
+    The queue is bounded: a consumer that falls behind by more than
+    `queue_size` events is stopped and disconnected, instead of buffering
+    without limit for a client that cannot keep up.
+    """
+
+    def __init__(self, owner_id: str, queue_size: int):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.stopped: Optional[str] = None
+
+    def offer(self, message: str) -> None:
+        if self.stopped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            metrics.incr("change_feed.slow_consumers")
+            self.stop(SLOW_CONSUMER)
+
+    def stop(self, reason: str) -> None:
+        """Drop pending events and wake the sender with a None to end the stream."""
+        if self.stopped:
+            return
+        self.stopped = reason
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class ChangeFeed:
+    """
+    Per-worker fan-out of todo events from Redis pub/sub to WebSocket connections.
+
+    The worker holds a single pub/sub connection, subscribed to the channel of
+    every owner with at least one local listener, and one reader task that
+    hands each message to those listeners' queues. Idle connections cost no
+    Redis connection and no polling.
+    """
+
+    def __init__(self, max_connections: int, queue_size: int):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.listeners: Dict[str, Set[Subscription]] = {}
+        self.connections = 0
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge("change_feed.connections", self.connections)
+        metrics.set_gauge("change_feed.channels", len(self.listeners))
+
+    async def subscribe(self, client, owner_id: str) -> Optional[Subscription]:
+        """Start listening to an owner's events, or return None when at capacity."""
+        if self.connections >= self.max_connections:
+            metrics.incr("change_feed.rejected")
+            return None
+
+        if self.pubsub is None:
+            self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        subscription = Subscription(owner_id, self.queue_size)
+        listeners = self.listeners.setdefault(owner_id, set())
+        listeners.add(subscription)
+        self.connections += 1
+        self._update_gauges()
+        try:
+            if len(listeners) == 1:
+                await self.pubsub.subscribe(todo_channel(owner_id))
+        except BaseException:
+            await self.unsubscribe(subscription)
+            raise
+
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.create_task(self._read())
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        listeners = self.listeners.get(subscription.owner_id)
+        if listeners is None or subscription not in listeners:
+            return
+        listeners.discard(subscription)
+        self.connections -= 1
+        if not listeners:
+            del self.listeners[subscription.owner_id]
+            try:
+                await self.pubsub.unsubscribe(todo_channel(subscription.owner_id))
+            except (RedisError, OSError) as e:
+                # Messages for the channel are dropped once nobody listens
+                logger.warning(f"Failed to unsubscribe from owner events: {e!r}")
+        self._update_gauges()
+
+    async def _read(self) -> None:
+        """Deliver pub/sub messages to local listeners while anyone listens."""
+        while self.listeners:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except (RedisError, OSError) as e:
+                # The client reconnects and resubscribes on the next read
+                metrics.incr("change_feed.read_errors")
+                logger.error(f"Change feed lost its pub/sub connection: {e!r}")
+                await asyncio.sleep(_RECONNECT_DELAY)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode()
+            owner_id = channel.removeprefix(CHANNEL_PREFIX)
+            for subscription in list(self.listeners.get(owner_id, ())):
+                subscription.offer(data)
+            metrics.incr("change_feed.messages")
+
+    async def close(self) -> None:
+        if self.reader is not None:
+            self.reader.cancel()
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+        self.listeners.clear()
+        self.connections = 0
+        self.pubsub = self.reader = None
+
+
+async def stream_events(
+    websocket: WebSocket,
+    subscription: Subscription,
+    expires_at: float,
+    still_valid: Callable[[], Awaitable[bool]],
+) -> None:
+    """
+    Send an accepted connection its subscription's events until either side
+    closes it.
+
+    A heartbeat goes out after `ENVConfig.CHANGE_FEED_HEARTBEAT_SECONDS`
+    without events; the token is re-checked with `still_valid` at each one and
+    the connection is closed once the token expires at `expires_at` (epoch
+    seconds). Slow consumers are closed with 1013 so they reconnect and resync.
+    """
+    receiver = asyncio.create_task(_receive_until_disconnect(websocket, subscription))
+    try:
+        while True:
+            timeout = min(
+                ENVConfig.CHANGE_FEED_HEARTBEAT_SECONDS, expires_at - time.time()
+            )
+            if timeout <= 0:
+                await websocket.close(status.WS_1008_POLICY_VIOLATION, "Token expired")
+                return
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if not await still_valid():
+                    await websocket.close(
+                        status.WS_1008_POLICY_VIOLATION, "Token revoked"
+                    )
+                    return
+                message = json.dumps({"event": "heartbeat"})
+
+            if message is None:
+                if subscription.stopped == SLOW_CONSUMER:
+                    logger.warning(
+                        f"Dropping slow change feed consumer of {subscription.owner_id}"
+                    )
+                    await websocket.close(status.WS_1013_TRY_AGAIN_LATER, "Resync")
+                return
+            await asyncio.wait_for(
+                websocket.send_text(message),
+                ENVConfig.CHANGE_FEED_SEND_TIMEOUT_SECONDS,
+            )
+            metrics.incr("change_feed.sent")
+    except asyncio.TimeoutError:
+        metrics.incr("change_feed.slow_consumers")
+        logger.warning(f"Change feed send timed out for {subscription.owner_id}")
+    except (WebSocketDisconnect, RuntimeError, OSError):
+        # The client went away while we were sending
+        pass
+    finally:
+        receiver.cancel()
+
+
+async def _receive_until_disconnect(
+    websocket: WebSocket, subscription: Subscription
+) -> None:
+    """Read and ignore client messages, stopping the subscription on disconnect."""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except (WebSocketDisconnect, RuntimeError):
+        return
+    finally:
+        subscription.stop(DISCONNECTED)
+
+
+# Change feed shared by every connection in this worker
+change_feed = ChangeFeed(
+    ENVConfig.CHANGE_FEED_MAX_CONNECTIONS, ENVConfig.CHANGE_FEED_QUEUE_SIZE
+)
@@ -0,0 +1,63 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.exceptions.DeadlineExceededException import DeadlineExceededException
+
+logger = get_logger(__name__)
+
+# Header a client can use to ask for a shorter budget, in milliseconds
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+# Time budget per route class, in milliseconds
+ROUTE_BUDGETS_MS = {
+    "high": ENVConfig.REQUEST_TIMEOUT_HIGH_MS,
+    "normal": ENVConfig.REQUEST_TIMEOUT_NORMAL_MS,
+    "low": ENVConfig.REQUEST_TIMEOUT_LOW_MS,
+}
+
+# Monotonic time by which the current request must finish, if it has a budget
+request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+def deadline_for(route_class: str, requested_ms: Optional[str] = None) -> float:
+    """
+    Return the deadline for a request of `route_class`.
+
+    A valid `X-Request-Timeout` value can shorten the route budget but never
+    extend it.
+    """
+    budget_ms = ROUTE_BUDGETS_MS[route_class]
+    if requested_ms:
+        try:
+            budget_ms = min(budget_ms, max(0, int(requested_ms)))
+        except ValueError:
+            logger.debug(f"Ignoring invalid {REQUEST_TIMEOUT_HEADER}: {requested_ms}")
+    return time.monotonic() + budget_ms / 1000
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, or None without a deadline."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def bounded_timeout(timeout: float) -> float:
+    """Return `timeout` capped by the time left in the current request's budget."""
+    left = remaining()
+    return timeout if left is None else min(timeout, left)
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceededException if the current request's budget is spent."""
+    left = remaining()
+    if left is not None and left <= 0:
+        metrics.incr("requests.deadline_exceeded")
+        raise DeadlineExceededException()
@@ -0,0 +1,71 @@
+import hashlib
+from typing import List, Optional
+
+from fastapi import Response
+
+from app.core.metrics import metrics
+from app.exceptions.NotModifiedException import NotModifiedException
+
+# Clients may keep responses but must revalidate them before every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag of a response identified by `parts`.
+
+    The parts must include a version stamp the write paths change, such as a
+    cache generation, so the tag changes whenever the response body may.
+    """
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode())
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def version_etag(version: int) -> str:
+    """Strong ETag of a resource carrying its own row version."""
+    return f'"{version}"'
+
+
+def if_match_versions(if_match: Optional[str]) -> Optional[List[int]]:
+    """
+    Row versions an If-Match header accepts, or None if it sets no condition
+    (absent, or "*" for any existing version).
+
+    If-Match compares strongly, so weak and foreign tags match no version.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    versions = []
+    for candidate in if_match.split(","):
+        tag = candidate.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists `etag` (weak comparison).
+
+    "*" is not honoured: version stamps can outlive the resource they describe.
+    """
+    if not if_none_match:
+        return False
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def check_not_modified(if_none_match: Optional[str], etag: Optional[str]) -> None:
+    """Raise NotModifiedException if the client already holds version `etag`."""
+    if etag is not None and etag_matches(if_none_match, etag):
+        metrics.incr("http.not_modified")
+        raise NotModifiedException(etag)
+
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    """Tag a 200 response, unless no version stamp was available for it."""
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
@@ -12,10 +12,145 @@ class ENVConfig:
     PASSWORD = os.getenv("PASSWORD")
     DATABASE = os.getenv("DATABASE")
 
-    DATABASE_URL = f"mysql+aiomysql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}"
+    # "mysql" (default) or "sqlite" for an embedded single-node deployment that
+    # keeps everything in one WAL-mode file at SQLITE_PATH
+    DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "mysql").lower()
+    if DATABASE_BACKEND not in ("mysql", "sqlite"):
+        raise ValueError(
+            f"DATABASE_BACKEND must be 'mysql' or 'sqlite', not {DATABASE_BACKEND!r}"
+        )
+    SQLITE_PATH = os.getenv("SQLITE_PATH", "todo_app.db")
+    # Milliseconds a SQLite writer waits for the write lock before failing
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    if DATABASE_BACKEND == "sqlite":
+        DATABASE_URL = f"sqlite+aiosqlite:///{SQLITE_PATH}"
+    else:
+        DATABASE_URL = f"mysql+aiomysql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}"
+
+    # Connection pool sizing, used for the primary and for each replica
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+    # Admission control in front of DB-bound routes, per worker. The concurrency
+    # limit defaults to the pool capacity; low priority routes get a share of it.
+    ADMISSION_CONCURRENCY = int(
+        os.getenv("ADMISSION_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW))
+    )
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "100"))
+    ADMISSION_MAX_WAIT_MS = int(os.getenv("ADMISSION_MAX_WAIT_MS", "2000"))
+    ADMISSION_LOW_PRIORITY_SHARE = float(os.getenv("ADMISSION_LOW_PRIORITY_SHARE", "0.5"))
+
+    # Request time budgets per route class; clients may ask for less with the
+    # X-Request-Timeout header (milliseconds)
+    REQUEST_TIMEOUT_HIGH_MS = int(os.getenv("REQUEST_TIMEOUT_HIGH_MS", "3000"))
+    REQUEST_TIMEOUT_NORMAL_MS = int(os.getenv("REQUEST_TIMEOUT_NORMAL_MS", "5000"))
+    REQUEST_TIMEOUT_LOW_MS = int(os.getenv("REQUEST_TIMEOUT_LOW_MS", "3000"))
+
+    # Optional read replicas: comma separated SQLAlchemy URLs
+    DATABASE_REPLICA_URLS = [
+        url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    # Seconds reads of written data stay on the primary after the write
+    READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
 
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
     JWT_EXPIRATION = int(os.getenv("JWT_EXPIRATION"))
+    # Seconds the user record behind a token is cached for request authentication
+    AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+    # Rotating refresh tokens: lifetime and the HMAC key their stored hashes use
+    REFRESH_TOKEN_EXPIRATION_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRATION_DAYS", "30"))
+    REFRESH_TOKEN_SECRET = os.getenv("REFRESH_TOKEN_SECRET") or JWT_SECRET_KEY
+    # Seconds between purges of expired refresh tokens; 0 disables the purge task
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS = float(
+        os.getenv("REFRESH_TOKEN_PURGE_INTERVAL_SECONDS", "3600")
+    )
+    # Revoked token ids are synced from Redis into a per-worker Bloom filter
+    REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.01"))
+
+    # Sliding-window rate limits for the bcrypt-bound auth routes, written as
+    # "<requests>/<seconds>" per client IP and per target email ("0/..." disables)
+    LOGIN_RATE_LIMIT_PER_IP = os.getenv("LOGIN_RATE_LIMIT_PER_IP", "20/60")
+    LOGIN_RATE_LIMIT_PER_EMAIL = os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", "5/60")
+    REGISTER_RATE_LIMIT_PER_IP = os.getenv("REGISTER_RATE_LIMIT_PER_IP", "5/60")
+    REGISTER_RATE_LIMIT_PER_EMAIL = os.getenv("REGISTER_RATE_LIMIT_PER_EMAIL", "3/600")
+
+    REDIS_URL = os.getenv("REDIS_URL")
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1.0"))
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "1.0"))
+    # RESP parser: auto (hiredis when installed), hiredis or python
+    REDIS_PARSER = os.getenv("REDIS_PARSER", "auto").lower()
+    # Per-call timeout and circuit breaker for cache calls
+    REDIS_CALL_TIMEOUT_MS = int(os.getenv("REDIS_CALL_TIMEOUT_MS", "200"))
+    REDIS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", "5"))
+    REDIS_BREAKER_RESET_SECONDS = float(os.getenv("REDIS_BREAKER_RESET_SECONDS", "10"))
+
+    # Fetch page rows and total with COUNT(*) OVER() in one query when supported
+    PAGINATION_WINDOW_COUNT = os.getenv("PAGINATION_WINDOW_COUNT", "true").lower() == "true"
+
+    # Read-through cache: soft TTL, extra stale-while-revalidate window and the
+    # cross-worker load lock used for stampede protection
+    CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+    CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "60"))
+    CACHE_LOCK_TIMEOUT_MS = int(os.getenv("CACHE_LOCK_TIMEOUT_MS", "5000"))
+    CACHE_LOCK_WAIT_MS = int(os.getenv("CACHE_LOCK_WAIT_MS", "2000"))
+    CACHE_LOCK_POLL_MS = int(os.getenv("CACHE_LOCK_POLL_MS", "50"))
+
+    # Full-text search: ranked results kept per term and owner generation
+    SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "500"))
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "60"))
+    # Typeahead prefix indexes are rebuilt from the database after this many seconds
+    SUGGEST_INDEX_TTL = int(os.getenv("SUGGEST_INDEX_TTL", "86400"))
+
+    # Daily rollups for admin analytics: how often the aggregator runs (0 disables
+    # it) and how old a todo change must be before it is counted
+    ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "60"))
+    ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+
+    # Next-page prefetch: comma separated endpoint names (all_todos, user_todos,
+    # completed_todos, uncompleted_todos) and a per-worker rate cap
+    PREFETCH_ENDPOINTS = {
+        endpoint.strip()
+        for endpoint in os.getenv("PREFETCH_ENDPOINTS", "user_todos").split(",")
+        if endpoint.strip()
+    }
+    PREFETCH_RATE_PER_SECOND = float(os.getenv("PREFETCH_RATE_PER_SECOND", "20"))
+
+    # WebSocket change feed: live connections per worker, events buffered per
+    # connection before it is dropped as a slow consumer, idle heartbeat interval
+    # and how long one send may take
+    CHANGE_FEED_MAX_CONNECTIONS = int(os.getenv("CHANGE_FEED_MAX_CONNECTIONS", "5000"))
+    CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "100"))
+    CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "30"))
+    CHANGE_FEED_SEND_TIMEOUT_SECONDS = float(os.getenv("CHANGE_FEED_SEND_TIMEOUT_SECONDS", "5"))
+
+    # Delta sync: how old a todo change must be before a sync returns it, how long
+    # deletions are remembered for it and seconds between purges of older ones
+    # (0 disables the purge task)
+    SYNC_LAG_SECONDS = int(os.getenv("SYNC_LAG_SECONDS", "5"))
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+    TOMBSTONE_PURGE_INTERVAL_SECONDS = float(
+        os.getenv("TOMBSTONE_PURGE_INTERVAL_SECONDS", "3600")
+    )
+
+    # Bulk deletes run in the background: todos deleted per transaction, pause
+    # between chunks, how long a worker owns a purge without renewing its lease
+    # and how often workers look for unfinished purges (0 disables the worker)
+    PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "500"))
+    PURGE_CHUNK_PAUSE_SECONDS = float(os.getenv("PURGE_CHUNK_PAUSE_SECONDS", "0.1"))
+    PURGE_LEASE_SECONDS = int(os.getenv("PURGE_LEASE_SECONDS", "60"))
+    PURGE_POLL_SECONDS = float(os.getenv("PURGE_POLL_SECONDS", "30"))
 
-    REDIS_URL = os.getenv("REDIS_URL")
\ No newline at end of file
+    # Completed todos finished more than ARCHIVE_AFTER_DAYS ago are moved to the
+    # archive table: todos moved per transaction, pause between batches and
+    # seconds between runs (0 disables the mover)
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.1"))
+    ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
\ No newline at end of file
@@ -0,0 +1,60 @@
+import threading
+from typing import Dict
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry.
+
+    Counters only go up, gauges hold the last value set, and summaries keep the
+    count, sum and max of observed values. Values are per worker process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.summaries: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to the given value."""
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation in a summary."""
+        with self._lock:
+            summary = self.summaries.setdefault(
+                name, {"count": 0, "sum": 0.0, "max": 0.0}
+            )
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def ratio(self, numerator: str, denominator: str) -> float:
+        """Return counter `numerator` divided by counter `denominator`, or 0."""
+        total = self.counters.get(denominator, 0)
+        return self.counters.get(numerator, 0) / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        """Return a copy of all metrics, with the mean added to each summary."""
+        with self._lock:
+            summaries = {
+                name: {**summary, "avg": summary["sum"] / summary["count"]}
+                for name, summary in self.summaries.items()
+                if summary["count"]
+            }
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "summaries": summaries,
+            }
+
+
+# Global metrics registry
+metrics = Metrics()
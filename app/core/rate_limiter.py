@@ -0,0 +1,150 @@
+import math
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple
+
+from fastapi import Request
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.redis_cahce import CacheOps
+from app.exceptions.TooManyRequestsException import TooManyRequestsException
+
+logger = get_logger(__name__)
+
+# Sliding-window log over sorted sets, checked and recorded atomically.
+# KEYS: one window per key. ARGV: now (ms), member id, then one
+# "limit window_ms" pair per key. Returns 0 if the request was recorded,
+# otherwise the milliseconds until the fullest window has room again.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + i * 2])
+    local window = tonumber(ARGV[2 + i * 2])
+    redis.call("ZREMRANGEBYSCORE", key, "-inf", now - window)
+    if redis.call("ZCARD", key) >= limit then
+        local oldest = redis.call("ZRANGE", key, 0, 0, "WITHSCORES")
+        retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now)
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+for i, key in ipairs(KEYS) do
+    redis.call("ZADD", key, now, ARGV[2])
+    redis.call("PEXPIRE", key, ARGV[2 + i * 2])
+end
+return 0
+"""
+
+# Per-worker windows used while Redis is unavailable: key -> request timestamps (ms)
+_local_windows: Dict[str, Deque[float]] = {}
+
+# Local windows kept before idle ones are swept
+_LOCAL_WINDOWS_MAX = 10000
+
+
+def client_ip(request: Request) -> str:
+    """Address of the connected client (set by the server or a trusted proxy)."""
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit(NamedTuple):
+    limit: int
+    window_ms: int
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse a "<requests>/<seconds>" limit."""
+        limit, seconds = value.split("/")
+        return cls(int(limit), int(float(seconds) * 1000))
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter for one route, keyed by client IP and by email.
+
+    Windows live in Redis and are updated by a single Lua script, so all workers
+    share them. While Redis is unavailable each worker enforces the same limits
+    on its own. A request is only counted when every window has room.
+    """
+
+    def __init__(self, name: str, per_ip: RateLimit, per_email: RateLimit):
+        self.name = name
+        self.per_ip = per_ip
+        self.per_email = per_email
+
+    async def check(self, cache: CacheOps, client_ip: str, email: str) -> None:
+        """Record one request, raising TooManyRequestsException if over the limit."""
+        windows = [
+            (f"ratelimit:{self.name}:ip:{client_ip}", self.per_ip),
+            (f"ratelimit:{self.name}:email:{email.strip().lower()}", self.per_email),
+        ]
+        windows = [(key, rate) for key, rate in windows if rate.limit > 0]
+        if not windows:
+            return
+
+        now_ms = time.time() * 1000
+        args: List = [int(now_ms), uuid.uuid4().hex]
+        for _, rate in windows:
+            args.extend([rate.limit, rate.window_ms])
+        retry_after_ms = await cache.eval(
+            SLIDING_WINDOW_SCRIPT, [key for key, _ in windows], args
+        )
+        if retry_after_ms is None:
+            retry_after_ms = self._check_local(windows, now_ms)
+
+        if retry_after_ms:
+            metrics.incr(f"ratelimit.{self.name}.rejected")
+            logger.warning(f"Rate limit hit on {self.name} for {client_ip} / {email}")
+            raise TooManyRequestsException(max(1, math.ceil(retry_after_ms / 1000)))
+
+    @staticmethod
+    def _check_local(windows: List[tuple], now_ms: float) -> float:
+        """In-process version of SLIDING_WINDOW_SCRIPT."""
+        if len(_local_windows) > _LOCAL_WINDOWS_MAX:
+            _sweep_local_windows(now_ms)
+
+        retry_after = 0.0
+        for key, rate in windows:
+            timestamps = _local_windows.setdefault(key, deque())
+            while timestamps and timestamps[0] <= now_ms - rate.window_ms:
+                timestamps.popleft()
+            if len(timestamps) >= rate.limit:
+                retry_after = max(retry_after, timestamps[0] + rate.window_ms - now_ms)
+        if retry_after > 0:
+            return retry_after
+        for key, _ in windows:
+            _local_windows[key].append(now_ms)
+        return 0
+
+
+def _sweep_local_windows(now_ms: float) -> None:
+    """Drop local windows with no request in the longest configured window."""
+    longest = max(
+        rate.window_ms
+        for limiter in (login_rate_limiter, register_rate_limiter)
+        for rate in (limiter.per_ip, limiter.per_email)
+    )
+    idle = [
+        key
+        for key, timestamps in _local_windows.items()
+        if not timestamps or timestamps[-1] <= now_ms - longest
+    ]
+    for key in idle:
+        del _local_windows[key]
+
+
+login_rate_limiter = RateLimiter(
+    "login",
+    per_ip=RateLimit.parse(ENVConfig.LOGIN_RATE_LIMIT_PER_IP),
+    per_email=RateLimit.parse(ENVConfig.LOGIN_RATE_LIMIT_PER_EMAIL),
+)
+register_rate_limiter = RateLimiter(
+    "register",
+    per_ip=RateLimit.parse(ENVConfig.REGISTER_RATE_LIMIT_PER_IP),
+    per_email=RateLimit.parse(ENVConfig.REGISTER_RATE_LIMIT_PER_EMAIL),
+)
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import math
+import time
+from typing import Iterable, List, Optional
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.redis_cahce import CacheOps
+from app.exceptions.ServiceUnavailableException import ServiceUnavailableException
+
+logger = get_logger(__name__)
+
+# Sorted set of revoked token ids, scored by the token's expiry timestamp
+REVOKED_JTIS_KEY = "auth:revoked-jtis"
+# The same ids scored by revocation sequence number, and the last number used,
+# so workers can read only the revocations made since their last sync
+REVOCATION_LOG_KEY = "auth:revoked-jtis:log"
+REVOCATION_SEQUENCE_KEY = "auth:revoked-jtis:seq"
+REVOCATION_KEYS = [REVOKED_JTIS_KEY, REVOCATION_LOG_KEY, REVOCATION_SEQUENCE_KEY]
+
+# Record a revocation (ARGV: jti, expiry) and return its sequence number
+REVOKE_SCRIPT = """
+local sequence = redis.call("INCR", KEYS[3])
+redis.call("ZADD", KEYS[1], ARGV[2], ARGV[1])
+redis.call("ZADD", KEYS[2], sequence, ARGV[1])
+return sequence
+"""
+
+# Drop revocations of tokens that have expired anyway (ARGV[1] is now), then
+# return {sequence, full, ids}: the revocations logged after sequence ARGV[2], or
+# every live one when ARGV[3] asks for it or the log restarted behind ARGV[2]
+SYNC_SCRIPT = """
+local expired = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+for i = 1, #expired, 1000 do
+    redis.call("ZREM", KEYS[2], unpack(expired, i, math.min(i + 999, #expired)))
+end
+local sequence = tonumber(redis.call("GET", KEYS[3]) or "0")
+if ARGV[3] == "1" or sequence < tonumber(ARGV[2]) then
+    return {sequence, 1, redis.call("ZRANGE", KEYS[1], 0, -1)}
+end
+return {sequence, 0, redis.call("ZRANGEBYSCORE", KEYS[2], "(" .. ARGV[2], "+inf")}
+"""
+
+# Marks a ZSCORE that could not reach Redis
+_UNKNOWN = object()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Membership tests can return false positives at about `error_rate` once
+    `capacity` items are added, but never false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing over one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationList:
+    """
+    Revoked access tokens, checked on every authenticated request.
+
+    Revocations are stored in Redis and mirrored into a per-worker Bloom filter
+    that reads the revocations made since its last sync every
+    `ENVConfig.REVOCATION_SYNC_SECONDS`. A token the filter has never seen is
+    accepted without a network call; only filter hits are confirmed in Redis.
+    Tokens revoked on another worker are therefore seen here within one sync
+    interval.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filter = BloomFilter(capacity, error_rate)
+        # Last revocation sequence number read, None until the first sync
+        self.sequence: Optional[int] = None
+        # Ids added to the filter since it was built, expired ones included
+        self._added = 0
+        # Revocations made in this worker while a sync is running
+        self._revoked_during_sync: Optional[List[str]] = None
+
+    async def revoke(self, cache: CacheOps, jti: str, expires_at: float) -> None:
+        """
+        Revoke token `jti` until it expires at `expires_at` (epoch seconds).
+
+        Raises ServiceUnavailableException if Redis did not store the revocation:
+        the next sync would drop a revocation known only to this worker's filter,
+        and the token would be accepted again.
+        """
+        stored = await cache.eval(REVOKE_SCRIPT, REVOCATION_KEYS, [jti, expires_at])
+        if stored is None:
+            logger.error(f"Could not store revocation of token {jti}")
+            metrics.incr("auth.revocation.failed")
+            raise ServiceUnavailableException(
+                message="Could not log out, please retry later."
+            )
+        self.filter.add(jti)
+        if self._revoked_during_sync is not None:
+            self._revoked_during_sync.append(jti)
+        metrics.incr("auth.revocation.revoked")
+
+    async def is_revoked(self, cache: CacheOps, jti: str) -> bool:
+        """
+        Return True if `jti` was revoked.
+
+        When Redis cannot confirm a filter hit, the token is treated as revoked.
+        """
+        if jti not in self.filter:
+            metrics.incr("auth.revocation.filter_negative")
+            return False
+
+        metrics.incr("auth.revocation.redis_checks")
+        score = await cache.zscore(REVOKED_JTIS_KEY, jti, fallback=_UNKNOWN)
+        if score is _UNKNOWN:
+            logger.warning(f"Could not confirm revocation of token {jti}, rejecting it")
+            return True
+        if score is None:
+            metrics.incr("auth.revocation.false_positive")
+        return score is not None
+
+    async def sync(self, cache: CacheOps) -> None:
+        """
+        Add the revocations stored in Redis since the last sync to the filter.
+
+        A Bloom filter cannot forget expired tokens, so it is rebuilt from every
+        live revocation on the first sync, once it holds more ids than it was
+        sized for, and when the revocation log restarted (Redis lost its data).
+        """
+        full = self.sequence is None or self._added > self.filter.capacity
+        self._revoked_during_sync = []
+        try:
+            result = await cache.eval(
+                SYNC_SCRIPT,
+                REVOCATION_KEYS,
+                [time.time(), self.sequence or 0, int(full)],
+                fallback=None,
+            )
+            if result is None:
+                return
+
+            sequence, rebuilt, members = result
+            members = [
+                member.decode() if isinstance(member, bytes) else member
+                for member in members
+            ]
+            if rebuilt:
+                self._rebuild(members)
+            else:
+                for member in members:
+                    self.filter.add(member)
+                self._added += len(members)
+            self.sequence = int(sequence)
+            metrics.incr("auth.revocation.synced", len(members))
+        finally:
+            self._revoked_during_sync = None
+
+    def _rebuild(self, members: List[str]) -> None:
+        """Replace the filter with one holding `members` and this sync's revocations."""
+        if len(members) > self.capacity:
+            logger.warning(
+                f"{len(members)} revoked tokens exceed the filter capacity "
+                f"of {self.capacity}, growing it"
+            )
+        bloom = BloomFilter(max(self.capacity, 2 * len(members)), self.error_rate)
+        for member in members:
+            bloom.add(member)
+        for jti in self._revoked_during_sync:
+            bloom.add(jti)
+        self.filter = bloom
+        self._added = len(members)
+        metrics.incr("auth.revocation.rebuilds")
+        metrics.set_gauge("auth.revocation.revoked_tokens", len(members))
+
+    async def sync_forever(self, get_cache) -> None:
+        """Keep the filter in sync; meant to run as a background task."""
+        while True:
+            try:
+                await self.sync(CacheOps(await get_cache()))
+            except Exception as e:
+                logger.error(f"Failed to sync revoked tokens: {e}")
+            await asyncio.sleep(ENVConfig.REVOCATION_SYNC_SECONDS)
+
+
+# Revocation list shared by every request in this worker
+revocation_list = RevocationList(
+    ENVConfig.REVOCATION_BLOOM_CAPACITY, ENVConfig.REVOCATION_BLOOM_ERROR_RATE
+)
@@ -0,0 +1,66 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger_config import get_logger
+from app.models.todo import Todo, change_timestamp
+from app.models.todo_archive import TodoArchive
+
+logger = get_logger(__name__)
+
+# Columns copied from a todo to its archived row
+ARCHIVED_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "priority",
+    "complete",
+    "created_at",
+    "finished_at",
+    "version",
+    "updated_at",
+    "owner_id",
+)
+
+
+async def archive_batch(
+    db: AsyncSession, cutoff: datetime, size: int
+) -> Dict[str, List[int]]:
+    """
+    Move up to `size` todos completed before `cutoff` to the archive, oldest
+    first, returning the moved todo ids per owner; the caller commits.
+
+    Statistics count archived todos like hot ones, so they are left alone, and
+    no tombstones are recorded: a moved todo still exists for delta syncs.
+    """
+    rows = (
+        await db.execute(
+            select(Todo.id, Todo.owner_id)
+            .where(Todo.complete == True, Todo.finished_at < cutoff)
+            .order_by(Todo.finished_at, Todo.id)
+            .limit(size)
+            .with_for_update()
+        )
+    ).all()
+    if not rows:
+        return {}
+
+    ids = [row.id for row in rows]
+    await db.execute(
+        insert(TodoArchive).from_select(
+            [*ARCHIVED_COLUMNS, "archived_at"],
+            select(
+                *(getattr(Todo, name) for name in ARCHIVED_COLUMNS),
+                literal(change_timestamp(), TodoArchive.archived_at.type),
+            ).where(Todo.id.in_(ids)),
+        )
+    )
+    await db.execute(delete(Todo).where(Todo.id.in_(ids)))
+
+    moved: Dict[str, List[int]] = defaultdict(list)
+    for row in rows:
+        moved[row.owner_id].append(row.id)
+    return dict(moved)
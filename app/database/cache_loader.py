@@ -0,0 +1,401 @@
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deadline import request_deadline
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.database import SessionLocal, release_connection
+from app.database.redis_cahce import CacheOps, serializer
+from app.exceptions.DeadlineExceededException import DeadlineExceededException
+
+logger = get_logger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+K = TypeVar("K", bound=Hashable)
+Loader = Callable[[AsyncSession], Awaitable[M]]
+# Loads the values of several ids at once, omitting ids that do not exist
+ManyLoader = Callable[[AsyncSession, List[K]], Awaitable[Dict[K, M]]]
+
+# Delete the lock only if it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Replace a cached entry (ARGV[1]) with ARGV[2], keeping its TTL, only if it is
+# unchanged; returns 1 for the one caller that swapped it
+SWAP_ENTRY_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    redis.call("SET", KEYS[1], ARGV[2], "KEEPTTL")
+    return 1
+end
+return 0
+"""
+
+# Loads in flight in this worker, keyed by cache key
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Keys with a stale-while-revalidate refresh already scheduled in this worker
+_refreshing: Set[str] = set()
+
+# Strong references to background cache tasks so they are not garbage collected
+_background_tasks: Set[asyncio.Task] = set()
+
+
+class PrefetchPolicy:
+    """
+    Decides whether an endpoint may prefetch its next page.
+
+    Endpoints opt in through `ENVConfig.PREFETCH_ENDPOINTS`, and a per-worker token
+    bucket caps prefetches at `ENVConfig.PREFETCH_RATE_PER_SECOND`.
+    """
+
+    def __init__(self, endpoints: Set[str], rate_per_second: float):
+        self.endpoints = endpoints
+        self.rate = rate_per_second
+        self.tokens = rate_per_second
+        self.updated_at = time.monotonic()
+
+    def enabled(self, endpoint: str) -> bool:
+        return endpoint in self.endpoints and self.rate > 0
+
+    def try_acquire(self, endpoint: str) -> bool:
+        """Take a prefetch token for `endpoint` if it is enabled and one is free."""
+        if not self.enabled(endpoint):
+            return False
+
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < 1:
+            metrics.incr("cache.prefetch.throttled")
+            return False
+        self.tokens -= 1
+        return True
+
+
+prefetch_policy = PrefetchPolicy(
+    ENVConfig.PREFETCH_ENDPOINTS, ENVConfig.PREFETCH_RATE_PER_SECOND
+)
+
+
+def _update_prefetch_hit_rate() -> None:
+    metrics.set_gauge(
+        "cache.prefetch.hit_rate",
+        metrics.ratio("cache.prefetch.hits", "cache.prefetch.stored"),
+    )
+
+
+def _leader_gave_up(future: asyncio.Future) -> bool:
+    """
+    True if an in-flight load failed because of its leader's own request: it ran
+    out of the leader's deadline, which may be far shorter than a joiner's, or the
+    leader was cancelled. Joiners then load again instead of failing too.
+    """
+    if not future.done():
+        return False
+    return future.cancelled() or isinstance(
+        future.exception(), DeadlineExceededException
+    )
+
+
+class CacheLoader:
+    """
+    Read-through cache loader with stampede protection.
+
+    Concurrent misses for the same key are coalesced into one load per worker, and a
+    short Redis lock lets only one worker query the database while the others wait
+    for its result. Entries carry a soft expiry: past it they are still served while
+    a single background refresh replaces them.
+    """
+
+    def __init__(self, cache: CacheOps, db: AsyncSession):
+        self.cache = cache
+        self.db = db
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"lock:{key}"
+
+    async def get_or_load(
+        self,
+        key: str,
+        model: Type[M],
+        loader: Loader,
+        ttl: int = ENVConfig.CACHE_TTL,
+        stale_ttl: int = ENVConfig.CACHE_STALE_TTL,
+    ) -> M:
+        """
+        Return the cached value for `key`, loading it with `loader` on a miss.
+
+        `loader` receives the session to query with: the request session for
+        foreground loads, and a dedicated session for background refreshes.
+        """
+        entry = await self._read(key)
+        if entry is not None:
+            data, fresh_until, prefetched = entry
+            if prefetched is not None:
+                await self._count_prefetch_hit(key, prefetched, data, fresh_until)
+            if fresh_until is not None and fresh_until < time.time():
+                logger.debug(f"Serving stale cache entry for key: {key}")
+                self._schedule_refresh(key, loader, ttl, stale_ttl)
+            else:
+                logger.debug(f"Cache hit for key: {key}")
+            return model.model_validate(data)
+
+        while True:
+            future = _inflight.get(key)
+            if future is None:
+                break
+            logger.debug(f"Joining in-flight load for key: {key}")
+            try:
+                return model.model_validate(await asyncio.shield(future))
+            except (DeadlineExceededException, asyncio.CancelledError):
+                if not _leader_gave_up(future):
+                    raise
+                # The failure belongs to the leader's request, load with our own budget
+                logger.debug(f"In-flight load for key {key} gave up, retrying it.")
+
+        future = asyncio.get_running_loop().create_future()
+        # Avoid "exception was never retrieved" warnings when nobody joined the load
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        _inflight[key] = future
+        try:
+            value = await self._load(key, model, loader, ttl, stale_ttl)
+            future.set_result(value.model_dump())
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            _inflight.pop(key, None)
+
+    async def get_many_or_load(
+        self,
+        keys: Dict[K, str],
+        model: Type[M],
+        loader: ManyLoader,
+        ttl: int = ENVConfig.CACHE_TTL,
+        stale_ttl: int = ENVConfig.CACHE_STALE_TTL,
+    ) -> Dict[K, M]:
+        """
+        Return the values of several ids, given the cache key of each.
+
+        Cached values come from one MGET. Misses and stale entries are loaded
+        together by one `loader` call with the missing ids, and written back in
+        one pipeline. Ids the loader does not return are left out of the result.
+        Batch loads are not coalesced with other loads of the same keys.
+        """
+        cached = await self.cache.mget(list(keys.values()))
+        values: Dict[K, M] = {}
+        missing = []
+        for id, raw in zip(keys, cached):
+            entry = self._decode(raw) if raw else None
+            if entry is None or (entry[1] is not None and entry[1] < time.time()):
+                missing.append(id)
+            else:
+                values[id] = model.model_validate(entry[0])
+        metrics.incr("cache.batch.hits", len(values))
+        metrics.incr("cache.batch.misses", len(missing))
+        if not missing:
+            return values
+
+        loaded = await loader(self.db, missing)
+        await release_connection(self.db)
+        await self.cache.set_many(
+            {keys[id]: self._envelope(value, ttl) for id, value in loaded.items()},
+            ex=ttl + stale_ttl,
+        )
+        values.update(loaded)
+        return values
+
+    async def get_cached(self, key: str, model: Type[M]) -> Optional[M]:
+        """Return the cached value for `key`, stale or not, without loading on a miss."""
+        entry = await self._read(key)
+        return None if entry is None else model.model_validate(entry[0])
+
+    async def load_uncached(self, loader: Loader) -> M:
+        """
+        Load with the request session, bypassing the cache.
+
+        Used for generation-scoped entries when Redis cannot tell the generation,
+        since an entry cached without one could not be invalidated.
+        """
+        value = await loader(self.db)
+        await release_connection(self.db)
+        return value
+
+    async def _read(self, key: str) -> Optional[tuple]:
+        """
+        Return `(data, fresh_until, prefetched)` for a cached entry, or None on a miss.
+
+        `prefetched` holds the raw entry when it is still flagged as prefetched.
+        """
+        cached = await self.cache.get(key)
+        if not cached:
+            return None
+        return self._decode(cached)
+
+    @staticmethod
+    def _decode(cached: bytes) -> tuple:
+        entry = serializer.deserialize(cached)
+        if isinstance(entry, dict) and "fresh_until" in entry and "data" in entry:
+            prefetched = cached if entry.get("prefetched") else None
+            return entry["data"], entry["fresh_until"], prefetched
+        # Plain entries written without an envelope are treated as fresh
+        return entry, None, None
+
+    async def _count_prefetch_hit(self, key: str, raw: bytes, data, fresh_until) -> None:
+        """
+        Count the first read of a prefetched entry as a prefetch hit.
+
+        The entry is rewritten without its flag, and only the reader whose swap
+        succeeds counts, so every prefetched page is counted at most once.
+        """
+        unflagged = serializer.serialize({"fresh_until": fresh_until, "data": data})
+        if await self.cache.eval(SWAP_ENTRY_SCRIPT, [key], [raw, unflagged], fallback=0):
+            metrics.incr("cache.prefetch.hits")
+            _update_prefetch_hit_rate()
+
+    async def _store(
+        self,
+        key: str,
+        value: BaseModel,
+        ttl: int,
+        stale_ttl: int,
+        prefetched: bool = False,
+    ) -> bool:
+        """
+        Store `value` with a soft expiry of `ttl` and a hard expiry `stale_ttl` later.
+
+        Prefetched entries never overwrite an existing entry.
+        """
+        try:
+            stored = await self.cache.set(
+                key,
+                self._envelope(value, ttl, prefetched),
+                ex=ttl + stale_ttl,
+                nx=prefetched,
+            )
+            logger.debug(f"Data cached successfully with key: {key}")
+            return bool(stored)
+        except Exception as e:
+            logger.error(f"Failed to cache data: {e}")
+            return False
+
+    @staticmethod
+    def _envelope(value: BaseModel, ttl: int, prefetched: bool = False) -> bytes:
+        """Serialize `value` with a soft expiry `ttl` seconds from now."""
+        envelope = {"fresh_until": time.time() + ttl, "data": value.model_dump()}
+        if prefetched:
+            envelope["prefetched"] = True
+        return serializer.serialize(envelope)
+
+    def store_prefetched(
+        self,
+        key: str,
+        value: BaseModel,
+        ttl: int = ENVConfig.CACHE_TTL,
+        stale_ttl: int = ENVConfig.CACHE_STALE_TTL,
+    ) -> None:
+        """Cache a prefetched value in the background without delaying the caller."""
+
+        async def store():
+            # Runs after the request may have finished, so drop its deadline
+            request_deadline.set(None)
+            if await self._store(key, value, ttl, stale_ttl, prefetched=True):
+                metrics.incr("cache.prefetch.stored")
+                _update_prefetch_hit_rate()
+
+        task = asyncio.create_task(store())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _acquire_lock(self, key: str) -> Optional[str]:
+        """
+        Take the load lock for `key`.
+
+        Returns the lock token, "" if Redis is unavailable (load without a lock),
+        or None if another worker holds the lock.
+        """
+        token = uuid.uuid4().hex
+        acquired = await self.cache.try_lock(
+            self._lock_key(key), token, ENVConfig.CACHE_LOCK_TIMEOUT_MS
+        )
+        if acquired is None:
+            return ""
+        return token if acquired else None
+
+    async def _release_lock(self, key: str, token: str) -> None:
+        try:
+            await self.cache.eval(RELEASE_LOCK_SCRIPT, [self._lock_key(key)], [token])
+        except Exception as e:
+            logger.error(f"Failed to release cache lock for key {key}: {e}")
+
+    async def _load(
+        self, key: str, model: Type[M], loader: Loader, ttl: int, stale_ttl: int
+    ) -> M:
+        """Load from the database, letting only one worker do so at a time."""
+        token = await self._acquire_lock(key)
+        if token is None:
+            # Another worker is loading this key; wait for it to publish the result
+            deadline = time.monotonic() + ENVConfig.CACHE_LOCK_WAIT_MS / 1000
+            while time.monotonic() < deadline and self.cache.available:
+                await asyncio.sleep(ENVConfig.CACHE_LOCK_POLL_MS / 1000)
+                entry = await self._read(key)
+                if entry is not None:
+                    logger.debug(f"Loaded key {key} populated by another worker.")
+                    return model.model_validate(entry[0])
+            logger.warning(f"Timed out waiting for cache lock on key: {key}")
+
+        try:
+            value = await loader(self.db)
+            # Hand the connection back before talking to Redis again
+            await release_connection(self.db)
+            await self._store(key, value, ttl, stale_ttl)
+            return value
+        finally:
+            if token:
+                await self._release_lock(key, token)
+
+    def _schedule_refresh(
+        self, key: str, loader: Loader, ttl: int, stale_ttl: int
+    ) -> None:
+        """Start one background refresh for a stale key in this worker."""
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, loader, ttl, stale_ttl))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _refresh(self, key: str, loader: Loader, ttl: int, stale_ttl: int) -> None:
+        """Reload a stale key with its own session unless another worker already is."""
+        # Background refreshes are not bound by the triggering request's deadline
+        request_deadline.set(None)
+        try:
+            token = await self._acquire_lock(key)
+            if not token:
+                return
+            try:
+                async with SessionLocal() as db:
+                    value = await loader(db)
+                await self._store(key, value, ttl, stale_ttl)
+                logger.debug(f"Refreshed stale cache entry for key: {key}")
+            finally:
+                await self._release_lock(key, token)
+        except Exception as e:
+            logger.error(f"Failed to refresh cache entry for key {key}: {e}")
+        finally:
+            _refreshing.discard(key)
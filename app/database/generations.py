@@ -0,0 +1,39 @@
+import uuid
+from typing import Optional
+
+from app.core.logger_config import get_logger
+from app.database.redis_cahce import CacheOps
+
+logger = get_logger(__name__)
+
+# Return the current generation token, starting a new one if it was reset
+GENERATION_SCRIPT = """
+local generation = redis.call("GET", KEYS[1])
+if not generation then
+    generation = ARGV[1]
+    redis.call("SET", KEYS[1], generation)
+end
+return generation
+"""
+
+
+def generation_key(scope: str) -> str:
+    """
+    Redis key holding the generation of `scope`.
+
+    Cached entries of a scope embed its generation in their keys. Writers delete
+    the generation key, so the next read starts a new generation and entries of
+    the old one are never read again; they age out with their TTL. Invalidating
+    a scope is one UNLINK, however many entries it has.
+    """
+    return f"gen:{scope}"
+
+
+async def current_generation(cache: CacheOps, scope: str) -> Optional[str]:
+    """Return the generation token of `scope`, or None if Redis is unavailable."""
+    generation = await cache.eval(
+        GENERATION_SCRIPT, [generation_key(scope)], [uuid.uuid4().hex[:12]]
+    )
+    if isinstance(generation, bytes):
+        generation = generation.decode()
+    return generation
@@ -0,0 +1,101 @@
+import sqlite3
+from typing import Any, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def supports_window_functions(dialect: Dialect) -> bool:
+    """
+    Check whether the connected backend understands `COUNT(*) OVER()`.
+
+    MySQL gained window functions in 8.0, MariaDB in 10.2 and SQLite in 3.25.
+    Unknown backends are assumed to support them.
+    """
+    version = getattr(dialect, "server_version_info", None)
+
+    if dialect.name in ("mysql", "mariadb"):
+        if not version:
+            return False
+        if getattr(dialect, "is_mariadb", False):
+            return version >= (10, 2)
+        return version >= (8, 0)
+
+    if dialect.name == "sqlite":
+        return sqlite3.sqlite_version_info >= (3, 25)
+
+    return True
+
+
+async def _count(db: AsyncSession, query) -> int:
+    """Run a separate `count(*)` over the (unordered) query."""
+    count_query = select(func.count()).select_from(query.order_by(None).subquery())
+    result = await db.execute(count_query)
+    return result.scalar()
+
+
+async def fetch_page(
+    db: AsyncSession, query, limit: int = 10, offset: int = 0
+) -> Tuple[List[Any], int]:
+    """
+    Fetch one page of ORM entities together with the total row count.
+
+    The query must already be filtered and ordered. When window counts are enabled
+    and the backend supports them, the page and the total come back in a single
+    statement; otherwise a `count(*)` is issued before the page SELECT.
+    """
+    if ENVConfig.PAGINATION_WINDOW_COUNT:
+        # Bind on the query itself so a routed session checks the engine it will use
+        connection = await db.connection(bind_arguments={"clause": query})
+        if supports_window_functions(connection.dialect):
+            windowed_query = (
+                query.add_columns(func.count().over().label("total_count"))
+                .offset(offset)
+                .limit(limit)
+            )
+            rows = (await db.execute(windowed_query)).all()
+            if rows:
+                logger.debug(f"Fetched {len(rows)} rows with window count.")
+                return [row[0] for row in rows], rows[0].total_count
+
+            # An empty page carries no total; only pages past the end need a count
+            if offset == 0:
+                return [], 0
+            return [], await _count(db, query)
+
+        logger.debug("Backend lacks window functions, using a separate count.")
+
+    total_count = await _count(db, query)
+    result = await db.execute(query.offset(offset).limit(limit))
+    return result.scalars().all(), total_count
+
+
+async def fetch_chained_page(
+    db: AsyncSession, queries: List[Any], limit: int = 10, offset: int = 0
+) -> Tuple[List[Any], int]:
+    """
+    Fetch one page of several ordered queries read one after the other, together
+    with their total row count.
+
+    Each query is paged on its own, at the offset left after the rows of the
+    queries before it, so the page spans them without a UNION; a query the page
+    does not reach is only counted.
+    """
+    items: List[Any] = []
+    total_count = 0
+    for query in queries:
+        if len(items) < limit:
+            rows, count = await fetch_page(
+                db, query, limit - len(items), max(0, offset - total_count)
+            )
+            items.extend(rows)
+        else:
+            count = await _count(db, query)
+        total_count += count
+    return items, total_count
@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.database.todo_stats import TodoState, remove_todos_from_stats
+from app.database.todo_sync import record_tombstones
+from app.models.todo import Todo, change_timestamp
+from app.models.todo_archive import TodoArchive
+from app.models.todo_purge import TodoPurge
+from app.models.user import User
+from app.schemas.purge import PurgeKind, PurgeStatus
+
+logger = get_logger(__name__)
+
+# Tables holding todos: the hot table and the archive of old completed todos
+TODO_TABLES = (Todo, TodoArchive)
+
+# Set when a purge is requested, so this worker starts it without waiting to poll
+purge_requested = asyncio.Event()
+
+
+async def create_purge(
+    db: AsyncSession, owner_id: str, kind: PurgeKind, requested_by: str
+) -> TodoPurge:
+    """
+    Record a purge of `owner_id`'s todos for the workers; the caller commits and
+    then sets `purge_requested`.
+
+    Todos created after the request are not part of it, except for a user purge,
+    which the caller makes sure no todos are created during.
+    """
+    max_todo_id = None
+    if kind != PurgeKind.user:
+        max_todo_id = max(
+            [
+                await db.scalar(
+                    select(func.max(model.id)).where(model.owner_id == owner_id)
+                ) or 0
+                for model in TODO_TABLES
+            ]
+        )
+    purge = TodoPurge(
+        owner_id=owner_id,
+        kind=kind.value,
+        requested_by=requested_by,
+        max_todo_id=max_todo_id,
+    )
+    db.add(purge)
+    await db.flush()
+    return purge
+
+
+async def claimable_purges(db: AsyncSession, now: datetime) -> List[str]:
+    """Ids of unfinished purges no worker holds a lease on, oldest first."""
+    result = await db.execute(
+        select(TodoPurge.id)
+        .where(
+            TodoPurge.status != PurgeStatus.done.value,
+            or_(TodoPurge.lease_until.is_(None), TodoPurge.lease_until < now),
+        )
+        .order_by(TodoPurge.created_at)
+    )
+    return list(result.scalars().all())
+
+
+async def claim_purge(db: AsyncSession, purge_id: str, owner: str) -> bool:
+    """Take the lease on an unfinished purge, unless another worker holds it."""
+    now = change_timestamp()
+    result = await db.execute(
+        update(TodoPurge)
+        .where(
+            TodoPurge.id == purge_id,
+            TodoPurge.status != PurgeStatus.done.value,
+            or_(TodoPurge.lease_until.is_(None), TodoPurge.lease_until < now),
+        )
+        .values(
+            status=PurgeStatus.running.value,
+            lease_owner=owner,
+            lease_until=now + timedelta(seconds=ENVConfig.PURGE_LEASE_SECONDS),
+            updated_at=now,
+        )
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def lock_purge(db: AsyncSession, purge_id: str, owner: str) -> Optional[TodoPurge]:
+    """
+    Lock a purge for one chunk and renew its lease, or return None if `owner`
+    lost the lease to another worker.
+    """
+    purge = await db.get(TodoPurge, purge_id, with_for_update=True)
+    if purge is None or purge.lease_owner != owner:
+        return None
+    now = change_timestamp()
+    purge.lease_until = now + timedelta(seconds=ENVConfig.PURGE_LEASE_SECONDS)
+    purge.updated_at = now
+    return purge
+
+
+async def delete_chunk(db: AsyncSession, purge: TodoPurge, size: int) -> int:
+    """
+    Delete the next `size` todos of a purge in id order, returning how many were
+    deleted; fewer than `size` means the purge has no todos left.
+
+    Archived todos are deleted along with the hot ones, in the same id order.
+    Only the chunk's rows are locked, and the owner's statistics and tombstones
+    change in the same transaction, so every chunk commits a consistent state.
+    """
+    # Hot rows are locked before archived ones, as the archive mover does
+    chunk = []
+    for model in TODO_TABLES:
+        criteria = [model.owner_id == purge.owner_id, model.id > purge.last_todo_id]
+        if purge.max_todo_id is not None:
+            criteria.append(model.id <= purge.max_todo_id)
+        if purge.kind == PurgeKind.completed.value:
+            criteria.append(model.complete == True)
+        rows = (
+            await db.execute(
+                select(
+                    model.id, model.priority, model.complete, model.created_at,
+                    model.finished_at,
+                )
+                .where(*criteria)
+                .order_by(model.id)
+                .limit(size)
+                .with_for_update()
+            )
+        ).all()
+        chunk.extend((row, model) for row in rows)
+    chunk = sorted(chunk, key=lambda entry: entry[0].id)[:size]
+    if not chunk:
+        return 0
+
+    for model in TODO_TABLES:
+        ids = [row.id for row, source in chunk if source is model]
+        if not ids:
+            continue
+        if purge.kind != PurgeKind.user.value:
+            # A deleted owner's tombstones would go with them
+            await record_tombstones(db, model.id.in_(ids), source=model)
+        await db.execute(delete(model).where(model.id.in_(ids)))
+    await remove_todos_from_stats(
+        db, purge.owner_id, [TodoState.of(row) for row, _ in chunk]
+    )
+    purge.last_todo_id = chunk[-1][0].id
+    purge.deleted_count += len(chunk)
+    return len(chunk)
+
+
+async def finish_purge(db: AsyncSession, purge: TodoPurge) -> Optional[User]:
+    """
+    Mark a purge done; a user purge also deletes the user, who is returned so
+    the caller can drop what is cached about them. The caller commits.
+    """
+    user = None
+    if purge.kind == PurgeKind.user.value:
+        user = await db.get(User, purge.owner_id)
+        if user is not None:
+            await db.execute(delete(User).where(User.id == purge.owner_id))
+    now = change_timestamp()
+    purge.status = PurgeStatus.done.value
+    purge.finished_at = now
+    purge.updated_at = now
+    purge.lease_owner = None
+    purge.lease_until = None
+    return user
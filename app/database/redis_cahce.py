@@ -1,14 +1,22 @@
-from typing import Any
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
 import msgpack
 
 # import aioredis
 import redis.asyncio as redis
+from redis._parsers import _AsyncHiredisParser, _AsyncRESP2Parser
+from redis.exceptions import RedisError
+from redis.utils import HIREDIS_AVAILABLE
 
 
 from datetime import datetime
 
+from app.core.deadline import bounded_timeout
 from app.core.load_env import ENVConfig
 from app.core.logger_config import get_logger
+from app.core.metrics import metrics
 
 logger = get_logger(__name__)
 
@@ -50,10 +58,25 @@ class RedisSerializer:
 redis_client = None
 
 
+def _parser_class():
+    """Pick the RESP parser configured by `ENVConfig.REDIS_PARSER`."""
+    if ENVConfig.REDIS_PARSER == "python":
+        return _AsyncRESP2Parser
+    if ENVConfig.REDIS_PARSER == "hiredis" and not HIREDIS_AVAILABLE:
+        logger.warning("hiredis parser requested but hiredis is not installed.")
+    return _AsyncHiredisParser if HIREDIS_AVAILABLE else _AsyncRESP2Parser
+
+
 # Initialize Redis client
 async def init_redis():
     global redis_client
-    redis_client = await redis.from_url(ENVConfig.REDIS_URL)
+    redis_client = await redis.from_url(
+        ENVConfig.REDIS_URL,
+        max_connections=ENVConfig.REDIS_MAX_CONNECTIONS,
+        socket_timeout=ENVConfig.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=ENVConfig.REDIS_SOCKET_CONNECT_TIMEOUT,
+        parser_class=_parser_class(),
+    )
     logger.info("Connected to Redis DB")
 
 
@@ -71,3 +94,238 @@ async def get_redis_cache():
 
 # Serializer instance
 serializer = RedisSerializer()
+
+
+# Redis round trips made while handling the current request
+redis_round_trips: ContextVar[Optional[List[int]]] = ContextVar(
+    "redis_round_trips", default=None
+)
+
+# Fallback marker for calls whose successful result may itself be None
+_UNAVAILABLE = object()
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding calls to Redis.
+
+    After `failure_threshold` consecutive failures the breaker opens and calls are
+    short-circuited. Once `reset_timeout` seconds have passed it half-opens and lets
+    a single probe call through: success closes it, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # Numeric encoding of the state for the metrics gauge
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._publish_state()
+
+    def _publish_state(self) -> None:
+        metrics.set_gauge(f"{self.name}.breaker.state", self.STATE_VALUES[self.state])
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"{self.name} circuit breaker: {self.state} -> {state}")
+            self.state = state
+            self._publish_state()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted now."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._transition(self.HALF_OPEN)
+        # Half-open: only one probe at a time
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probe_in_flight = False
+        self._transition(self.CLOSED)
+
+    def record_abandoned(self) -> None:
+        """A call was given up for reasons unrelated to Redis health."""
+        self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                metrics.incr(f"{self.name}.breaker.opened")
+            self._transition(self.OPEN)
+
+
+# Breaker shared by every cache call in this worker
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=ENVConfig.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=ENVConfig.REDIS_BREAKER_RESET_SECONDS,
+)
+
+
+class CacheOps:
+    """
+    Fail-open cache operations over the Redis client.
+
+    Every method costs exactly one network round trip: invalidations are batched
+    into a single script call, reads of several keys use MGET and writes of several
+    keys share one pipeline. Round trips are counted per request.
+
+    Each call is bounded by `ENVConfig.REDIS_CALL_TIMEOUT_MS` and guarded by the
+    circuit breaker. When Redis is slow or down, reads behave as misses and writes
+    are skipped, so callers fall through to MySQL instead of failing the request.
+    """
+
+    def __init__(self, client, breaker: CircuitBreaker = redis_breaker):
+        self.client = client
+        self.breaker = breaker
+
+    @property
+    def available(self) -> bool:
+        """False while the breaker is open and calls are being short-circuited."""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    @staticmethod
+    def _count_round_trip() -> None:
+        metrics.incr("redis.round_trips")
+        counter = redis_round_trips.get()
+        if counter is not None:
+            counter[0] += 1
+
+    async def _call(self, operation: str, command: Callable[[], Awaitable], fallback):
+        """
+        Run one Redis command with a timeout, returning `fallback` on failure.
+
+        The timeout is capped by the request's remaining budget. Running out of
+        budget is the request's fault, not Redis's, so it does not trip the breaker.
+        """
+        call_timeout = ENVConfig.REDIS_CALL_TIMEOUT_MS / 1000
+        timeout = bounded_timeout(call_timeout)
+        if timeout <= 0:
+            metrics.incr("redis.calls.skipped_deadline")
+            return fallback
+        if self.client is None or not self.breaker.allow_request():
+            metrics.incr("redis.calls.short_circuited")
+            return fallback
+
+        self._count_round_trip()
+        try:
+            result = await asyncio.wait_for(command(), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            if timeout < call_timeout:
+                metrics.incr("redis.calls.deadline_exceeded")
+                logger.warning(f"Redis {operation} cut short by request deadline.")
+                self.breaker.record_abandoned()
+                return fallback
+            metrics.incr("redis.calls.failed")
+            logger.error(f"Redis {operation} failed: {e!r}")
+            self.breaker.record_failure()
+            return fallback
+        except (RedisError, OSError) as e:
+            metrics.incr("redis.calls.failed")
+            logger.error(f"Redis {operation} failed: {e!r}")
+            self.breaker.record_failure()
+            return fallback
+        self.breaker.record_success()
+        return result
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._call("GET", lambda: self.client.get(key), None)
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Read several keys with one MGET."""
+        if not keys:
+            return []
+        return await self._call(
+            "MGET", lambda: self.client.mget(keys), [None] * len(keys)
+        )
+
+    async def set(self, key: str, value, **kwargs) -> Any:
+        return await self._call(
+            "SET", lambda: self.client.set(key, value, **kwargs), None
+        )
+
+    async def zscore(self, key: str, member: str, fallback=None) -> Any:
+        """Score of `member`, None if absent, or `fallback` if Redis is unavailable."""
+        return await self._call(
+            "ZSCORE", lambda: self.client.zscore(key, member), fallback
+        )
+
+    async def try_lock(self, key: str, token: str, px: int) -> Optional[bool]:
+        """
+        Try to take a lock with SET NX.
+
+        Returns True if acquired, False if held elsewhere and None if Redis is
+        unavailable.
+        """
+        result = await self._call(
+            "SET NX",
+            lambda: self.client.set(key, token, nx=True, px=px),
+            _UNAVAILABLE,
+        )
+        if result is _UNAVAILABLE:
+            return None
+        return bool(result)
+
+    async def set_many(
+        self,
+        items: Dict[str, bytes],
+        ex: Optional[int] = None,
+        px: Optional[int] = None,
+    ) -> None:
+        """Write several keys with one pipeline."""
+        if not items:
+            return
+
+        async def execute():
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, value, ex=ex, px=px)
+                return await pipe.execute()
+
+        await self._call("pipeline SET", execute, None)
+
+    async def publish(self, channel: str, message: str) -> Optional[int]:
+        """Publish to a pub/sub channel; returns the receiver count, or None."""
+        return await self._call(
+            "PUBLISH", lambda: self.client.publish(channel, message), None
+        )
+
+    async def eval(self, script: str, keys: List[str], args: List[Any], fallback=None) -> Any:
+        return await self._call(
+            "EVAL", lambda: self.client.eval(script, len(keys), *keys, *args), fallback
+        )
+
+    async def invalidate(self, keys: Iterable[str]) -> int:
+        """
+        Remove `keys` in one UNLINK.
+
+        Scopes with many entries are invalidated by resetting their generation
+        (see `app.database.generations`), never by scanning for their keys. If
+        Redis is unavailable the invalidation is skipped and stale entries age
+        out with their TTL.
+        """
+        keys = list(keys)
+        if not keys:
+            return 0
+        removed = await self._call("UNLINK", lambda: self.client.unlink(*keys), 0)
+        logger.debug(f"Invalidated {removed} cache keys.")
+        return removed
@@ -0,0 +1,139 @@
+import asyncio
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.database import SessionLocal
+from app.database.redis_cahce import CacheOps
+from app.database.upsert import increment, insert_ignore
+from app.models.rollup import DailyActiveUser, DailyTodoRollup, RollupWatermark
+from app.models.todo import Todo
+
+logger = get_logger(__name__)
+
+# Change sources: watermark name -> (todo timestamp, rollup counter it feeds)
+ROLLUP_SOURCES = {
+    "todos_created": (Todo.created_at, "created_count"),
+    "todos_completed": (Todo.finished_at, "completed_count"),
+}
+
+# Longest time range aggregated in one transaction
+MAX_WINDOW = timedelta(days=1)
+
+# Lets a single worker run the aggregator per interval
+ROLLUP_LOCK_KEY = "rollups:lock"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _as_date(value) -> date:
+    # SQLite returns DATE() as text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+async def _aggregate_window(
+    db: AsyncSession, column, counter: str, start: datetime, end: datetime
+) -> int:
+    """Add the todos whose `column` falls in (start, end] to the rollups."""
+    day = func.date(column)
+    rows = (
+        await db.execute(
+            select(day, Todo.priority, Todo.owner_id, func.count())
+            .where(column > start, column <= end)
+            .group_by(day, Todo.priority, Todo.owner_id)
+        )
+    ).all()
+
+    by_day_priority: Counter = Counter()
+    active_users = set()
+    for row_day, priority, owner_id, count in rows:
+        by_day_priority[(_as_date(row_day), priority)] += count
+        active_users.add((_as_date(row_day), owner_id))
+
+    for (row_day, priority), count in by_day_priority.items():
+        await increment(
+            db,
+            DailyTodoRollup.__table__,
+            {"day": row_day, "priority": priority},
+            {counter: count},
+        )
+    await insert_ignore(
+        db,
+        DailyActiveUser.__table__,
+        [{"day": row_day, "user_id": owner_id} for row_day, owner_id in active_users],
+    )
+    return sum(by_day_priority.values())
+
+
+async def _aggregate_source(name: str, upper: datetime) -> int:
+    """Advance one source's watermark to `upper`, one window per transaction."""
+    column, counter = ROLLUP_SOURCES[name]
+    processed = 0
+    while True:
+        async with SessionLocal() as db:
+            # The locked watermark row serializes concurrent aggregators
+            watermark = await db.get(RollupWatermark, name, with_for_update=True)
+            if watermark is None:
+                oldest = await db.scalar(select(func.min(column)))
+                start = oldest - timedelta(microseconds=1) if oldest else upper
+                watermark = RollupWatermark(name=name, processed_until=start)
+                db.add(watermark)
+
+            start = watermark.processed_until.replace(tzinfo=None)
+            if start >= upper:
+                await db.commit()
+                return processed
+
+            end = min(upper, start + MAX_WINDOW)
+            processed += await _aggregate_window(db, column, counter, start, end)
+            watermark.processed_until = end
+            watermark.updated_at = _utcnow()
+            await db.commit()
+
+
+async def run_rollups(now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Fold todo changes since the last watermark into the daily rollups.
+
+    Only rows older than `ENVConfig.ROLLUP_LAG_SECONDS` are processed, so writes
+    still in flight when the watermark moves are not skipped. Returns the number
+    of todo changes counted per source.
+    """
+    upper = (now or _utcnow()) - timedelta(seconds=ENVConfig.ROLLUP_LAG_SECONDS)
+    counted = {}
+    for name in ROLLUP_SOURCES:
+        counted[name] = await _aggregate_source(name, upper)
+        metrics.incr(f"rollups.{name}", counted[name])
+    logger.info(f"Rollups updated: {counted}")
+    return counted
+
+
+async def run_rollups_forever(get_cache) -> None:
+    """
+    Run the aggregator every `ENVConfig.ROLLUP_INTERVAL_SECONDS`; meant to run as
+    a background task in every worker.
+
+    A Redis lock, left to expire, lets one worker run per interval. Without Redis
+    every worker runs and the watermark lock keeps the counts exact.
+    """
+    interval = ENVConfig.ROLLUP_INTERVAL_SECONDS
+    while True:
+        try:
+            cache = CacheOps(await get_cache())
+            acquired = await cache.try_lock(
+                ROLLUP_LOCK_KEY, uuid.uuid4().hex, int(interval * 1000)
+            )
+            if acquired is not False:
+                await run_rollups()
+        except Exception as e:
+            logger.error(f"Failed to update rollups: {e}")
+        await asyncio.sleep(interval)
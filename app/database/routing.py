@@ -0,0 +1,86 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.database import replica_engines
+from app.database.redis_cahce import CacheOps
+
+logger = get_logger(__name__)
+
+# Local copy of recently written scopes in this worker: scope -> sticky-until timestamp
+_recent_writes: Dict[str, float] = {}
+
+
+def _sticky_key(scope: str) -> str:
+    return f"rw-sticky:{scope}"
+
+
+class ReadYourWrites:
+    """
+    Keeps reads of a scope on the primary for a short window after it was written,
+    so replica lag never hides a change that was just made.
+
+    Stickiness belongs to the data, not to the reader: results loaded for one
+    user are cached and served to every user, so any reader of a scope that was
+    just written must load it from the primary. Scopes are the generation scopes
+    of the cached data (an owner's todos, the user list, ...).
+
+    Written scopes are remembered in this worker and in Redis, so other workers
+    honour the window too. Nothing is tracked when no replicas are configured.
+    """
+
+    def __init__(self, cache: CacheOps):
+        self.cache = cache
+
+    async def mark_write(self, *scopes: str) -> None:
+        """Record that `scopes` have just been written."""
+        if not replica_engines:
+            return
+        window = ENVConfig.READ_YOUR_WRITES_SECONDS
+        sticky_until = time.monotonic() + window
+        for scope in scopes:
+            _recent_writes[scope] = sticky_until
+        await self.cache.set_many(
+            {_sticky_key(scope): b"1" for scope in scopes}, px=int(window * 1000)
+        )
+
+    async def is_sticky(self, *scopes: str) -> bool:
+        """Return True if any of `scopes` was written within the window."""
+        now = time.monotonic()
+        for scope in scopes:
+            sticky_until = _recent_writes.get(scope)
+            if sticky_until is not None:
+                if sticky_until > now:
+                    return True
+                _recent_writes.pop(scope, None)
+        flags = await self.cache.mget([_sticky_key(scope) for scope in scopes])
+        return any(flags)
+
+
+@asynccontextmanager
+async def replica_reads(db: AsyncSession, cache: CacheOps, *scopes: str):
+    """
+    Route SELECTs issued on `db` inside the block to a read replica, yielding
+    whether they go to one.
+
+    Falls back to the primary when no replicas are configured or when any of the
+    `scopes` being read is inside its read-your-writes window.
+    """
+    if not replica_engines or (
+        scopes and await ReadYourWrites(cache).is_sticky(*scopes)
+    ):
+        metrics.incr("db.reads.primary")
+        yield False
+        return
+
+    metrics.incr("db.reads.replica")
+    db.sync_session.info["use_replica"] = True
+    try:
+        yield True
+    finally:
+        db.sync_session.info.pop("use_replica", None)
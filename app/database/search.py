@@ -0,0 +1,275 @@
+import base64
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import re
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import Float, Select, Table, column, false, literal, literal_column, table
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.cache_loader import CacheLoader
+from app.database.generations import current_generation
+from app.exceptions.InvalidCursorException import InvalidCursorException
+from app.exceptions.InvalidSearchQueryException import InvalidSearchQueryException
+from app.models.todo import Todo
+from app.models.user import User
+from app.schemas.page import Page
+from app.schemas.search import SearchMode, SearchResults
+
+logger = get_logger(__name__)
+
+
+def normalize_term(term: str) -> str:
+    """Lowercase the term and collapse whitespace, so equal searches share a key."""
+    return " ".join(term.lower().split())
+
+
+# Words, "quoted phrases" and their +/- operators in MySQL boolean syntax
+_BOOLEAN_TOKEN = re.compile(r'([+-]?)(?:"([^"]*)"|(\S+))')
+
+
+class BooleanClause(NamedTuple):
+    """One clause of a boolean-mode term: a word or phrase and its operator."""
+
+    operator: str  # "+" required, "-" excluded, "" optional
+    words: List[str]
+    prefix: bool
+
+
+def boolean_clauses(term: str) -> List[BooleanClause]:
+    """
+    Parse a normalized boolean-mode term, keeping only the word characters of
+    every clause so no input can break the backend's query syntax. A bare token
+    holding several words, such as an email address, becomes a phrase.
+    """
+    if term.count('"') % 2:
+        raise InvalidSearchQueryException("Unbalanced quote in search term.")
+    clauses = []
+    for operator, quoted, bare in _BOOLEAN_TOKEN.findall(term):
+        words = re.findall(r"\w+", quoted or bare)
+        if words:
+            prefix = bool(bare) and bare.endswith("*")
+            clauses.append(BooleanClause(operator, words, prefix))
+    return clauses
+
+
+def against_term(term: str, mode: SearchMode) -> str:
+    """Build the AGAINST() argument for a normalized term."""
+    if mode == SearchMode.prefix:
+        # InnoDB ignores words shorter than innodb_ft_min_token_size
+        return " ".join(f"+{word}*" for word in re.findall(r"\w+", term))
+    if mode == SearchMode.boolean:
+        parts = []
+        for clause in boolean_clauses(term):
+            if len(clause.words) == 1:
+                body = clause.words[0] + ("*" if clause.prefix else "")
+            else:
+                # MySQL allows no truncation operator after a phrase
+                body = '"' + " ".join(clause.words) + '"'
+            parts.append(clause.operator + body)
+        return " ".join(parts)
+    return term
+
+
+class FullTextIndex(NamedTuple):
+    """
+    Columns of a table searched together: a FULLTEXT index on MySQL, an
+    external-content FTS5 table called `name` on SQLite.
+    """
+
+    name: str
+    table: Table
+    columns: Tuple[str, ...]
+
+
+TODOS_SEARCH_INDEX = FullTextIndex(
+    "todos_fts", Todo.__table__, ("title", "description")
+)
+USERS_SEARCH_INDEX = FullTextIndex(
+    "users_fts",
+    User.__table__,
+    ("username", "email", "first_name", "last_name", "country_code", "phone_number"),
+)
+FULLTEXT_INDEXES = (TODOS_SEARCH_INDEX, USERS_SEARCH_INDEX)
+
+
+class SearchDialect(ABC):
+    """How one database backend runs a full-text search."""
+
+    @abstractmethod
+    def search(
+        self, query: Select, index: FullTextIndex, term: str, mode: SearchMode
+    ) -> Tuple[Select, object]:
+        """
+        Restrict `query` (over `index.table`) to rows matching a normalized term.
+
+        Returns the restricted query and a relevance expression to order by,
+        higher meaning more relevant.
+        """
+
+
+class MySQLSearch(SearchDialect):
+    """MATCH ... AGAINST over a FULLTEXT index covering exactly the index columns."""
+
+    def search(self, query, index, term, mode):
+        columns = [index.table.c[name] for name in index.columns]
+        relevance = match(*columns, against=against_term(term, mode))
+        if mode != SearchMode.natural:
+            relevance = relevance.in_boolean_mode()
+        return query.where(relevance), relevance
+
+
+def _fts5_phrase(words: List[str], prefix: bool = False) -> str:
+    return '"' + " ".join(words) + '"' + ("*" if prefix else "")
+
+
+def fts5_query(term: str, mode: SearchMode) -> Optional[str]:
+    """
+    Translate a normalized term into an FTS5 query, or None if nothing can match.
+
+    Natural mode matches any word, prefix mode every word as a prefix. Boolean
+    mode keeps MySQL's +required, -excluded, "phrase" and prefix* operators;
+    without required words any of the optional ones must match.
+    """
+    if mode != SearchMode.boolean:
+        words = re.findall(r"\w+", term)
+        if mode == SearchMode.prefix:
+            return " AND ".join(_fts5_phrase([word], True) for word in words) or None
+        return " OR ".join(_fts5_phrase([word]) for word in words) or None
+
+    required, optional, excluded = [], [], []
+    for clause in boolean_clauses(term):
+        phrase = _fts5_phrase(clause.words, clause.prefix)
+        {"+": required, "-": excluded, "": optional}[clause.operator].append(phrase)
+
+    if required:
+        query = "(" + " AND ".join(required) + ")"
+    elif optional:
+        query = "(" + " OR ".join(optional) + ")"
+    else:
+        return None
+    return " NOT ".join([query, *excluded])
+
+
+class SQLiteSearch(SearchDialect):
+    """
+    FTS5 MATCH against the index's external-content table, ranked by bm25.
+
+    The FTS5 tables and the triggers keeping them in sync are created by
+    `app.database.sqlite.init_sqlite`.
+    """
+
+    def search(self, query, index, term, mode):
+        match_query = fts5_query(term, mode)
+        if match_query is None:
+            return query.where(false()), literal(0)
+
+        fts = table(index.name, column("rowid"), column("rank", Float))
+        query = query.join(
+            fts, fts.c.rowid == literal_column(f"{index.table.name}.rowid")
+        ).where(literal_column(index.name).op("MATCH")(match_query))
+        # FTS5 ranks better matches lower
+        return query, -fts.c.rank
+
+
+SEARCH_DIALECTS = {"mysql": MySQLSearch(), "sqlite": SQLiteSearch()}
+
+# Dialect of the configured backend, used by the service layer
+search_dialect = SEARCH_DIALECTS[ENVConfig.DATABASE_BACKEND]
+
+
+def results_cache_key(scope: str, generation: str, mode: SearchMode, term: str) -> str:
+    """Cache key of the ranked results for a normalized term."""
+    term_hash = hashlib.sha1(term.encode()).hexdigest()
+    return f"search:{scope}:gen-{generation}:{mode.value}:{term_hash}"
+
+
+def encode_cursor(generation: Optional[str], offset: int) -> str:
+    """Opaque cursor pointing at `offset` within the results of `generation`."""
+    payload = json.dumps({"g": generation, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    """Return the `(generation, offset)` a cursor points at."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        generation, offset = payload["g"], int(payload["o"])
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Invalid search cursor {cursor!r}: {e}")
+        raise InvalidCursorException()
+    if offset < 0 or not (generation is None or isinstance(generation, str)):
+        raise InvalidCursorException()
+    return generation, offset
+
+
+async def cached_search(
+    cache_loader: CacheLoader,
+    scope: str,
+    term: str,
+    mode: SearchMode,
+    model: Type[BaseModel],
+    loader: Callable[[AsyncSession], Awaitable[List[BaseModel]]],
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Page:
+    """
+    Return one page of the ranked results for `term` within `scope`.
+
+    `loader` runs the full-text query once per term and generation, returning at
+    most `ENVConfig.SEARCH_MAX_RESULTS` items in relevance order; pages are then
+    sliced from the cached list. A cursor keeps paging over the results of the
+    generation it started in while they are cached, so they do not shift under
+    the client between pages. Results are only ever loaded under the current
+    generation: once an older generation's results are gone, paging restarts.
+    """
+    term = normalize_term(term)
+    generation = await current_generation(cache_loader.cache, scope)
+    results_model = SearchResults[model]
+    results = None
+    if cursor:
+        cursor_generation, offset = decode_cursor(cursor)
+        if term and cursor_generation != generation:
+            if cursor_generation is not None:
+                results = await cache_loader.get_cached(
+                    results_cache_key(scope, cursor_generation, mode, term),
+                    results_model,
+                )
+            if results is None:
+                logger.info(f"Search cursor for {scope} outdated, restarting paging.")
+                metrics.incr("search.cursor.restarts")
+                offset = 0
+            else:
+                generation = cursor_generation
+
+    if not term:
+        return Page.create([], offset, limit, 0)
+
+    async def load(db: AsyncSession):
+        return results_model(items=await loader(db))
+
+    if results is None and generation is None:
+        # Without a generation the results could not be invalidated, so skip the cache
+        results = await cache_loader.load_uncached(load)
+    elif results is None:
+        results = await cache_loader.get_or_load(
+            results_cache_key(scope, generation, mode, term),
+            results_model,
+            load,
+            ttl=ENVConfig.SEARCH_CACHE_TTL,
+            stale_ttl=0,
+        )
+
+    end = offset + limit
+    next_cursor = encode_cursor(generation, end) if end < len(results.items) else None
+    return Page.create(
+        results.items[offset:end], offset, limit, len(results.items), next_cursor
+    )
@@ -0,0 +1,52 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.logger_config import get_logger
+from app.database.database import Base
+from app.database.search import FULLTEXT_INDEXES, FullTextIndex
+
+logger = get_logger(__name__)
+
+
+def _fts_statements(index: FullTextIndex):
+    """DDL of an FTS5 table over `index` and the triggers that keep it in sync."""
+    name, source = index.name, index.table.name
+    columns = ", ".join(index.columns)
+    new_values = ", ".join(f"new.{column}" for column in index.columns)
+    old_values = ", ".join(f"old.{column}" for column in index.columns)
+    insert_new = f"INSERT INTO {name}(rowid, {columns}) VALUES (new.rowid, {new_values});"
+    delete_old = (
+        f"INSERT INTO {name}({name}, rowid, {columns}) "
+        f"VALUES ('delete', old.rowid, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {name} USING fts5({columns}, content='{source}', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON {source} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON {source} BEGIN {delete_old} END",
+        # Only edits of indexed columns touch the FTS table
+        f"CREATE TRIGGER {name}_au AFTER UPDATE OF {columns} ON {source} "
+        f"BEGIN {delete_old} {insert_new} END",
+        # Index the rows that existed before the table was created
+        f"INSERT INTO {name}({name}) VALUES ('rebuild')",
+    ]
+
+
+async def init_sqlite(engine: AsyncEngine) -> None:
+    """
+    Create the schema of an embedded SQLite database, including the FTS5 search
+    tables, if it does not exist yet. Alembic migrations target MySQL only.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for index in FULLTEXT_INDEXES:
+            exists = await conn.scalar(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": index.name},
+            )
+            if exists:
+                continue
+            logger.info(f"Creating full-text search table {index.name}.")
+            for statement in _fts_statements(index):
+                await conn.execute(text(statement))
+    logger.info("SQLite schema is ready.")
@@ -0,0 +1,285 @@
+import asyncio
+import uuid
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deadline import request_deadline
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.database import SessionLocal, release_connection
+from app.database.redis_cahce import CacheOps
+from app.schemas.search import Suggestion
+
+logger = get_logger(__name__)
+
+# (id, text) pairs held by an index
+Entry = Tuple[Union[int, str], str]
+
+# Members are "<lowercased text>\0<id>\0<text>" with score 0, so ZRANGEBYLEX over
+# the lowercased prefix returns matches in alphabetical order
+SEPARATOR = "\x00"
+
+# Marker member that keeps a built index from looking missing while it is empty
+BUILT_MARKER = ""
+
+# Return up to ARGV[3] members between ARGV[1] and ARGV[2], or false if the
+# index has not been built
+SUGGEST_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return false
+end
+return redis.call("ZRANGEBYLEX", KEYS[1], ARGV[1], ARGV[2], "LIMIT", 0, ARGV[3])
+"""
+
+# Claim the build of a missing index for ARGV[1], holding the claim ARGV[2] seconds
+START_BUILD_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+if redis.call("SET", KEYS[2], ARGV[1], "NX", "EX", ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# Add one chunk of members (ARGV[3..]) to the build of ARGV[1], skipping members
+# that writers removed since the build started, and extend its claim
+BUILD_CHUNK_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+for i = 3, #ARGV do
+    if redis.call("SISMEMBER", KEYS[3], ARGV[i]) == 0 then
+        redis.call("ZADD", KEYS[2], 0, ARGV[i])
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call("EXPIRE", key, ARGV[2])
+end
+return 1
+"""
+
+# Publish the build of ARGV[1] as the index, expiring it after ARGV[2] seconds
+FINISH_BUILD_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("ZADD", KEYS[2], 0, "")  -- BUILT_MARKER
+redis.call("RENAME", KEYS[2], KEYS[4])
+redis.call("EXPIRE", KEYS[4], ARGV[2])
+redis.call("DEL", KEYS[1], KEYS[3])
+return 1
+"""
+
+# Remove the first ARGV[1] members of ARGV[2..] and add the rest, in the built
+# index and in a build in progress. The build also records removals, so members
+# it loaded from the database before the write are not added back.
+UPDATE_SCRIPT = """
+local removals = tonumber(ARGV[1])
+local function apply(index, removed)
+    for i = 2, removals + 1 do
+        redis.call("ZREM", index, ARGV[i])
+        if removed then
+            redis.call("SADD", removed, ARGV[i])
+        end
+    end
+    for i = removals + 2, #ARGV do
+        redis.call("ZADD", index, 0, ARGV[i])
+        if removed then
+            redis.call("SREM", removed, ARGV[i])
+        end
+    end
+end
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    apply(KEYS[1], false)
+end
+local claim = redis.call("TTL", KEYS[2])
+if claim > 0 then
+    apply(KEYS[3], KEYS[4])
+    redis.call("EXPIRE", KEYS[3], claim)
+    redis.call("EXPIRE", KEYS[4], claim)
+end
+return 1
+"""
+
+# Entries loaded per query, and added per script call, while building an index
+BUILD_CHUNK_SIZE = 1000
+
+# Seconds a build may go without progress before another worker may take over
+BUILD_CLAIM_SECONDS = 60
+
+# Keys with a build running in this worker
+_building: Set[str] = set()
+
+# Strong references to build tasks so they are not garbage collected
+_build_tasks: Set[asyncio.Task] = set()
+
+# Redis was unavailable
+_UNAVAILABLE = object()
+
+
+def _member(entry: Entry) -> str:
+    id, text = entry
+    return SEPARATOR.join((text.lower().replace(SEPARATOR, ""), str(id), text))
+
+
+def _suggestion(member: Union[bytes, str]) -> Suggestion:
+    if isinstance(member, bytes):
+        member = member.decode()
+    _, id, text = member.split(SEPARATOR, 2)
+    return Suggestion(id=id, text=text)
+
+
+class PrefixIndex:
+    """
+    Prefix index over short texts (todo titles, usernames, emails) in one sorted set.
+
+    A lookup is a single ZRANGEBYLEX, so typeahead never runs a full-text query.
+    A missing index is built by a background task, one chunk of
+    `BUILD_CHUNK_SIZE` entries per query and per Redis call, while lookups are
+    served by a bounded prefix query. Writers keep the index current through
+    `add`, `remove` and `replace`, including a build in progress, so writes that
+    race a build are not lost. The index expires after
+    `ENVConfig.SUGGEST_INDEX_TTL` seconds; writers that change many rows at once
+    `drop` it instead.
+    """
+
+    def __init__(self, cache: CacheOps, key: str):
+        self.cache = cache
+        self.key = key
+
+    @staticmethod
+    def keys_of(key: str) -> List[str]:
+        """
+        The index at `key` and the keys of its build, in the order the scripts
+        expect them: index, build claim, build, removals seen by the build.
+        """
+        return [key, f"{key}:build-claim", f"{key}:build", f"{key}:build-removed"]
+
+    async def _update(self, removed: Sequence[Entry], added: Sequence[Entry]) -> None:
+        if not removed and not added:
+            return
+        members = [_member(entry) for entry in (*removed, *added)]
+        await self.cache.eval(
+            UPDATE_SCRIPT, self.keys_of(self.key), [len(removed), *members]
+        )
+
+    async def add(self, *entries: Entry) -> None:
+        await self._update((), entries)
+
+    async def remove(self, *entries: Entry) -> None:
+        await self._update(entries, ())
+
+    async def replace(self, old: Entry, new: Entry) -> None:
+        """Swap one entry for another, e.g. after a rename."""
+        if old != new:
+            await self._update((old,), (new,))
+
+    async def drop(self) -> None:
+        """Forget the index and abandon any build of it; the next lookup rebuilds it."""
+        await self.cache.invalidate(keys=self.keys_of(self.key))
+
+    async def suggest(
+        self,
+        db: AsyncSession,
+        prefix: str,
+        limit: int,
+        load_chunk: Callable[
+            [AsyncSession, Optional[Any], int], Awaitable[Sequence[Entry]]
+        ],
+        load_matches: Callable[[AsyncSession, str, int], Awaitable[Iterable[Entry]]],
+    ) -> List[Suggestion]:
+        """
+        Return up to `limit` entries whose text starts with `prefix` (ignoring case).
+
+        `load_chunk(db, after, size)` returns the entries of the next `size` rows
+        with an id above `after` (all rows when None), ordered by id, and is used
+        to build a missing index. `load_matches` runs the same prefix lookup in
+        the database and serves lookups while the index is missing or Redis is
+        unavailable.
+        """
+        prefix = prefix.strip().lower().replace(SEPARATOR, "")
+        if not prefix:
+            return []
+
+        members = await self.cache.eval(
+            SUGGEST_SCRIPT,
+            [self.key],
+            [b"[" + prefix.encode(), b"[" + prefix.encode() + b"\xff", limit],
+            fallback=_UNAVAILABLE,
+        )
+        if members is _UNAVAILABLE or members is None:
+            if members is None:
+                self._schedule_build(load_chunk)
+            else:
+                metrics.incr("suggest.database_fallback")
+                logger.warning(f"Suggestions for {self.key} served from the database.")
+            entries = await load_matches(db, prefix, limit)
+            await release_connection(db)
+            return [Suggestion(id=str(id), text=text) for id, text in entries]
+
+        metrics.incr("suggest.lookups")
+        return [_suggestion(member) for member in members if member]
+
+    def _schedule_build(self, load_chunk) -> None:
+        """Start building the index in the background unless this worker already is."""
+        if self.key in _building:
+            return
+        _building.add(self.key)
+        task = asyncio.create_task(self._build(load_chunk))
+        _build_tasks.add(task)
+        task.add_done_callback(_build_tasks.discard)
+
+    async def _build(self, load_chunk) -> None:
+        """Build the index chunk by chunk, unless another worker already is."""
+        # Runs after the triggering request may have finished
+        request_deadline.set(None)
+        keys = self.keys_of(self.key)
+        token = uuid.uuid4().hex
+        try:
+            started = await self.cache.eval(
+                START_BUILD_SCRIPT, keys[:2], [token, BUILD_CLAIM_SECONDS]
+            )
+            if not started:
+                return
+
+            metrics.incr("suggest.index_builds")
+            logger.info(f"Building suggestion index {self.key}.")
+            after = None
+            while True:
+                async with SessionLocal() as db:
+                    entries = await load_chunk(db, after, BUILD_CHUNK_SIZE)
+                if not entries:
+                    break
+                after = entries[-1][0]
+                added = await self.cache.eval(
+                    BUILD_CHUNK_SCRIPT,
+                    keys[1:],
+                    [token, BUILD_CLAIM_SECONDS, *(_member(entry) for entry in entries)],
+                )
+                if not added:
+                    logger.info(f"Build of suggestion index {self.key} was abandoned.")
+                    return
+
+            await self.cache.eval(
+                FINISH_BUILD_SCRIPT,
+                [keys[1], keys[2], keys[3], keys[0]],
+                [token, ENVConfig.SUGGEST_INDEX_TTL],
+            )
+        except Exception as e:
+            logger.error(f"Failed to build suggestion index {self.key}: {e}")
+        finally:
+            _building.discard(self.key)
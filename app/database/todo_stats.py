@@ -0,0 +1,232 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger_config import get_logger
+from app.database.upsert import increment
+from app.models.todo import Todo
+from app.models.todo_archive import TodoArchive
+from app.models.todo_stats import TodoDailyCompletions, TodoStats
+from app.schemas.todo import TodoCounts, TodoCountsByUser, TodoStatsResponse
+
+logger = get_logger(__name__)
+
+# Columns of a TodoStats row that hold counters
+STATS_COUNTERS = ("open_count", "completed_count", "timed_count", "completion_seconds")
+
+PRIORITIES = range(1, 6)
+
+
+class TodoState(NamedTuple):
+    """The fields of a todo that its owner's statistics depend on."""
+
+    priority: int
+    complete: bool
+    created_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    @classmethod
+    def of(cls, todo: Todo) -> "TodoState":
+        return cls(todo.priority, bool(todo.complete), todo.created_at, todo.finished_at)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC datetime; naive values from the database are already UTC."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _contribution(state: TodoState) -> Tuple[Counter, Optional[date]]:
+    """What one todo adds to its priority's counters, and the day it finished."""
+    if not state.complete:
+        return Counter(open_count=1), None
+
+    counters = Counter(completed_count=1)
+    created_at, finished_at = _as_utc(state.created_at), _as_utc(state.finished_at)
+    if created_at is not None and finished_at is not None:
+        counters["timed_count"] = 1
+        counters["completion_seconds"] = int((finished_at - created_at).total_seconds())
+    return counters, finished_at.date() if finished_at is not None else None
+
+
+async def apply_todo_change(
+    db: AsyncSession,
+    user_id: str,
+    before: Optional[TodoState],
+    after: Optional[TodoState],
+) -> None:
+    """
+    Move `user_id`'s statistics from a todo's state `before` a write to its state
+    `after` it (None for a created or deleted todo).
+
+    Call inside the transaction making the write, so both commit together.
+    """
+    await _apply_contributions(db, user_id, [(before, -1), (after, 1)])
+
+
+async def remove_todos_from_stats(
+    db: AsyncSession, user_id: str, states: List[TodoState]
+) -> None:
+    """
+    Remove deleted todos in `states` from `user_id`'s statistics, with one
+    statement per priority and finishing day however many todos there are.
+    """
+    await _apply_contributions(db, user_id, [(state, -1) for state in states])
+
+
+async def _apply_contributions(
+    db: AsyncSession, user_id: str, signed_states: List[Tuple[Optional[TodoState], int]]
+) -> None:
+    """Add (sign 1) or subtract (sign -1) each todo state's contribution."""
+    by_priority: Dict[int, Counter] = defaultdict(Counter)
+    by_day: Counter = Counter()
+    for state, sign in signed_states:
+        if state is None:
+            continue
+        counters, day = _contribution(state)
+        for name, amount in counters.items():
+            by_priority[state.priority][name] += sign * amount
+        if day is not None:
+            by_day[day] += sign
+
+    for priority, counters in by_priority.items():
+        increments = {name: amount for name, amount in counters.items() if amount}
+        if increments:
+            await increment(
+                db,
+                TodoStats.__table__,
+                {"user_id": user_id, "priority": priority},
+                increments,
+            )
+    for day, amount in by_day.items():
+        if amount:
+            await increment(
+                db,
+                TodoDailyCompletions.__table__,
+                {"user_id": user_id, "day": day},
+                {"completed_count": amount},
+            )
+
+
+async def clear_todo_stats(db: AsyncSession, user_id: str) -> None:
+    """Reset the statistics of a user whose todos were all deleted."""
+    await db.execute(delete(TodoStats).where(TodoStats.user_id == user_id))
+    await db.execute(
+        delete(TodoDailyCompletions).where(TodoDailyCompletions.user_id == user_id)
+    )
+
+
+async def recompute_todo_stats(db: AsyncSession, user_id: str) -> None:
+    """
+    Rebuild a user's statistics from their todos, repairing any drift.
+
+    Scans all of the user's todos, archived ones included; the caller commits.
+    """
+    by_priority: Dict[int, Counter] = defaultdict(Counter)
+    by_day: Counter = Counter()
+    # Archived todos count like the ones still in `todos`
+    for model in (Todo, TodoArchive):
+        result = await db.execute(
+            select(model.priority, model.complete, model.created_at, model.finished_at)
+            .filter(model.owner_id == user_id)
+            .with_for_update()
+        )
+        for row in result:
+            state = TodoState(
+                row.priority, bool(row.complete), row.created_at, row.finished_at
+            )
+            counters, day = _contribution(state)
+            by_priority[state.priority].update(counters)
+            if day is not None:
+                by_day[day] += 1
+
+    await clear_todo_stats(db, user_id)
+    if by_priority:
+        await db.execute(
+            insert(TodoStats),
+            [
+                {
+                    "user_id": user_id,
+                    "priority": priority,
+                    **{name: counters[name] for name in STATS_COUNTERS},
+                }
+                for priority, counters in by_priority.items()
+            ],
+        )
+    if by_day:
+        await db.execute(
+            insert(TodoDailyCompletions),
+            [
+                {"user_id": user_id, "day": day, "completed_count": count}
+                for day, count in by_day.items()
+            ],
+        )
+    logger.info(f"Recomputed todo statistics for user: {user_id}")
+
+
+async def load_todo_counts(db: AsyncSession, user_ids: List[str]) -> TodoCountsByUser:
+    """
+    Read the open and completed todo counts of several users with one grouped
+    query over their statistics. Users without todos count zero.
+    """
+    counts = {
+        user_id: TodoCounts(open_total=0, completed_total=0) for user_id in user_ids
+    }
+    if not user_ids:
+        return TodoCountsByUser(counts=counts)
+
+    rows = await db.execute(
+        select(
+            TodoStats.user_id,
+            func.sum(TodoStats.open_count),
+            func.sum(TodoStats.completed_count),
+        )
+        .where(TodoStats.user_id.in_(user_ids))
+        .group_by(TodoStats.user_id)
+    )
+    for user_id, open_total, completed_total in rows:
+        counts[user_id] = TodoCounts(
+            open_total=open_total or 0, completed_total=completed_total or 0
+        )
+    return TodoCountsByUser(counts=counts)
+
+
+async def load_todo_stats(db: AsyncSession, user_id: str) -> TodoStatsResponse:
+    """Read a user's statistics: one row per priority and per day of this week."""
+    today = datetime.now(timezone.utc).date()
+    week_start = today - timedelta(days=today.weekday())
+
+    rows = (
+        await db.execute(select(TodoStats).where(TodoStats.user_id == user_id))
+    ).scalars().all()
+    completed_this_week = (
+        await db.execute(
+            select(TodoDailyCompletions.completed_count).where(
+                TodoDailyCompletions.user_id == user_id,
+                TodoDailyCompletions.day >= week_start,
+            )
+        )
+    ).scalars().all()
+
+    open_by_priority = {priority: 0 for priority in PRIORITIES}
+    totals = Counter()
+    for row in rows:
+        open_by_priority[row.priority] = row.open_count
+        for name in STATS_COUNTERS:
+            totals[name] += getattr(row, name)
+
+    return TodoStatsResponse(
+        open_total=totals["open_count"],
+        open_by_priority=open_by_priority,
+        completed_total=totals["completed_count"],
+        completed_this_week=sum(completed_this_week),
+        average_completion_seconds=(
+            totals["completion_seconds"] / totals["timed_count"]
+            if totals["timed_count"]
+            else None
+        ),
+    )
@@ -0,0 +1,173 @@
+import base64
+from datetime import datetime, timedelta
+import json
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, and_, delete, insert, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.exceptions.InvalidCursorException import InvalidCursorException
+from app.exceptions.SyncCursorExpiredException import SyncCursorExpiredException
+from app.models.todo import Todo, change_timestamp
+from app.models.todo_tombstone import TodoTombstone
+from app.schemas.todo import TodoChanges, TodoResponse
+
+logger = get_logger(__name__)
+
+
+class SyncPosition(NamedTuple):
+    """
+    How far a client has read one change stream: past the row `id` changed at
+    `at`, or past every row changed at `at` if `id` is None.
+    """
+
+    at: datetime
+    id: Optional[int] = None
+
+
+def encode_sync_cursor(changed: SyncPosition, deleted: SyncPosition) -> str:
+    """Opaque cursor holding the positions in the changed and deleted streams."""
+    payload = json.dumps(
+        {
+            "c": [changed.at.isoformat(), changed.id],
+            "d": [deleted.at.isoformat(), deleted.id],
+        },
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[SyncPosition, SyncPosition]:
+    """Return the `(changed, deleted)` stream positions a cursor holds."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        changed, deleted = (
+            SyncPosition(
+                datetime.fromisoformat(at), None if id is None else int(id)
+            )
+            for at, id in (payload["c"], payload["d"])
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Invalid sync cursor {cursor!r}: {e}")
+        raise InvalidCursorException("Invalid sync cursor.")
+    return changed, deleted
+
+
+def _after(timestamp, id, position: SyncPosition):
+    """Rows of a stream ordered by (timestamp, id) that come after `position`."""
+    if position.id is None:
+        return timestamp > position.at
+    return or_(timestamp > position.at, and_(timestamp == position.at, id > position.id))
+
+
+async def _read_stream(
+    db: AsyncSession,
+    query: Select,
+    timestamp,
+    id,
+    position: Optional[SyncPosition],
+    upper: datetime,
+    limit: int,
+) -> Tuple[list, SyncPosition, bool]:
+    """
+    Read up to `limit` rows of a stream after `position` and up to `upper`.
+
+    Returns the rows, the position after them and whether more rows are ready.
+    """
+    query = query.where(timestamp <= upper)
+    if position is not None:
+        query = query.where(_after(timestamp, id, position))
+    rows = (
+        await db.execute(query.order_by(timestamp, id).limit(limit + 1))
+    ).scalars().all()
+
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        position = SyncPosition(getattr(last, timestamp.key), getattr(last, id.key))
+        return rows[:limit], position, True
+    if position is not None and position.at > upper:
+        return rows, position, False
+    return rows, SyncPosition(upper), False
+
+
+async def load_changes(
+    db: AsyncSession, owner_id: str, since: Optional[str], limit: int
+) -> TodoChanges:
+    """
+    Return an owner's todo changes after the `since` cursor, or every todo when
+    there is none, using the (owner_id, updated_at) and (owner_id, deleted_at)
+    indexes.
+
+    Timestamps are assigned before commit, so a change only becomes visible to
+    syncs once it is `SYNC_LAG_SECONDS` old: by then every (shorter) transaction
+    that stamped an earlier time has committed, and a cursor never skips a change.
+    Read from the primary, as a lagging replica would break that guarantee.
+    """
+    now = change_timestamp()
+    # The current second may still gain changes, so it is never read
+    upper = now - timedelta(seconds=ENVConfig.SYNC_LAG_SECONDS + 1)
+
+    if since:
+        changed_position, deleted_position = decode_sync_cursor(since)
+        retention = timedelta(days=ENVConfig.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if deleted_position.at < now - retention:
+            # Deletions since then may have been purged
+            raise SyncCursorExpiredException()
+    else:
+        # A first sync downloads every todo, so it needs no deletions
+        changed_position, deleted_position = None, SyncPosition(upper)
+
+    todos, changed_position, more_changed = await _read_stream(
+        db,
+        select(Todo).where(Todo.owner_id == owner_id),
+        Todo.updated_at,
+        Todo.id,
+        changed_position,
+        upper,
+        limit,
+    )
+    tombstones, deleted_position, more_deleted = await _read_stream(
+        db,
+        select(TodoTombstone).where(TodoTombstone.owner_id == owner_id),
+        TodoTombstone.deleted_at,
+        TodoTombstone.todo_id,
+        deleted_position,
+        upper,
+        limit,
+    )
+    return TodoChanges(
+        changed=[TodoResponse.model_validate(todo.__dict__) for todo in todos],
+        deleted=[tombstone.todo_id for tombstone in tombstones],
+        cursor=encode_sync_cursor(changed_position, deleted_position),
+        has_more=more_changed or more_deleted,
+    )
+
+
+async def record_tombstones(db: AsyncSession, *criteria, source=Todo) -> None:
+    """
+    Record tombstones for the todos matching `criteria`, in one INSERT ... SELECT
+    from `source` (`Todo`, or `TodoArchive` for archived todos).
+
+    Call inside the transaction deleting them, before the delete.
+    """
+    await db.execute(
+        insert(TodoTombstone).from_select(
+            ["todo_id", "owner_id", "deleted_at"],
+            select(
+                source.id,
+                source.owner_id,
+                literal(change_timestamp(), TodoTombstone.deleted_at.type),
+            ).where(*criteria),
+        )
+    )
+
+
+async def purge_tombstones(db: AsyncSession) -> int:
+    """Delete tombstones past the retention period, returning how many were deleted."""
+    cutoff = change_timestamp() - timedelta(days=ENVConfig.SYNC_TOMBSTONE_RETENTION_DAYS)
+    result = await db.execute(delete(TodoTombstone).where(TodoTombstone.deleted_at < cutoff))
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,38 @@
+from typing import Dict, List
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def _dialect(db: AsyncSession) -> str:
+    return (await db.connection()).dialect.name
+
+
+async def increment(
+    db: AsyncSession, table: Table, keys: Dict, increments: Dict[str, int]
+) -> None:
+    """Add `increments` to the row at `keys`, creating it if missing, in one statement."""
+    values = {**keys, **increments}
+    updates = {name: table.c[name] + amount for name, amount in increments.items()}
+    if await _dialect(db) == "sqlite":
+        statement = (
+            sqlite_insert(table)
+            .values(**values)
+            .on_conflict_do_update(index_elements=list(keys), set_=updates)
+        )
+    else:
+        statement = mysql_insert(table).values(**values).on_duplicate_key_update(updates)
+    await db.execute(statement)
+
+
+async def insert_ignore(db: AsyncSession, table: Table, rows: List[Dict]) -> None:
+    """Insert `rows`, skipping those whose key already exists."""
+    if not rows:
+        return
+    if await _dialect(db) == "sqlite":
+        statement = sqlite_insert(table).on_conflict_do_nothing()
+    else:
+        statement = mysql_insert(table).prefix_with("IGNORE")
+    await db.execute(statement, rows)
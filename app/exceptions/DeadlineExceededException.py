@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+
+class DeadlineExceededException(HTTPException):
+    def __init__(self, message: str = None):
+        detail = 'Request exceeded its time budget.'
+        if message:
+            detail = message
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=detail,
+        )
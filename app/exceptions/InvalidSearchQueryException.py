@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+
+class InvalidSearchQueryException(HTTPException):
+    def __init__(self, message: str = None):
+        detail = 'Invalid search query.'
+        if message:
+            detail = message
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
+        )
@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+
+class PreconditionFailedException(HTTPException):
+    def __init__(self, message: str = None):
+        detail = 'The resource has been modified; fetch it again before retrying.'
+        if message:
+            detail = message
+        super().__init__(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=detail,
+        )
@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+
+class PurgeNotFoundException(HTTPException):
+    def __init__(self, id: str = None):
+        detail = 'Purge not found.'
+        if id:
+            detail = f'Purge with ID: {id} not found.'
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail,
+        )
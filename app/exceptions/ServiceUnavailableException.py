@@ -0,0 +1,13 @@
+from fastapi import HTTPException, status
+
+
+class ServiceUnavailableException(HTTPException):
+    def __init__(self, retry_after: int = 1, message: str = None):
+        detail = 'Service is overloaded, please retry later.'
+        if message:
+            detail = message
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
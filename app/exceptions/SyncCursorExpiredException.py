@@ -0,0 +1,9 @@
+from fastapi import HTTPException, status
+
+
+class SyncCursorExpiredException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync cursor has expired; sync again without one.",
+        )
@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+
+class TodoUpdateConflictException(HTTPException):
+    def __init__(self, id: int = None):
+        detail = 'Todo is being updated concurrently; try again.'
+        if id:
+            detail = f'Todo with ID: {id} is being updated concurrently; try again.'
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail,
+        )
\ No newline at end of file
@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+
+class TokenRevokedException(HTTPException):
+    def __init__(self, message: str = None):
+        detail = 'Token has been revoked.'
+        if message:
+            detail = message
+        super().__init__(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=detail,
+        )
@@ -0,0 +1,13 @@
+from fastapi import HTTPException, status
+
+
+class TooManyRequestsException(HTTPException):
+    def __init__(self, retry_after: int = 1, message: str = None):
+        detail = 'Too many requests, please retry later.'
+        if message:
+            detail = message
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -2,4 +2,17 @@ from app.exceptions.JWTTokenExpiredException import JWTTokenExpiredException
 from app.exceptions.UserNotFoundException import UserNotFoundException
 from app.exceptions.TodoNotFoundException import TodoNotFoundException
 from app.exceptions.JWTTokenExpiredException import JWTTokenExpiredException
-from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException 
\ No newline at end of file
+from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException 
+from app.exceptions.ServiceUnavailableException import ServiceUnavailableException
+from app.exceptions.DeadlineExceededException import DeadlineExceededException
+from app.exceptions.TooManyRequestsException import TooManyRequestsException
+from app.exceptions.InvalidRefreshTokenException import InvalidRefreshTokenException
+from app.exceptions.TokenRevokedException import TokenRevokedException
+from app.exceptions.InvalidCursorException import InvalidCursorException
+from app.exceptions.InvalidDateRangeException import InvalidDateRangeException
+from app.exceptions.InvalidSearchQueryException import InvalidSearchQueryException
+from app.exceptions.NotModifiedException import NotModifiedException
+from app.exceptions.SyncCursorExpiredException import SyncCursorExpiredException
+from app.exceptions.PreconditionFailedException import PreconditionFailedException
+from app.exceptions.PurgeNotFoundException import PurgeNotFoundException
+from app.exceptions.TodoUpdateConflictException import TodoUpdateConflictException
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Move todos completed more than ARCHIVE_AFTER_DAYS ago to the archive table.
+
+Keeps `todos` and its indexes small for the lists, counts and searches that scan
+them; the completed todos listing reads through to the archive. Runs every
+ARCHIVE_INTERVAL_SECONDS in one worker at a time, and on demand with:
+
+    python -m app.jobs.archive_todos
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import timedelta
+
+from fastapi import BackgroundTasks
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.archive import archive_batch
+from app.database.database import SessionLocal, engine
+from app.database.redis_cahce import CacheOps, close_redis, get_redis_cache, init_redis
+from app.models.todo import change_timestamp
+from app.services.todo_service import TodoService
+
+logger = get_logger(__name__)
+
+# Lets a single worker run the mover per interval
+ARCHIVE_LOCK_KEY = "archive:lock"
+
+
+async def archive(get_cache) -> int:
+    """
+    Move every todo due for the archive, one batch per transaction with a pause
+    between batches, returning how many were moved.
+    """
+    cutoff = change_timestamp() - timedelta(days=ENVConfig.ARCHIVE_AFTER_DAYS)
+    size = ENVConfig.ARCHIVE_BATCH_SIZE
+    archived = 0
+    while True:
+        async with SessionLocal() as db:
+            moved = await archive_batch(db, cutoff, size)
+            await db.commit()
+            count = sum(len(todo_ids) for todo_ids in moved.values())
+            if moved:
+                service = TodoService(BackgroundTasks(), db, await get_cache())
+                for owner_id, todo_ids in moved.items():
+                    await service.on_todos_archived(owner_id, todo_ids)
+        archived += count
+        metrics.incr("archive.todos_moved", count)
+        if count < size:
+            break
+        await asyncio.sleep(ENVConfig.ARCHIVE_BATCH_PAUSE_SECONDS)
+    logger.info(f"Archived {archived} completed todos.")
+    return archived
+
+
+async def archive_forever(get_cache) -> None:
+    """
+    Run the mover every `ENVConfig.ARCHIVE_INTERVAL_SECONDS`; meant to run as a
+    background task in every worker.
+
+    A Redis lock, left to expire, lets one worker run per interval. Without Redis
+    every worker runs, and the row locks keep each todo moved once.
+    """
+    interval = ENVConfig.ARCHIVE_INTERVAL_SECONDS
+    while True:
+        try:
+            cache = CacheOps(await get_cache())
+            acquired = await cache.try_lock(
+                ARCHIVE_LOCK_KEY, uuid.uuid4().hex, int(interval * 1000)
+            )
+            if acquired is not False:
+                await archive(get_cache)
+        except Exception as e:
+            logger.error(f"Failed to archive completed todos: {e}")
+        await asyncio.sleep(interval)
+
+
+async def main() -> None:
+    await init_redis()
+    try:
+        await archive(get_redis_cache)
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__.splitlines()[1]).parse_args()
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""
+Delete expired refresh tokens.
+
+Every login and every refresh adds a row to refresh_tokens, so expired rows are
+purged periodically by each worker (see REFRESH_TOKEN_PURGE_INTERVAL_SECONDS) and
+can be purged on demand with:
+
+    python -m app.jobs.purge_refresh_tokens
+"""
+import argparse
+import asyncio
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.database.database import SessionLocal, engine
+from app.services.auth_service import AuthService
+
+logger = get_logger(__name__)
+
+
+async def purge() -> int:
+    """Delete every expired refresh token, returning how many were deleted."""
+    async with SessionLocal() as db:
+        deleted = await AuthService.purge_expired_refresh_tokens(db)
+    logger.info(f"Purged {deleted} expired refresh tokens.")
+    return deleted
+
+
+async def purge_forever() -> None:
+    """
+    Purge every `ENVConfig.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS`; meant to run as
+    a background task. Concurrent purges by several workers are harmless.
+    """
+    while True:
+        try:
+            await purge()
+        except Exception as e:
+            logger.error(f"Failed to purge expired refresh tokens: {e}")
+        await asyncio.sleep(ENVConfig.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
+
+
+async def main() -> None:
+    try:
+        await purge()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__.splitlines()[1]).parse_args()
+    asyncio.run(main())
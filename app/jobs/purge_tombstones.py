@@ -0,0 +1,51 @@
+"""
+Delete todo tombstones past the delta sync retention.
+
+Every deleted todo leaves a tombstone for syncing clients, so tombstones older
+than SYNC_TOMBSTONE_RETENTION_DAYS are purged periodically by each worker (see
+TOMBSTONE_PURGE_INTERVAL_SECONDS) and can be purged on demand with:
+
+    python -m app.jobs.purge_tombstones
+"""
+import argparse
+import asyncio
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.database.database import SessionLocal, engine
+from app.database.todo_sync import purge_tombstones
+
+logger = get_logger(__name__)
+
+
+async def purge() -> int:
+    """Delete every expired tombstone, returning how many were deleted."""
+    async with SessionLocal() as db:
+        deleted = await purge_tombstones(db)
+    logger.info(f"Purged {deleted} expired todo tombstones.")
+    return deleted
+
+
+async def purge_forever() -> None:
+    """
+    Purge every `ENVConfig.TOMBSTONE_PURGE_INTERVAL_SECONDS`; meant to run as a
+    background task. Concurrent purges by several workers are harmless.
+    """
+    while True:
+        try:
+            await purge()
+        except Exception as e:
+            logger.error(f"Failed to purge expired todo tombstones: {e}")
+        await asyncio.sleep(ENVConfig.TOMBSTONE_PURGE_INTERVAL_SECONDS)
+
+
+async def main() -> None:
+    try:
+        await purge()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__.splitlines()[1]).parse_args()
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Rebuild the per-user todo statistics from the todos table.
+
+Repairs any drift in the incrementally maintained aggregates, and fills them for
+todos that existed before the aggregates were introduced. Each user is rebuilt
+in its own transaction.
+
+    python -m app.jobs.recompute_todo_stats [USER_ID ...]
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from app.core.logger_config import get_logger
+from app.database.database import SessionLocal, engine
+from app.database.todo_stats import recompute_todo_stats
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+# Users whose ids are read per query
+BATCH_SIZE = 500
+
+
+async def _user_ids(after: Optional[str]) -> List[str]:
+    async with SessionLocal() as db:
+        query = select(User.id).order_by(User.id).limit(BATCH_SIZE)
+        if after is not None:
+            query = query.where(User.id > after)
+        return list((await db.execute(query)).scalars())
+
+
+async def recompute_users(user_ids: List[str]) -> None:
+    for user_id in user_ids:
+        async with SessionLocal() as db:
+            await recompute_todo_stats(db, user_id)
+            await db.commit()
+
+
+async def recompute_all() -> int:
+    """Rebuild the statistics of every user, returning how many were rebuilt."""
+    count, after = 0, None
+    while user_ids := await _user_ids(after):
+        await recompute_users(user_ids)
+        count += len(user_ids)
+        after = user_ids[-1]
+    return count
+
+
+async def main(user_ids: List[str]) -> None:
+    try:
+        if user_ids:
+            await recompute_users(user_ids)
+            logger.info(f"Recomputed todo statistics for {len(user_ids)} users.")
+        else:
+            count = await recompute_all()
+            logger.info(f"Recomputed todo statistics for all {count} users.")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("user_ids", nargs="*", help="users to rebuild (default: all)")
+    asyncio.run(main(parser.parse_args().user_ids))
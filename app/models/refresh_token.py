@@ -0,0 +1,25 @@
+from __future__ import annotations
+from sqlalchemy import CHAR, VARCHAR, Boolean, Column, DateTime, ForeignKey, Integer, text
+from app.database.database import Base
+
+class RefreshToken(Base):
+    """
+    One issued refresh token. Only an HMAC of the token is stored.
+
+    Tokens rotate on every use; all tokens descending from one login share a
+    `family_id`, so presenting an already used token revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    token_hash = Column(CHAR(64), unique=True, nullable=False, index=True)
+    family_id = Column(VARCHAR(36), nullable=False, index=True)
+    user_id = Column(
+        VARCHAR(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    used = Column(Boolean, server_default=text("0"), nullable=False)
+    revoked = Column(Boolean, server_default=text("0"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
+    )
@@ -0,0 +1,32 @@
+from __future__ import annotations
+from sqlalchemy import VARCHAR, Column, Date, DateTime, Integer, String, text
+from app.database.database import Base
+
+class DailyTodoRollup(Base):
+    """Todos created and completed system-wide on one (UTC) day, per priority."""
+    __tablename__ = "daily_todo_rollups"
+
+    day = Column(Date, primary_key=True)
+    priority = Column(Integer, primary_key=True)
+    created_count = Column(Integer, nullable=False, server_default=text("0"))
+    completed_count = Column(Integer, nullable=False, server_default=text("0"))
+
+
+class DailyActiveUser(Base):
+    """A user who created or completed at least one todo on a given (UTC) day."""
+    __tablename__ = "daily_active_users"
+
+    day = Column(Date, primary_key=True)
+    # No foreign key: history outlives deleted users
+    user_id = Column(VARCHAR(36), primary_key=True)
+
+
+class RollupWatermark(Base):
+    """How far the rollup aggregator has processed one source of todo changes."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    processed_until = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
+    )
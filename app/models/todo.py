@@ -1,8 +1,18 @@
 from __future__ import annotations
-from sqlalchemy import VARCHAR, Column, Integer, String, Boolean, DateTime, ForeignKey, CheckConstraint, text
+from datetime import datetime, timezone
+from sqlalchemy import VARCHAR, Column, Integer, String, Boolean, DateTime, ForeignKey, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
+
+def change_timestamp() -> datetime:
+    """
+    Naive UTC time stamped on todo changes, truncated to the second so MySQL's
+    DATETIME stores exactly the value delta syncs compare against.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
 class Todo(Base):
     __tablename__ = "todos"
 
@@ -11,10 +21,21 @@ class Todo(Base):
     description = Column(String(500), nullable=True)
     priority = Column(Integer, nullable=False)
     complete = Column(Boolean, server_default=text("0"))
+    # Indexed for the rollup aggregator's range scans
     created_at = Column(
-        DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
+        DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"), index=True
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    # Row version, compared and set by every update for optimistic concurrency
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
+    # Bumped by every write, for delta syncs (see app.database.todo_sync)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=change_timestamp,
+        onupdate=change_timestamp,
+        server_default=text("CURRENT_TIMESTAMP"),
     )
-    finished_at = Column(DateTime(timezone=True), nullable=True)
 
     owner_id = Column(VARCHAR(36), ForeignKey("users.id"), nullable=False)
     # Use string-based relationship
@@ -22,4 +43,5 @@ class Todo(Base):
 
     __table_args__ = (
         CheckConstraint("priority BETWEEN 1 AND 5", name="priority_range"),
+        Index("ix_todos_owner_id_updated_at", "owner_id", "updated_at"),
     )
\ No newline at end of file
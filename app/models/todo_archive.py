@@ -0,0 +1,38 @@
+from __future__ import annotations
+from sqlalchemy import VARCHAR, Column, Integer, String, Boolean, DateTime, ForeignKey, Index, text
+from app.database.database import Base
+from app.models.todo import change_timestamp
+
+class TodoArchive(Base):
+    """
+    A completed todo moved out of `todos` by the archive mover (see
+    app.database.archive), with the columns it had there, so the hot table and
+    its indexes only hold recent todos.
+    """
+    __tablename__ = "todos_archive"
+
+    # The todo's id in `todos`, which is never reused
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(50), nullable=False)
+    description = Column(String(500), nullable=True)
+    priority = Column(Integer, nullable=False)
+    complete = Column(Boolean, nullable=False, server_default=text("1"))
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    version = Column(Integer, nullable=False, server_default=text("1"))
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(
+        DateTime(timezone=True), nullable=False, default=change_timestamp
+    )
+
+    owner_id = Column(VARCHAR(36), ForeignKey("users.id"), nullable=False)
+
+    __table_args__ = (
+        # Serves the completed todos listing's order within an owner
+        Index(
+            "ix_todos_archive_owner_id_priority_created_at",
+            "owner_id",
+            "priority",
+            "created_at",
+        ),
+    )
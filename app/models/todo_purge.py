@@ -0,0 +1,42 @@
+from __future__ import annotations
+from sqlalchemy import VARCHAR, Column, DateTime, Enum as SQLAlchemyEnum, Integer, text
+from app.database.database import Base
+from app.models.todo import change_timestamp
+from app.models.user import generate_uuid
+
+class TodoPurge(Base):
+    """
+    A bulk delete of one owner's todos, or of the owner, requested by a client
+    and carried out in chunks by the purge workers (see app.database.purges).
+    """
+    __tablename__ = "todo_purges"
+
+    id = Column(VARCHAR(36), primary_key=True, default=generate_uuid)
+    # No foreign keys: the record outlives a deleted owner
+    owner_id = Column(VARCHAR(36), nullable=False, index=True)
+    requested_by = Column(VARCHAR(36), nullable=False)
+    kind = Column(
+        SQLAlchemyEnum("todos", "completed", "user", name="purge_kinds"), nullable=False
+    )
+    status = Column(
+        SQLAlchemyEnum("pending", "running", "done", name="purge_statuses"),
+        nullable=False,
+        server_default="pending",
+        default="pending",
+        index=True,
+    )
+    # Highest todo id when the purge was requested; later todos are kept
+    max_todo_id = Column(Integer, nullable=True)
+    # Highest todo id handled so far, where a resumed purge continues
+    last_todo_id = Column(Integer, nullable=False, server_default=text("0"), default=0)
+    deleted_count = Column(Integer, nullable=False, server_default=text("0"), default=0)
+    # The worker running the purge, until its lease runs out
+    lease_owner = Column(VARCHAR(32), nullable=True)
+    lease_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=change_timestamp,
+        server_default=text("CURRENT_TIMESTAMP"),
+    )
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from sqlalchemy import VARCHAR, BigInteger, Column, Date, ForeignKey, Integer, text
+from app.database.database import Base
+
+class TodoStats(Base):
+    """
+    Running totals of one user's todos at one priority.
+
+    Maintained in the same transaction as every todo write, so reading a user's
+    statistics costs at most one row per priority.
+    """
+    __tablename__ = "todo_stats"
+
+    user_id = Column(
+        VARCHAR(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    priority = Column(Integer, primary_key=True)
+    open_count = Column(Integer, nullable=False, server_default=text("0"))
+    completed_count = Column(Integer, nullable=False, server_default=text("0"))
+    # Completed todos with both timestamps, and their summed time to complete
+    timed_count = Column(Integer, nullable=False, server_default=text("0"))
+    completion_seconds = Column(BigInteger, nullable=False, server_default=text("0"))
+
+
+class TodoDailyCompletions(Base):
+    """Number of one user's completed todos that finished on a given (UTC) day."""
+    __tablename__ = "todo_daily_completions"
+
+    user_id = Column(
+        VARCHAR(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = Column(Date, primary_key=True)
+    completed_count = Column(Integer, nullable=False, server_default=text("0"))
@@ -0,0 +1,24 @@
+from __future__ import annotations
+from sqlalchemy import VARCHAR, Column, DateTime, ForeignKey, Index, Integer
+from app.database.database import Base
+from app.models.todo import change_timestamp
+
+class TodoTombstone(Base):
+    """
+    A deleted todo, kept for `SYNC_TOMBSTONE_RETENTION_DAYS` so delta syncs can
+    report the deletion to clients that still hold it.
+    """
+    __tablename__ = "todo_tombstones"
+
+    # Todo ids are never reused, so a deleted id has at most one tombstone
+    todo_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner_id = Column(
+        VARCHAR(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    deleted_at = Column(
+        DateTime(timezone=True), nullable=False, default=change_timestamp, index=True
+    )
+
+    __table_args__ = (
+        Index("ix_todo_tombstones_owner_id_deleted_at", "owner_id", "deleted_at"),
+    )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 import uuid
-from sqlalchemy import VARCHAR, Boolean, Column, DateTime, Enum as SQLAlchemyEnum, String, UniqueConstraint, text
+from sqlalchemy import VARCHAR, Boolean, Column, DateTime, Enum as SQLAlchemyEnum, Integer, String, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -20,6 +20,8 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     role = Column(SQLAlchemyEnum("USER", "ADMIN", name="user_roles"), server_default="USER")
     is_active = Column(Boolean, server_default=text("1"))
+    # Bumped to invalidate every access token issued to the user so far
+    token_version = Column(Integer, nullable=False, server_default=text("0"), default=0)
     created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))
 
     # Use string-based relationship
@@ -0,0 +1,26 @@
+from datetime import date
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+
+class DailyTrend(BaseModel):
+    day: date = Field(..., example="2025-03-16")
+    created: int = Field(..., example=120)
+    completed: int = Field(..., example=95)
+    # Users who created or completed at least one todo that day
+    active_users: int = Field(..., example=40)
+    created_by_priority: Dict[int, int] = Field(
+        ..., example={1: 10, 2: 20, 3: 50, 4: 30, 5: 10}
+    )
+
+
+class PriorityDistribution(BaseModel):
+    start: date = Field(..., example="2025-03-01")
+    end: date = Field(..., example="2025-03-31")
+    created_by_priority: Dict[int, int] = Field(
+        ..., example={1: 300, 2: 600, 3: 1500, 4: 900, 5: 300}
+    )
+    completed_by_priority: Dict[int, int] = Field(
+        ..., example={1: 280, 2: 500, 3: 1100, 4: 600, 5: 150}
+    )
@@ -1,5 +1,5 @@
 from math import ceil
-from typing import Generic, List, TypeVar
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -14,10 +14,19 @@ class Page(BaseModel, Generic[T]):
     total_pages: int
     has_next: bool
     has_previous: bool
+    # Opaque cursor for the next page, on endpoints that page by cursor
+    next_cursor: Optional[str] = None
 
 
     @classmethod
-    def create(cls, items: List[T], page_number: int, page_size: int, total_items: int):
+    def create(
+        cls,
+        items: List[T],
+        page_number: int,
+        page_size: int,
+        total_items: int,
+        next_cursor: Optional[str] = None,
+    ):
         total_pages = int(ceil(total_items /page_size))
         return cls(
             items=items,
@@ -26,5 +35,6 @@ class Page(BaseModel, Generic[T]):
             total_items=total_items,
             total_pages=total_pages,
             has_next=page_number < total_pages - 1,
-            has_previous=page_number > 0)
+            has_previous=page_number > 0,
+            next_cursor=next_cursor)
     
@@ -0,0 +1,31 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class PurgeKind(str, Enum):
+    """What a purge deletes."""
+    todos = "todos"  # Every todo of the owner
+    completed = "completed"  # The owner's completed todos
+    user = "user"  # Every todo of the owner, then the owner
+
+
+class PurgeStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+
+
+class TodoPurgeResponse(BaseModel):
+    id: str = Field(..., example="1b4e28ba-2fa1-11d2-883f-0016d3cca427")
+    owner_id: str = Field(..., example="550e8400-e29b-41d4-a716-446655440000")
+    kind: PurgeKind
+    status: PurgeStatus
+    # Todos deleted so far
+    deleted_count: int = Field(..., example=1500)
+    created_at: Optional[datetime] = Field(None, example="2025-03-16T10:00:00Z")
+    finished_at: Optional[datetime] = Field(None, example="2025-03-16T10:01:00Z")
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,24 @@
+from enum import Enum
+from typing import Generic, List, TypeVar
+
+from pydantic import BaseModel
+
+
+T = TypeVar("T")
+
+class SearchMode(str, Enum):
+    """How a search term is interpreted."""
+    natural = "natural"  # Natural language, as typed
+    boolean = "boolean"  # MySQL boolean syntax: +required -excluded "phrase" prefix*
+    prefix = "prefix"  # Every word is required and may be a prefix (typeahead)
+
+
+class SearchResults(BaseModel, Generic[T]):
+    """Relevance-ranked results of one search, as cached."""
+    items: List[T]
+
+
+class Suggestion(BaseModel):
+    """One typeahead match: the id of the matching record and the matched text."""
+    id: str
+    text: str
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Dict, List, Optional
 
 from app.models.todo import Todo
 
@@ -57,7 +57,47 @@ class TodoResponse(BaseModel):
     ]
     created_at: datetime = Field(..., example="2025-03-16T10:00:00Z")
     finished_at: Optional[datetime] = Field(None, example="2025-03-18T12:00:00Z")
+    updated_at: Optional[datetime] = Field(None, example="2025-03-18T12:00:00Z")
+    # Send back as `If-Match: "<version>"` to update only this version
+    version: Optional[int] = Field(None, example=3)
 
     model_config = {
         "from_attributes": True
     }  # Replaces Config class for ORM compatibility
+
+
+class TodoBatchResponse(BaseModel):
+    items: List[TodoResponse]
+    # Requested ids that do not exist or are not visible to the caller
+    missing: List[int] = Field(..., example=[4])
+
+
+class TodoChanges(BaseModel):
+    # Todos created or updated after the cursor, oldest change first
+    changed: List[TodoResponse]
+    # Ids of todos deleted after the cursor
+    deleted: List[int] = Field(..., example=[4])
+    # Pass as `since` to get the changes after these
+    cursor: str
+    # More changes are ready; sync again right away
+    has_more: bool
+
+
+class TodoCounts(BaseModel):
+    open_total: int = Field(..., example=7)
+    completed_total: int = Field(..., example=42)
+
+
+class TodoCountsByUser(BaseModel):
+    counts: Dict[str, TodoCounts]
+
+
+class TodoStatsResponse(BaseModel):
+    open_total: int = Field(..., example=7)
+    open_by_priority: Dict[int, int] = Field(
+        ..., example={1: 0, 2: 1, 3: 4, 4: 2, 5: 0}
+    )
+    completed_total: int = Field(..., example=42)
+    # Completed todos that finished since Monday (UTC)
+    completed_this_week: int = Field(..., example=5)
+    average_completion_seconds: Optional[float] = Field(None, example=86400.0)
@@ -3,6 +3,8 @@ from datetime import datetime
 from typing import Optional, Annotated
 import re
 
+from app.schemas.todo import TodoCounts
+
 # Regex patterns
 USERNAME_REGEX = r"^[a-zA-Z0-9_-]+$"
 PASSWORD_REGEX = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$"
@@ -108,6 +110,11 @@ class UserResponse(BaseModel):
     model_config = {"from_attributes": True}  # Replaces Config class for ORM compatibility
 
 
+class UserWithTodoCountsResponse(UserResponse):
+    # Only filled in when the listing was asked to include todo statistics
+    todo_counts: Optional[TodoCounts] = None
+
+
 class PasswordUpdate(BaseModel):
     password: Annotated[str, Field(min_length=8, examples=["StrongP@ss1"])]
 
@@ -128,4 +135,11 @@ class RoleUpdate(BaseModel):
 
 class AuthRequest(BaseModel):
     email: EmailStr = Field(examples=["johndoe@example.com"])
-    password: Annotated[str, Field(min_length=8, examples=["StrongP@ss1"])]
\ No newline at end of file
+    password: Annotated[str, Field(min_length=8, examples=["StrongP@ss1"])]
+
+class RefreshRequest(BaseModel):
+    refresh_token: str = Field(min_length=1, examples=["kq3P8yY0N2j..."])
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = Field(default=None, examples=["kq3P8yY0N2j..."])
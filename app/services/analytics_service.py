@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Depends
+from redis import Redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger_config import get_logger
+from app.database.database import get_db
+from app.database.redis_cahce import CacheOps, get_redis_cache
+from app.database.rollups import run_rollups
+from app.database.routing import ReadYourWrites, replica_reads
+from app.database.todo_stats import PRIORITIES
+from app.exceptions.InvalidDateRangeException import InvalidDateRangeException
+from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException
+from app.models.rollup import DailyActiveUser, DailyTodoRollup
+from app.models.user import User
+from app.schemas.analytics import DailyTrend, PriorityDistribution
+
+logger = get_logger(__name__)
+
+# Longest range one analytics request may cover
+MAX_RANGE_DAYS = 366
+
+# Range covered when none is given
+DEFAULT_RANGE_DAYS = 30
+
+# Read-your-writes scope of the rollup tables
+ROLLUPS_SCOPE = "rollups"
+
+
+class AnalyticsService:
+    """
+    System-wide todo trends for admins.
+
+    Every query reads the daily rollup tables filled by the background aggregator,
+    never the todos table, so analytics traffic cannot slow down todo requests.
+    Figures lag real time by up to the aggregator interval plus its lag.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_db),
+        redis: Redis = Depends(get_redis_cache),
+    ):
+        self.db = db
+        self.cache = CacheOps(redis)
+
+    def get_analytics_service(
+        db: AsyncSession = Depends(get_db),
+        redis: Redis = Depends(get_redis_cache),
+    ):
+        """Factory method to create an AnalyticsService instance."""
+        logger.info("Creating a new AnalyticsService instance.")
+        return AnalyticsService(db, redis)
+
+    @staticmethod
+    def _authorize(user: User) -> None:
+        if user.role != "ADMIN":
+            logger.warning(f"User {user.id} is not authorized to view analytics.")
+            raise UserNotAuthorizedException()
+
+    @staticmethod
+    def _date_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+        """Resolve the requested range, defaulting to the last 30 days (UTC)."""
+        end = end or datetime.now(timezone.utc).date()
+        start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        if start > end:
+            raise InvalidDateRangeException("start must not be after end.")
+        if (end - start).days >= MAX_RANGE_DAYS:
+            raise InvalidDateRangeException(
+                f"The range may cover at most {MAX_RANGE_DAYS} days."
+            )
+        return start, end
+
+    async def _rollup_rows(self, start: date, end: date):
+        query = select(DailyTodoRollup).where(DailyTodoRollup.day.between(start, end))
+        return (await self.db.execute(query)).scalars().all()
+
+    async def get_daily_trends(
+        self, user: User, start: Optional[date] = None, end: Optional[date] = None
+    ) -> List[DailyTrend]:
+        """
+        Get todos created and completed, active users and the priority mix of
+        created todos for every day in the range.
+        """
+        logger.info(f"Fetching daily trends for admin: {user.id}")
+        self._authorize(user)
+        start, end = self._date_range(start, end)
+
+        async with replica_reads(self.db, self.cache, ROLLUPS_SCOPE):
+            rollups = await self._rollup_rows(start, end)
+            active_users = dict(
+                (
+                    await self.db.execute(
+                        select(DailyActiveUser.day, func.count())
+                        .where(DailyActiveUser.day.between(start, end))
+                        .group_by(DailyActiveUser.day)
+                    )
+                ).all()
+            )
+
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        trends: Dict[date, DailyTrend] = {
+            day: DailyTrend(
+                day=day,
+                created=0,
+                completed=0,
+                active_users=active_users.get(day, 0),
+                created_by_priority={priority: 0 for priority in PRIORITIES},
+            )
+            for day in days
+        }
+        for row in rollups:
+            trend = trends[row.day]
+            trend.created += row.created_count
+            trend.completed += row.completed_count
+            trend.created_by_priority[row.priority] = row.created_count
+
+        logger.info("Successfully fetched daily trends.")
+        return list(trends.values())
+
+    async def get_priority_distribution(
+        self, user: User, start: Optional[date] = None, end: Optional[date] = None
+    ) -> PriorityDistribution:
+        """
+        Get how todos created and completed in the range split across priorities.
+        """
+        logger.info(f"Fetching priority distribution for admin: {user.id}")
+        self._authorize(user)
+        start, end = self._date_range(start, end)
+
+        async with replica_reads(self.db, self.cache, ROLLUPS_SCOPE):
+            rollups = await self._rollup_rows(start, end)
+
+        created = {priority: 0 for priority in PRIORITIES}
+        completed = {priority: 0 for priority in PRIORITIES}
+        for row in rollups:
+            created[row.priority] += row.created_count
+            completed[row.priority] += row.completed_count
+
+        logger.info("Successfully fetched priority distribution.")
+        return PriorityDistribution(
+            start=start,
+            end=end,
+            created_by_priority=created,
+            completed_by_priority=completed,
+        )
+
+    async def run_rollups(self, user: User) -> Dict[str, int]:
+        """
+        Run the rollup aggregator now instead of waiting for its next interval.
+        """
+        logger.info(f"Admin {user.id} is running the rollup aggregator.")
+        self._authorize(user)
+        counted = await run_rollups()
+        await ReadYourWrites(self.cache).mark_write(ROLLUPS_SCOPE)
+        return counted
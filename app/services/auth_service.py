@@ -1,20 +1,32 @@
+import hashlib
+import hmac
+import secrets
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, Optional
+from typing import Annotated, Optional, Tuple
 from fastapi import Depends, HTTPException, status, Request
 # from fastapi import security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 from passlib.context import CryptContext
+from redis import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, update
 from sqlalchemy.future import select
 from jose import jwt, JWTError
 
 from app.core.logger_config import get_logger
-from app.database.database import get_db
+from app.core.revocation import revocation_list
+from app.database.database import get_db, release_connection
+from app.database.generations import current_generation
+from app.database.redis_cahce import CacheOps, get_redis_cache, serializer
 from app.core.load_env import ENVConfig
+from app.exceptions.InvalidRefreshTokenException import InvalidRefreshTokenException
 from app.exceptions.JWTTokenExpiredException import JWTTokenExpiredException
 from app.exceptions.UserNotFoundException import UserNotFoundException
 from app.exceptions.MalformedJWTException import MalformedJWTException
+from app.exceptions.TokenRevokedException import TokenRevokedException
 from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
 from app.schemas.user import AuthRequest, UserCreate, UserResponse
 
@@ -31,6 +43,10 @@ oauth2_bearer = OAuth2PasswordBearer(tokenUrl='/api/v1/auth/login', scheme_name=
 # JWT expiration time
 JWT_EXPIRATION_DELTA = timedelta(milliseconds=ENVConfig.JWT_EXPIRATION)
 
+# Refresh token lifetime and the key used to hash stored tokens
+REFRESH_TOKEN_EXPIRATION_DELTA = timedelta(days=ENVConfig.REFRESH_TOKEN_EXPIRATION_DAYS)
+REFRESH_TOKEN_KEY = ENVConfig.REFRESH_TOKEN_SECRET.encode()
+
 class AuthService:
     """Service for handling authentication-related operations."""
 
@@ -45,12 +61,13 @@ class AuthService:
         return bcrypt_context.hash(password)
 
     @staticmethod
-    async def create_access_token(email: str) -> str:
+    async def create_access_token(email: str, token_version: int = 0) -> str:
         """
         Create a JWT access token for the given email.
         
         Args:
             email: User's email address
+            token_version: User's current token version, carried as the `ver` claim
             
         Returns:
             JWT token as string
@@ -59,11 +76,131 @@ class AuthService:
 
         payload = {
             "sub": email,
-            "exp": expires
+            "exp": expires,
+            "jti": uuid.uuid4().hex,
+            "ver": token_version,
         }
 
         return jwt.encode(payload, ENVConfig.JWT_SECRET_KEY, algorithm=ENVConfig.JWT_ALGORITHM)
 
+    @staticmethod
+    def hash_refresh_token(token: str) -> str:
+        """HMAC-SHA256 of a refresh token, the only form of it that is stored."""
+        return hmac.new(REFRESH_TOKEN_KEY, token.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    async def create_refresh_token(
+        db: AsyncSession, user_id: str, family_id: Optional[str] = None
+    ) -> str:
+        """
+        Issue a refresh token for the user and commit it.
+
+        Args:
+            db: Database session
+            user_id: Owner of the token
+            family_id: Family of the token being rotated, or None for a new login
+
+        Returns:
+            The opaque refresh token
+        """
+        token = secrets.token_urlsafe(32)
+        expires_at = datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRATION_DELTA
+        db.add(
+            RefreshToken(
+                token_hash=AuthService.hash_refresh_token(token),
+                family_id=family_id or str(uuid.uuid4()),
+                user_id=user_id,
+                expires_at=expires_at,
+            )
+        )
+        await db.commit()
+        return token
+
+    @staticmethod
+    async def rotate_refresh_token(db: AsyncSession, token: str) -> Tuple[User, str]:
+        """
+        Exchange a refresh token for a new one in the same family.
+
+        Costs one indexed lookup and one HMAC, with no password check. Presenting a
+        token that was already used revokes its whole family, since either the
+        client or an attacker holds a stolen copy.
+
+        Args:
+            db: Database session
+            token: Refresh token presented by the client
+
+        Returns:
+            Tuple of the token's user and the new refresh token
+
+        Raises:
+            InvalidRefreshTokenException: If the token is unknown, expired, revoked
+                or reused, or the user is inactive
+        """
+        result = await db.execute(
+            select(RefreshToken, User)
+            .join(User, User.id == RefreshToken.user_id)
+            .where(RefreshToken.token_hash == AuthService.hash_refresh_token(token))
+            .with_for_update()
+        )
+        row = result.first()
+        if row is None:
+            logger.warning("Unknown refresh token presented")
+            raise InvalidRefreshTokenException()
+
+        record, user = row
+        if record.used or record.revoked:
+            await db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.family_id == record.family_id)
+                .values(revoked=True)
+            )
+            await db.commit()
+            logger.warning(f"Refresh token reuse for user {user.email}, family revoked")
+            raise InvalidRefreshTokenException("Refresh token reuse detected.")
+
+        expires_at = record.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if await AuthService.is_token_expired(expires_at) or not user.is_active:
+            await db.rollback()
+            raise InvalidRefreshTokenException()
+
+        record.used = True
+        new_token = await AuthService.create_refresh_token(
+            db, record.user_id, record.family_id
+        )
+        return user, new_token
+
+    @staticmethod
+    async def purge_expired_refresh_tokens(
+        db: AsyncSession, batch_size: int = 1000
+    ) -> int:
+        """
+        Delete refresh tokens past their expiry, used or not, in batches of
+        `batch_size` rows with one commit each.
+
+        Expired tokens are rejected anyway, and reuse detection only needs used
+        tokens until they expire.
+
+        Returns:
+            The number of deleted tokens
+        """
+        now = datetime.now(timezone.utc)
+        deleted = 0
+        while True:
+            ids = (
+                await db.execute(
+                    select(RefreshToken.id)
+                    .where(RefreshToken.expires_at < now)
+                    .limit(batch_size)
+                )
+            ).scalars().all()
+            if not ids:
+                return deleted
+            await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(ids)))
+            await db.commit()
+            deleted += len(ids)
+
     @staticmethod
     async def is_token_expired(token_expiry: datetime) -> bool:
         """
@@ -92,14 +229,124 @@ class AuthService:
         result = await db.execute(select(User).filter(User.email == email))
         return result.scalars().first()
 
+    @staticmethod
+    def auth_scope(email: str) -> str:
+        """Generation scope of the user record used to authenticate requests."""
+        return f"auth:user:{email}"
+
+    @staticmethod
+    def auth_cache_key(email: str, generation: str) -> str:
+        """Cache key of the user record used to authenticate requests."""
+        return f"auth:user:{email}:gen-{generation}"
+
+    @staticmethod
+    async def load_authenticated_user(
+        db: AsyncSession, cache: CacheOps, email: str
+    ) -> Optional[User]:
+        """
+        Load the user behind a token, from Redis when possible.
+
+        Cache hits return a detached User built from the cached columns, so the
+        request needs no database connection. The password hash is never cached.
+        Records are cached under the generation of `auth_scope(email)`, which every
+        change to the user resets, so a record loaded before a role change or a
+        deactivation is never served after it.
+
+        Args:
+            db: Database session
+            cache: Cache operations
+            email: User's email address
+
+        Returns:
+            User object if found, None otherwise
+        """
+        generation = await current_generation(cache, AuthService.auth_scope(email))
+        cache_key = None
+        cached_user = None
+        if generation is not None:
+            cache_key = AuthService.auth_cache_key(email, generation)
+            cached_user = await cache.get(cache_key)
+        if cached_user:
+            user_data = serializer.deserialize(cached_user)
+            if isinstance(user_data.get("created_at"), str):
+                user_data["created_at"] = datetime.fromisoformat(user_data["created_at"])
+            return User(**user_data)
+
+        user = await AuthService.load_user_from_email(db, email)
+        if user is None:
+            return None
+
+        user_data = {
+            column.name: getattr(user, column.name)
+            for column in User.__table__.columns
+            if column.name != "hashed_password"
+        }
+        await release_connection(db)
+        if cache_key is not None:
+            await cache.set(
+                cache_key,
+                serializer.serialize(user_data),
+                ex=ENVConfig.AUTH_USER_CACHE_TTL,
+            )
+        return user
+
+    @staticmethod
+    async def decode_access_token(token: str) -> dict:
+        """
+        Decode and validate a JWT access token.
+
+        Args:
+            token: JWT token
+
+        Returns:
+            Token claims
+
+        Raises:
+            MalformedJWTException: If token is invalid
+            JWTTokenExpiredException: If token has expired
+        """
+        try:
+            # Decode the JWT token
+            payload = jwt.decode(
+                token, 
+                ENVConfig.JWT_SECRET_KEY, 
+                algorithms=[ENVConfig.JWT_ALGORITHM]
+            )
+        except JWTError as e:
+            logger.warning("Invalid JWT Token")
+            raise MalformedJWTException(f"Invalid token: {str(e)}")
+
+        # Extract email and expiration from payload
+        email: str = payload.get("sub")
+        exp_timestamp: int = payload.get("exp")
+
+        # Validate payload contents
+        if email is None or exp_timestamp is None:
+            logger.warning("Missing required fields in token")
+            raise MalformedJWTException("Missing required fields in token")
+
+        # Convert exp timestamp to datetime
+        expiry_time = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
+
+        # Check token expiration
+        if await AuthService.is_token_expired(expiry_time):
+            logger.warning("JWT Token has expired")
+            raise JWTTokenExpiredException(token)
+
+        return payload
+
     @staticmethod
     async def get_current_user(
         # token: Annotated[str, Depends(oauth2_bearer)],
         db: Annotated[AsyncSession, Depends(get_db)],
+        redis: Annotated[Redis, Depends(get_redis_cache)],
         credentials: HTTPAuthorizationCredentials = Depends(security)
     ) -> User:
         """
         Validate JWT token and return the current user.
+
+        Revocation is checked against the in-process filter first, so a valid token
+        normally needs no call beyond loading the (cached) user.
         
         Args:
             token: JWT token
@@ -111,46 +358,105 @@ class AuthService:
         Raises:
             MalformedJWTException: If token is invalid
             JWTTokenExpiredException: If token has expired
+            TokenRevokedException: If token was revoked or predates a version bump
             UserNotFoundException: If user not found
+            UserNotAuthorizedException: If user is inactive
         """
-        token = credentials.credentials
-        try:
-            # Decode the JWT token
-            payload = jwt.decode(
-                token, 
-                ENVConfig.JWT_SECRET_KEY, 
-                algorithms=[ENVConfig.JWT_ALGORITHM]
+        user, _ = await AuthService.authenticate_token(
+            db, CacheOps(redis), credentials.credentials
+        )
+        return user
+
+    @staticmethod
+    async def authenticate_token(
+        db: AsyncSession, cache: CacheOps, token: str
+    ) -> Tuple[User, dict]:
+        """
+        Validate an access token and return its user and claims.
+
+        Shared by `get_current_user`, `logout`, which needs the claims too, and
+        connections that cannot carry a bearer header, such as browser WebSockets.
+        """
+        payload = await AuthService.decode_access_token(token)
+        email: str = payload["sub"]
+
+        # Tokens issued before jti claims existed cannot be revoked individually
+        jti = payload.get("jti")
+        if jti and await revocation_list.is_revoked(cache, jti):
+            logger.warning(f"Revoked token used for user : {email}")
+            raise TokenRevokedException()
+
+        # Load user from cache or database
+        user = await AuthService.load_authenticated_user(db, cache, email)
+        if user is None:
+            logger.warning(f"User : {email} not found")
+            raise UserNotFoundException(email=email)
+
+        if not user.is_active:
+            logger.warning(f"Inactive user : {email} used a token")
+            raise UserNotAuthorizedException("User account is inactive.")
+
+        if payload.get("ver", 0) != (user.token_version or 0):
+            logger.warning(f"Outdated token version used for user : {email}")
+            raise TokenRevokedException()
+
+        return user, payload
+
+    @staticmethod
+    async def logout(
+        db: AsyncSession,
+        cache: CacheOps,
+        user: User,
+        claims: dict,
+        refresh_token: Optional[str] = None,
+    ) -> None:
+        """
+        Revoke the access token described by `claims` and, if given, the family
+        of `refresh_token`. Refresh tokens of other users are ignored.
+
+        Args:
+            db: Database session
+            cache: Cache operations
+            user: User logging out
+            claims: Decoded claims of the access token being logged out
+            refresh_token: Refresh token issued alongside it, if the client has one
+        """
+        jti = claims.get("jti")
+        if jti:
+            await revocation_list.revoke(cache, jti, claims["exp"])
+
+        if refresh_token:
+            result = await db.execute(
+                select(RefreshToken.family_id).where(
+                    RefreshToken.token_hash
+                    == AuthService.hash_refresh_token(refresh_token),
+                    RefreshToken.user_id == user.id,
+                )
             )
-            
-            # Extract email and expiration from payload
-            email: str = payload.get("sub")
-            exp_timestamp: int = payload.get("exp")
-            
-            # Validate payload contents
-            if email is None or exp_timestamp is None:
-                logger.warning("Missing required fields in token")
-                raise MalformedJWTException("Missing required fields in token")
-            
-            # Convert exp timestamp to datetime
-            expiry_time = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-            
-            # Check token expiration
-            if await AuthService.is_token_expired(expiry_time):
-                logger.warning("JWT Token has expired")
-                raise JWTTokenExpiredException(token)
-            
-            # Load user from database
-            user = await AuthService.load_user_from_email(db, email)
-            if user is None:
-                logger.warning(f"User : {email} not found")
-                raise UserNotFoundException(email=email)
-            
-            return user
-            
-        except JWTError as e:
-            logger.warning("Invalid JWT Token")
-            raise MalformedJWTException(f"Invalid token: {str(e)}")
-    
+            family_id = result.scalar()
+            if family_id is not None:
+                await db.execute(
+                    update(RefreshToken)
+                    .where(RefreshToken.family_id == family_id)
+                    .values(revoked=True)
+                )
+                await db.commit()
+
+    @staticmethod
+    async def revoke_user_tokens(db: AsyncSession, user: User) -> None:
+        """
+        Invalidate every access and refresh token issued to `user`.
+
+        Bumps the user's token version and revokes their refresh tokens. The caller
+        commits and must drop the user's cached auth record.
+        """
+        user.token_version = (user.token_version or 0) + 1
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user.id)
+            .values(revoked=True)
+        )
+
     @staticmethod 
     async def authenticate_user(db: AsyncSession, email: str, password: str) -> User:
         """
@@ -172,6 +478,10 @@ class AuthService:
         if not await AuthService.verify_password(password, user.hashed_password):
             logger.warning(f"User {email} is not authorized")
             raise UserNotAuthorizedException(f"User: {email} is not authorized")
+
+        if not user.is_active:
+            logger.warning(f"Inactive user : {email} tried to log in")
+            raise UserNotAuthorizedException("User account is inactive.")
         return user
     
     @staticmethod
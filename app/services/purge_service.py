@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+from typing import Optional
+
+from fastapi import BackgroundTasks, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.load_env import ENVConfig
+from app.core.logger_config import get_logger
+from app.core.metrics import metrics
+from app.database.database import SessionLocal, get_db
+from app.database.purges import (
+    claim_purge,
+    claimable_purges,
+    delete_chunk,
+    finish_purge,
+    lock_purge,
+    purge_requested,
+)
+from app.exceptions.PurgeNotFoundException import PurgeNotFoundException
+from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException
+from app.models.todo import change_timestamp
+from app.models.todo_purge import TodoPurge
+from app.models.user import User
+from app.schemas.purge import PurgeKind, TodoPurgeResponse
+from app.services.todo_service import TodoService
+from app.services.user_service import UserService
+
+logger = get_logger(__name__)
+
+
+class PurgeService:
+    """Service reporting the progress of bulk deletes."""
+
+    def __init__(self, db: AsyncSession = Depends(get_db)):
+        self.db = db
+
+    def get_purge_service(db: AsyncSession = Depends(get_db)):
+        """Factory method to create a PurgeService instance."""
+        return PurgeService(db)
+
+    async def get_purge(self, user: User, purge_id: str) -> TodoPurgeResponse:
+        """
+        Get the progress of a purge, for the user who requested it, the owner of
+        the todos it deletes or an admin.
+        """
+        logger.info(f"Fetching purge {purge_id} for user: {user.id}")
+        purge = await self.db.get(TodoPurge, purge_id)
+        if purge is None:
+            logger.error(f"Purge with ID {purge_id} not found.")
+            raise PurgeNotFoundException(purge_id)
+
+        if user.id not in (purge.owner_id, purge.requested_by) and user.role != "ADMIN":
+            logger.warning(f"User {user.id} is not authorized to access purge {purge_id}.")
+            raise UserNotAuthorizedException()
+
+        return TodoPurgeResponse.model_validate(purge)
+
+
+async def run_purge(purge_id: str, get_cache) -> bool:
+    """
+    Run a purge to completion, one chunk per transaction with a pause between
+    chunks, unless another worker holds it. Returns whether it finished here.
+
+    Caches are invalidated once, after the last chunk; until then reads may
+    still list todos the purge has deleted.
+    """
+    lease_owner = uuid.uuid4().hex
+    async with SessionLocal() as db:
+        if not await claim_purge(db, purge_id, lease_owner):
+            return False
+
+    size = ENVConfig.PURGE_CHUNK_SIZE
+    deleted_user: Optional[User] = None
+    while True:
+        async with SessionLocal() as db:
+            purge = await lock_purge(db, purge_id, lease_owner)
+            if purge is None:
+                logger.warning(f"Lost the lease on purge {purge_id}.")
+                return False
+            deleted = await delete_chunk(db, purge, size)
+            if deleted < size:
+                deleted_user = await finish_purge(db, purge)
+            await db.commit()
+        metrics.incr("purges.todos_deleted", deleted)
+        if deleted < size:
+            break
+        await asyncio.sleep(ENVConfig.PURGE_CHUNK_PAUSE_SECONDS)
+
+    redis = await get_cache()
+    async with SessionLocal() as db:
+        if purge.kind == PurgeKind.user.value:
+            if deleted_user is not None:
+                await UserService(BackgroundTasks(), db, redis).on_user_purged(
+                    deleted_user
+                )
+        else:
+            await TodoService(BackgroundTasks(), db, redis).on_todos_purged(
+                purge.owner_id, completed_only=purge.kind == PurgeKind.completed.value
+            )
+    logger.info(f"Purge {purge_id} deleted {purge.deleted_count} todos.")
+    return True
+
+
+async def run_purges_forever(get_cache) -> None:
+    """
+    Run unfinished purges as they are requested, and every
+    `ENVConfig.PURGE_POLL_SECONDS` those whose worker stopped before finishing;
+    meant to run as a background task in every worker. Leases keep each purge
+    on one worker at a time.
+    """
+    while True:
+        purge_requested.clear()
+        try:
+            async with SessionLocal() as db:
+                purge_ids = await claimable_purges(db, change_timestamp())
+            for purge_id in purge_ids:
+                await run_purge(purge_id, get_cache)
+        except Exception as e:
+            logger.error(f"Failed to run purges: {e}")
+        try:
+            await asyncio.wait_for(purge_requested.wait(), ENVConfig.PURGE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
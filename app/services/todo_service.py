@@ -1,21 +1,69 @@
 from datetime import datetime, timezone
-from typing import Annotated, Optional
+from types import SimpleNamespace
+from typing import Annotated, Dict, List, Optional, Tuple
 from fastapi import BackgroundTasks, Depends
 from redis import Redis
-from sqlalchemy import delete, func, and_, select, desc, asc, text, exists
+from sqlalchemy import select, desc, asc, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.change_feed import publish_todo_event
+from app.core.etag import (
+    check_not_modified,
+    if_match_versions,
+    make_etag,
+    version_etag,
+)
+from app.core.load_env import ENVConfig
 from app.core.logger_config import get_logger
+from app.core.metrics import metrics
 from app.database.database import get_db
-from app.database.redis_cahce import get_redis_cache, serializer
-from app.exceptions import TodoNotFoundException
+from app.database.cache_loader import CacheLoader, prefetch_policy
+from app.database.pagination import fetch_chained_page, fetch_page
+from app.database.redis_cahce import CacheOps, get_redis_cache
+from app.database.routing import ReadYourWrites, replica_reads
+from app.database.generations import current_generation, generation_key
+from app.database.search import (
+    TODOS_SEARCH_INDEX,
+    cached_search,
+    normalize_term,
+    search_dialect,
+)
+from app.database.suggest import PrefixIndex
+from app.database.todo_stats import (
+    TodoState,
+    apply_todo_change,
+    load_todo_stats,
+    recompute_todo_stats,
+)
+from app.database.purges import create_purge, purge_requested
+from app.database.todo_sync import load_changes, record_tombstones
+from app.exceptions import (
+    PreconditionFailedException,
+    TodoNotFoundException,
+    TodoUpdateConflictException,
+)
 from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException
-from app.models.todo import Todo
+from app.models.todo import Todo, change_timestamp
+from app.models.todo_archive import TodoArchive
 from app.models.user import User
 from app.schemas.page import Page
-from app.schemas.todo import TodoCreate, TodoResponse, TodoUpdate
+from app.schemas.purge import PurgeKind, TodoPurgeResponse
+from app.schemas.search import SearchMode, Suggestion
+from app.schemas.todo import (
+    TodoBatchResponse,
+    TodoChanges,
+    TodoCreate,
+    TodoResponse,
+    TodoStatsResponse,
+    TodoUpdate,
+)
 
 logger = get_logger(__name__)
 
+# Generation scope of the admin listing of all todos
+ALL_TODOS_SCOPE = "todos:all"
+
+# Attempts of an update without If-Match before giving up on a contended todo
+UPDATE_ATTEMPTS = 3
 
 class TodoService:
     """Service for managing Todo items in the application."""
@@ -29,6 +77,9 @@ class TodoService:
         self.background_tasks = background_tasks
         self.db = db
         self.redis = redis
+        self.cache = CacheOps(redis)
+        self.cache_loader = CacheLoader(self.cache, db)
+        self.read_your_writes = ReadYourWrites(self.cache)
 
     def get_todo_service(
         background_tasks: BackgroundTasks,
@@ -46,14 +97,84 @@ class TodoService:
         logger.debug(f"Generated cache key: {cache_key}")
         return cache_key
 
-    async def cache_data(self, key: str, data, ex: int = 60) -> None:
-        """Store data in Redis asynchronously with error handling."""
-        try:
-            serialized_data = serializer.serialize(data.model_dump())
-            await self.redis.set(key, serialized_data, ex=ex)
-            logger.debug(f"Data cached successfully with key: {key}")
-        except Exception as e:
-            logger.error(f"Failed to cache data: {e}")
+    def _page_cache_key(
+        self,
+        scope: str,
+        owner_id: Optional[str],
+        generation: str,
+        limit: int,
+        offset: int,
+    ) -> str:
+        """Generate the cache key of a todo page for the given scope and generation."""
+        owner_part = [f"owner-{owner_id}"] if owner_id is not None else []
+        return self._generate_cache_key(
+            "todos",
+            scope,
+            *owner_part,
+            f"gen-{generation}",
+            f"limit-{limit}",
+            f"offset-{offset}",
+        )
+
+    def _on_replica(self, loader, *scopes: str):
+        """
+        Wrap a cache loader so its queries run on a read replica, unless one of the
+        `scopes` it reads was written within the read-your-writes window.
+        """
+
+        async def load(db: AsyncSession):
+            async with replica_reads(db, self.cache, *scopes):
+                return await loader(db)
+
+        return load
+
+    @staticmethod
+    def _owner_scope(owner_id: str) -> str:
+        """Generation scope of one owner's cached todo pages and search results."""
+        return f"todos:owner-{owner_id}"
+
+    @staticmethod
+    def _todo_scope(todo_id: int) -> str:
+        """Read-your-writes scope of a single todo, read before its owner is known."""
+        return f"todo-{todo_id}"
+
+    async def _mark_write(self, owner_id: str, *todo_ids: int) -> None:
+        """Keep reads of the written todos and every listing of them on the primary."""
+        await self.read_your_writes.mark_write(
+            self._owner_scope(owner_id),
+            ALL_TODOS_SCOPE,
+            *(self._todo_scope(todo_id) for todo_id in todo_ids),
+        )
+
+    @staticmethod
+    def _suggest_key(owner_id: str) -> str:
+        """Key of the typeahead index over one owner's todo titles."""
+        return f"suggest:todos:owner-{owner_id}"
+
+    def _suggestions(self, owner_id: str) -> PrefixIndex:
+        return PrefixIndex(self.cache, self._suggest_key(owner_id))
+
+    async def _invalidate_todos(
+        self, owner_id: str, *todo_ids: int, drop_suggestions: bool = False
+    ) -> None:
+        """
+        Invalidate cached todos, and reset the generations of every cached page
+        that may list them and of the owner's cached search results.
+
+        Single-todo writers update the owner's typeahead index themselves; bulk
+        writers pass `drop_suggestions` to have it rebuilt instead.
+        """
+        suggest_keys = (
+            PrefixIndex.keys_of(self._suggest_key(owner_id)) if drop_suggestions else []
+        )
+        await self.cache.invalidate(
+            keys=[
+                *(self._generate_cache_key("todo", todo_id) for todo_id in todo_ids),
+                generation_key(self._owner_scope(owner_id)),
+                generation_key(ALL_TODOS_SCOPE),
+                *suggest_keys,
+            ]
+        )
 
     async def _create_todo_page(
         self,
@@ -62,9 +183,16 @@ class TodoService:
         is_complete: Optional[bool] = None,
         limit: int = 10,
         offset: int = 0,
+        db: Optional[AsyncSession] = None,
+        prefetch_scope: Optional[str] = None,
+        generation: Optional[str] = None,
     ) -> Page[TodoResponse]:
         """
         Helper method to create a page of todos based on query parameters.
+
+        When `prefetch_scope` and the page's `generation` are given and prefetching
+        is allowed for its endpoint, twice the rows are fetched and the next page is
+        cached in the background.
         """
         logger.info("Creating a page of todos.")
         if owner_id is not None:
@@ -75,84 +203,254 @@ class TodoService:
             query = query.filter(Todo.complete == is_complete)
             logger.debug(f"Filtering todos by completion status: {is_complete}")
 
-        # Get total count for pagination
-        count_query = select(func.count()).select_from(query.subquery())
-        result = await self.db.execute(count_query)
-        todo_count = result.scalar()
-        logger.debug(f"Total todos found: {todo_count}")
-
-        # Apply ordering and pagination
-        query = (
-            query.order_by(
-                desc(Todo.priority), asc(Todo.complete), desc(Todo.created_at)
-            )
-            .offset(offset)
-            .limit(limit)
+        prefetch = (
+            prefetch_scope is not None
+            and generation is not None
+            and prefetch_policy.try_acquire(f"{prefetch_scope}_todos")
         )
+        fetch_limit = limit * 2 if prefetch else limit
 
-        todos = await self.db.execute(query)
-        todos = todos.scalars().all()
+        # Apply ordering, then fetch the page together with the total count
+        query = query.order_by(
+            desc(Todo.priority), asc(Todo.complete), desc(Todo.created_at)
+        )
+        todos, todo_count = await fetch_page(db or self.db, query, fetch_limit, offset)
+        logger.debug(f"Total todos found: {todo_count}")
         logger.debug(f"Retrieved {len(todos)} todos from the database.")
 
         # Convert to response objects
         todos_response = [TodoResponse.model_validate(todo.__dict__) for todo in todos]
+
+        if prefetch and len(todos_response) > limit:
+            next_offset = offset + limit
+            logger.debug(f"Prefetching todos page at offset {next_offset}.")
+            self.cache_loader.store_prefetched(
+                self._page_cache_key(
+                    prefetch_scope, owner_id, generation, limit, next_offset
+                ),
+                Page.create(todos_response[limit:], next_offset, limit, todo_count),
+            )
+
         logger.info("Successfully created a page of todos.")
+        return Page.create(todos_response[:limit], offset, limit, todo_count)
+
+    async def _create_completed_page(
+        self,
+        owner_id: str,
+        limit: int = 10,
+        offset: int = 0,
+        db: Optional[AsyncSession] = None,
+    ) -> Page[TodoResponse]:
+        """
+        Create a page of an owner's completed todos, listing the hot ones first
+        and then those moved to the archive, each in the usual order.
+        """
+        logger.info("Creating a page of completed todos.")
+        queries = [
+            select(model)
+            .filter(model.owner_id == owner_id, model.complete == True)
+            .order_by(desc(model.priority), desc(model.created_at))
+            for model in (Todo, TodoArchive)
+        ]
+        todos, todo_count = await fetch_chained_page(db or self.db, queries, limit, offset)
+        logger.debug(f"Total completed todos found: {todo_count}")
+
+        todos_response = [TodoResponse.model_validate(todo.__dict__) for todo in todos]
+        logger.info("Successfully created a page of completed todos.")
         return Page.create(todos_response, offset, limit, todo_count)
 
+    async def _get_todo_page(
+        self,
+        scope: str,
+        owner_id: Optional[str] = None,
+        is_complete: Optional[bool] = None,
+        limit: int = 10,
+        offset: int = 0,
+        if_none_match: Optional[str] = None,
+        include_archive: bool = False,
+    ) -> Tuple[Page[TodoResponse], Optional[str]]:
+        """
+        Get a page of todos and its ETag from the cache of its scope's current
+        generation, loading it from a read replica on a miss.
+
+        With `include_archive`, the owner's completed todos are listed from both
+        the hot table and the archive.
+
+        The generation doubles as the page's version stamp, so a client that
+        already holds it gets a 304 after that single cache lookup.
+        """
+        generation_scope = (
+            self._owner_scope(owner_id) if owner_id is not None else ALL_TODOS_SCOPE
+        )
+        generation = await current_generation(self.cache, generation_scope)
+        etag = None
+        if generation is not None:
+            etag = make_etag("todos", scope, owner_id, generation, limit, offset)
+            check_not_modified(if_none_match, etag)
+
+        if include_archive:
+            create_page = lambda db: self._create_completed_page(
+                owner_id, limit=limit, offset=offset, db=db
+            )
+        else:
+            create_page = lambda db: self._create_todo_page(
+                select(Todo),
+                owner_id=owner_id,
+                is_complete=is_complete,
+                limit=limit,
+                offset=offset,
+                db=db,
+                prefetch_scope=scope,
+                generation=generation,
+            )
+        load = self._on_replica(create_page, generation_scope)
+        if generation is None:
+            return await self.cache_loader.load_uncached(load), None
+        todo_page = await self.cache_loader.get_or_load(
+            self._page_cache_key(scope, owner_id, generation, limit, offset),
+            Page[TodoResponse],
+            load,
+        )
+        return todo_page, etag
+
     async def get_all_todos(
-        self, user: User, limit: int = 10, offset: int = 0
-    ) -> Page[TodoResponse]:
+        self,
+        user: User,
+        limit: int = 10,
+        offset: int = 0,
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[Page[TodoResponse], Optional[str]]:
         """
-        Get all todos with pagination.
+        Get all todos with pagination, together with the page's ETag.
         """
         logger.info(f"Fetching all todos for user: {user.id}")
         if user.role != "ADMIN":
             logger.warning(f"User {user.id} is not authorized to fetch all todos.")
             raise UserNotAuthorizedException()
 
-        cache_key = self._generate_cache_key(
-            "todos", "all", f"limit-{limit}", f"offset-{offset}"
+        todo_page = await self._get_todo_page(
+            "all", limit=limit, offset=offset, if_none_match=if_none_match
         )
-        cached_todos = await self.redis.get(cache_key)
-        if cached_todos:
-            logger.debug("Returning todos from cache.")
-            return Page[TodoResponse].model_validate(
-                serializer.deserialize(cached_todos)
-            )
-
-        query = select(Todo)
-        todo_pages = await self._create_todo_page(query, limit=limit, offset=offset)
-        self.background_tasks.add_task(self.cache_data, cache_key, todo_pages, 300)
-        logger.info("Successfully fetched all todos from the database.")
-        return todo_pages
+        logger.info("Successfully fetched all todos.")
+        return todo_page
 
-    async def get_todo(self, user: User, id: int) -> TodoResponse:
+    async def get_todo(
+        self, user: User, id: int, if_none_match: Optional[str] = None
+    ) -> Tuple[TodoResponse, Optional[str]]:
         """
-        Get a single todo by ID.
+        Get a single todo by ID, together with its ETag.
+
+        The ETag is the todo's row version, so a client that already holds it gets
+        a 304 after the cache lookup, and can send it as `If-Match` to update it.
         """
         logger.info(f"Fetching todo with ID: {id} for user: {user.id}")
         cache_key = self._generate_cache_key("todo", id)
-        cached_todo = await self.redis.get(cache_key)
-        if cached_todo:
-            logger.debug("Returning todo from cache.")
-            return TodoResponse.model_validate(serializer.deserialize(cached_todo))
+        todo = await self.cache_loader.get_or_load(
+            cache_key, TodoResponse, lambda db: self._load_todo_on_replica(db, id)
+        )
 
-        result = await self.db.execute(select(Todo).filter(Todo.id == id))
-        todo = result.scalars().first()
+        # Cached todos are shared between users, so authorize after loading
+        self._authorize_todo_read(user, todo.owner_id, id)
 
-        if todo is None:
-            logger.error(f"Todo with ID {id} not found.")
-            raise TodoNotFoundException(id)
+        # Todos cached before versions existed carry none
+        etag = version_etag(todo.version) if todo.version is not None else None
+        check_not_modified(if_none_match, etag)
 
-        if todo.owner_id != user.id and user.role != "ADMIN":
+        logger.info("Successfully fetched todo.")
+        return todo, etag
+
+    @staticmethod
+    def _authorize_todo_read(user: User, owner_id: str, id: int) -> None:
+        if owner_id != user.id and user.role != "ADMIN":
             logger.warning(f"User {user.id} is not authorized to access todo {id}.")
             raise UserNotAuthorizedException()
 
-        todo = TodoResponse.model_validate(todo.__dict__)
-        self.background_tasks.add_task(self.cache_data, cache_key, todo, 300)
-        logger.info("Successfully fetched todo from the database.")
+    async def _load_todo_on_replica(self, db: AsyncSession, id: int) -> TodoResponse:
+        """
+        Load a single todo from a read replica unless it was just written.
+
+        Bulk deletes do not know which todos they removed, so a todo read from the
+        replica while its owner is inside the read-your-writes window is read
+        again from the primary before it is cached.
+        """
+        async with replica_reads(db, self.cache, self._todo_scope(id)) as on_replica:
+            todo = await self._load_todo(db, id)
+        if on_replica and await self.read_your_writes.is_sticky(
+            self._owner_scope(todo.owner_id)
+        ):
+            todo = await self._load_todo(db, id)
         return todo
 
+    async def _load_todo(self, db: AsyncSession, id: int) -> TodoResponse:
+        """
+        Load a single todo from the database, falling back to the archive.
+        """
+        for model in (Todo, TodoArchive):
+            result = await db.execute(select(model).filter(model.id == id))
+            todo = result.scalars().first()
+            if todo is not None:
+                return TodoResponse.model_validate(todo.__dict__)
+
+        logger.error(f"Todo with ID {id} not found.")
+        raise TodoNotFoundException(id)
+
+    async def get_todos(self, user: User, ids: List[int]) -> TodoBatchResponse:
+        """
+        Get several todos by ID in one cache round trip and at most one query.
+
+        Todos the user may not read are reported as missing, like unknown ones,
+        so a batch cannot be used to probe which ids exist.
+        """
+        ids = list(dict.fromkeys(ids))
+        logger.info(f"Fetching {len(ids)} todos for user: {user.id}")
+        todos = await self.cache_loader.get_many_or_load(
+            {id: self._generate_cache_key("todo", id) for id in ids},
+            TodoResponse,
+            self._load_todos_on_replica,
+        )
+
+        items = [
+            todos[id]
+            for id in ids
+            if id in todos
+            and (todos[id].owner_id == user.id or user.role == "ADMIN")
+        ]
+        visible = {todo.id for todo in items}
+        missing = [id for id in ids if id not in visible]
+        if missing:
+            logger.debug(f"Todos missing or not visible to user {user.id}: {missing}")
+        logger.info("Successfully fetched todos.")
+        return TodoBatchResponse(items=items, missing=missing)
+
+    async def _load_todos_on_replica(
+        self, db: AsyncSession, ids: List[int]
+    ) -> Dict[int, TodoResponse]:
+        """
+        Load several todos with one IN query, from a read replica unless one of
+        them or one of their owners was just written.
+        """
+        scopes = [self._todo_scope(id) for id in ids]
+        async with replica_reads(db, self.cache, *scopes) as on_replica:
+            todos = await self._load_todos(db, ids)
+        owner_scopes = {self._owner_scope(todo.owner_id) for todo in todos.values()}
+        if on_replica and await self.read_your_writes.is_sticky(*owner_scopes):
+            todos = await self._load_todos(db, ids)
+        return todos
+
+    async def _load_todos(
+        self, db: AsyncSession, ids: List[int]
+    ) -> Dict[int, TodoResponse]:
+        """Load todos with one IN query, and the ones not found from the archive."""
+        todos = {}
+        for model in (Todo, TodoArchive):
+            result = await db.execute(select(model).filter(model.id.in_(ids)))
+            for todo in result.scalars().all():
+                todos[todo.id] = TodoResponse.model_validate(todo.__dict__)
+            ids = [id for id in ids if id not in todos]
+            if not ids:
+                break
+        return todos
+
     async def create_todo(self, user: User, new_todo: TodoCreate) -> TodoResponse:
         """
         Create a new todo.
@@ -163,58 +461,129 @@ class TodoService:
 
         todo = Todo(**new_todo_data)
         self.db.add(todo)
+        await apply_todo_change(self.db, user.id, None, TodoState.of(todo))
         await self.db.commit()
         await self.db.refresh(todo)
-        await self.redis.delete(self._generate_cache_key("todos", "all", "*"))
+        await self._mark_write(user.id, todo.id)
+        await self._invalidate_todos(user.id)
+        await self._suggestions(user.id).add((todo.id, todo.title))
+        todo_response = TodoResponse.model_validate(todo.__dict__)
+        await publish_todo_event(
+            self.cache, user.id, "created", todo=todo_response.model_dump(mode="json")
+        )
         logger.info("Successfully created a new todo.")
-        return TodoResponse.model_validate(todo.__dict__)
+        return todo_response
 
     async def update_todo(
-        self, user: User, todo_id: int, update_todo: TodoUpdate
-    ) -> TodoResponse:
+        self,
+        user: User,
+        todo_id: int,
+        update_todo: TodoUpdate,
+        if_match: Optional[str] = None,
+    ) -> Tuple[TodoResponse, str]:
         """
-        Update an existing todo.
+        Update an existing todo, together with its new ETag.
+
+        The write is a compare-and-set on the version read just before, so no row
+        is locked. With `if_match` only the listed versions are updated and any
+        other fails with 412; without it, an update that loses a race to another
+        is retried on the new version, up to `UPDATE_ATTEMPTS` times before it
+        fails with 409.
         """
         logger.info(f"Updating todo with ID: {todo_id} for user: {user.id}")
-        result = await self.db.execute(select(Todo).filter(Todo.id == todo_id))
-        todo = result.scalars().first()
-
-        if todo is None:
-            logger.error(f"Todo with ID {todo_id} not found.")
-            raise TodoNotFoundException(todo_id)
-
-        if todo.owner_id != user.id and user.role != "ADMIN":
+        expected_versions = if_match_versions(if_match)
+        for attempt in range(1, UPDATE_ATTEMPTS + 1):
+            result = await self.db.execute(
+                select(*Todo.__table__.c).filter(Todo.id == todo_id)
+            )
+            todo = result.first()
+
+            if todo is None:
+                logger.error(f"Todo with ID {todo_id} not found.")
+                raise TodoNotFoundException(todo_id)
+
+            if todo.owner_id != user.id and user.role != "ADMIN":
+                logger.warning(
+                    f"User {user.id} is not authorized to update todo {todo_id}."
+                )
+                raise UserNotAuthorizedException()
+
+            if expected_versions is not None and todo.version not in expected_versions:
+                logger.warning(f"Todo {todo_id} is not at version {if_match}.")
+                raise PreconditionFailedException()
+
+            values = update_todo.model_dump()
+            values["finished_at"] = todo.finished_at
+            if values["complete"] and todo.finished_at is None:
+                values["finished_at"] = datetime.now(timezone.utc)
+                logger.debug(f"Marking todo {todo_id} as completed.")
+
+            if not values["complete"] and todo.finished_at:
+                values["finished_at"] = None
+                logger.debug(f"Marking todo {todo_id} as uncompleted.")
+
+            values["updated_at"] = change_timestamp()
+            values["version"] = todo.version + 1
+
+            result = await self.db.execute(
+                update(Todo)
+                .where(Todo.id == todo_id, Todo.version == todo.version)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                break
+
+            # Start a new transaction, so the next read sees the winning write
+            await self.db.rollback()
+            metrics.incr("todos.update_conflicts")
+            if expected_versions is not None:
+                logger.warning(f"Todo {todo_id} changed while being updated.")
+                raise PreconditionFailedException()
+            logger.debug(f"Todo {todo_id} changed while being updated, retrying.")
+        else:
+            metrics.incr("todos.update_conflicts_exhausted")
             logger.warning(
-                f"User {user.id} is not authorized to update todo {todo_id}."
+                f"Todo {todo_id} kept changing, giving up after {attempt} attempts."
             )
-            raise UserNotAuthorizedException()
-
-        # Update todo fields
-        for field, value in update_todo.model_dump().items():
-            setattr(todo, field, value)
-
-        if todo.complete and todo.finished_at is None:
-            todo.finished_at = datetime.now(timezone.utc)
-            logger.debug(f"Marking todo {todo_id} as completed.")
-
-        if not todo.complete and todo.finished_at:
-            todo.finished_at = None
-            logger.debug(f"Marking todo {todo_id} as uncompleted.")
-
+            raise TodoUpdateConflictException(todo_id)
+
+        updated = {**todo._mapping, **values}
+        # The old state is exactly the version the update replaced
+        await apply_todo_change(
+            self.db,
+            todo.owner_id,
+            TodoState.of(todo),
+            TodoState.of(SimpleNamespace(**updated)),
+        )
         await self.db.commit()
-        await self.db.refresh(todo)
-        await self.redis.delete(self._generate_cache_key("todo", todo_id))
-        await self.redis.delete(self._generate_cache_key("todos", "all", "*"))
+        await self._mark_write(todo.owner_id, todo_id)
+        await self._invalidate_todos(todo.owner_id, todo_id)
+        await self._suggestions(todo.owner_id).replace(
+            (todo_id, todo.title), (todo_id, updated["title"])
+        )
+        todo_response = TodoResponse.model_validate(updated)
+        await publish_todo_event(
+            self.cache,
+            todo.owner_id,
+            "updated",
+            todo=todo_response.model_dump(mode="json"),
+        )
         logger.info("Successfully updated the todo.")
-        return TodoResponse.model_validate(todo.__dict__)
+        return todo_response, version_etag(todo_response.version)
 
     async def delete_todo(self, user: User, id: int) -> None:
         """
-        Delete a todo by ID.
+        Delete a todo by ID, from the archive if it was moved there.
         """
         logger.info(f"Deleting todo with ID: {id} for user: {user.id}")
-        result = await self.db.execute(select(Todo).filter(Todo.id == id))
-        todo = result.scalars().first()
+        for model in (Todo, TodoArchive):
+            result = await self.db.execute(
+                select(model).filter(model.id == id).with_for_update()
+            )
+            todo = result.scalars().first()
+            if todo is not None:
+                break
 
         if todo is None:
             logger.error(f"Todo with ID {id} not found.")
@@ -224,15 +593,19 @@ class TodoService:
             logger.warning(f"User {user.id} is not authorized to delete todo {id}.")
             raise UserNotAuthorizedException()
 
+        await apply_todo_change(self.db, todo.owner_id, TodoState.of(todo), None)
+        await record_tombstones(self.db, model.id == id, source=model)
         await self.db.delete(todo)
         await self.db.commit()
-        await self.redis.delete(self._generate_cache_key("todo", id))
-        await self.redis.delete(self._generate_cache_key("todos", "all", "*"))
+        await self._mark_write(todo.owner_id, id)
+        await self._invalidate_todos(todo.owner_id, id)
+        await self._suggestions(todo.owner_id).remove((id, todo.title))
+        await publish_todo_event(self.cache, todo.owner_id, "deleted", todo_id=id)
         logger.info("Successfully deleted the todo.")
 
-    async def delete_all_todos(self, user: User, owner_id: str) -> int:
+    async def delete_all_todos(self, user: User, owner_id: str) -> TodoPurgeResponse:
         """
-        Delete all todos for a specific owner.
+        Delete all todos for a specific owner, in the background.
         """
         logger.info(f"Deleting all todos for owner: {owner_id}")
         if owner_id != user.id and user.role != "ADMIN":
@@ -241,18 +614,19 @@ class TodoService:
             )
             raise UserNotAuthorizedException()
 
-        stmt = delete(Todo).where(Todo.owner_id == owner_id)
-        result = await self.db.execute(stmt)
-        await self.db.commit()
-        await self.redis.delete(self._generate_cache_key("todos", "all", "*"))
-        logger.info(f"Successfully deleted {result.rowcount} todos.")
-        return result.rowcount
+        return await self._request_purge(user, owner_id, PurgeKind.todos)
 
     async def get_user_todos(
-        self, user: User, owner_id: str, limit: int = 10, offset: int = 0
-    ) -> Page[TodoResponse]:
+        self,
+        user: User,
+        owner_id: str,
+        limit: int = 10,
+        offset: int = 0,
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[Page[TodoResponse], Optional[str]]:
         """
-        Get all todos for a specific owner with pagination.
+        Get all todos for a specific owner with pagination, together with the
+        page's ETag.
         """
         logger.info(f"Fetching todos for owner: {owner_id}")
         if owner_id != user.id and user.role != "ADMIN":
@@ -261,68 +635,54 @@ class TodoService:
             )
             raise UserNotAuthorizedException()
 
-        cache_key = self._generate_cache_key(
-            "todos", "user", f"owner-{owner_id}", f"limit-{limit}", f"offset-{offset}"
-        )
-        cached_data = await self.redis.get(cache_key)
-
-        if cached_data:
-            logger.debug("Returning todos from cache.")
-            return Page[TodoResponse].model_validate(
-                serializer.deserialize(cached_data)
-            )
-
-        query = select(Todo)
-        todo_page = await self._create_todo_page(
-            query, owner_id=owner_id, limit=limit, offset=offset
+        todo_page = await self._get_todo_page(
+            "user", owner_id, limit=limit, offset=offset, if_none_match=if_none_match
         )
-
-        self.background_tasks.add_task(self.cache_data, cache_key, todo_page, 300)
-        logger.info("Successfully fetched todos from the database.")
+        logger.info("Successfully fetched todos.")
         return todo_page
 
     async def get_completed_todos(
-        self, user: User, owner_id: str, limit: int = 10, offset: int = 0
-    ) -> Page[TodoResponse]:
+        self,
+        user: User,
+        owner_id: str,
+        limit: int = 10,
+        offset: int = 0,
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[Page[TodoResponse], Optional[str]]:
         """
-        Get completed todos for a specific owner with pagination.
+        Get completed todos for a specific owner with pagination, together with the
+        page's ETag. Todos moved to the archive follow the hot ones.
         """
         logger.info(f"Fetching completed todos for owner: {owner_id}")
-        cache_key = self._generate_cache_key(
-            "todos",
-            "completed",
-            f"owner-{owner_id}",
-            f"limit-{limit}",
-            f"offset-{offset}",
-        )
-        cached_data = await self.redis.get(cache_key)
-
-        if cached_data:
-            logger.debug("Returning completed todos from cache.")
-            return Page[TodoResponse].model_validate(
-                serializer.deserialize(cached_data)
-            )
-
         if owner_id != user.id and user.role != "ADMIN":
             logger.warning(
                 f"User {user.id} is not authorized to fetch completed todos for owner {owner_id}."
             )
             raise UserNotAuthorizedException()
 
-        query = select(Todo)
-        todo_page = await self._create_todo_page(
-            query, owner_id=owner_id, is_complete=True, limit=limit, offset=offset
+        todo_page = await self._get_todo_page(
+            "completed",
+            owner_id,
+            is_complete=True,
+            limit=limit,
+            offset=offset,
+            if_none_match=if_none_match,
+            include_archive=True,
         )
-
-        self.background_tasks.add_task(self.cache_data, cache_key, todo_page, 300)
-        logger.info("Successfully fetched completed todos from the database.")
+        logger.info("Successfully fetched completed todos.")
         return todo_page
 
     async def get_uncompleted_todos(
-        self, user: User, owner_id: str, limit: int = 10, offset: int = 0
-    ) -> Page[TodoResponse]:
+        self,
+        user: User,
+        owner_id: str,
+        limit: int = 10,
+        offset: int = 0,
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[Page[TodoResponse], Optional[str]]:
         """
-        Get uncompleted todos for a specific owner with pagination.
+        Get uncompleted todos for a specific owner with pagination, together with the
+        page's ETag.
         """
         logger.info(f"Fetching uncompleted todos for owner: {owner_id}")
         if owner_id != user.id and user.role != "ADMIN":
@@ -331,33 +691,46 @@ class TodoService:
             )
             raise UserNotAuthorizedException()
 
-        cache_key = self._generate_cache_key(
-            "todos",
+        todo_page = await self._get_todo_page(
             "uncompleted",
-            f"owner-{owner_id}",
-            f"limit-{limit}",
-            f"offset-{offset}",
+            owner_id,
+            is_complete=False,
+            limit=limit,
+            offset=offset,
+            if_none_match=if_none_match,
         )
-        cached_data = await self.redis.get(cache_key)
+        logger.info("Successfully fetched uncompleted todos.")
+        return todo_page
 
-        if cached_data:
-            logger.debug("Returning uncompleted todos from cache.")
-            return Page[TodoResponse].model_validate(
-                serializer.deserialize(cached_data)
+    async def get_todo_changes(
+        self,
+        user: User,
+        owner_id: str,
+        since: Optional[str] = None,
+        limit: int = 100,
+    ) -> TodoChanges:
+        """
+        Get an owner's todos changed and deleted after the `since` cursor, so
+        clients resync in time proportional to the changes, not to their todos.
+        """
+        logger.info(f"Fetching todo changes for owner: {owner_id}")
+        if owner_id != user.id and user.role != "ADMIN":
+            logger.warning(
+                f"User {user.id} is not authorized to sync todos for owner {owner_id}."
             )
+            raise UserNotAuthorizedException()
 
-        query = select(Todo)
-        todo_page = await self._create_todo_page(
-            query, owner_id=owner_id, is_complete=False, limit=limit, offset=offset
+        changes = await load_changes(self.db, owner_id, since, limit)
+        logger.info(
+            f"Found {len(changes.changed)} changed and {len(changes.deleted)} deleted todos."
         )
+        return changes
 
-        self.background_tasks.add_task(self.cache_data, cache_key, todo_page, 300)
-        logger.info("Successfully fetched uncompleted todos from the database.")
-        return todo_page
-
-    async def delete_completed_todos(self, user: User, owner_id: str) -> int:
+    async def delete_completed_todos(
+        self, user: User, owner_id: str
+    ) -> TodoPurgeResponse:
         """
-        Delete all completed todos for a specific owner.
+        Delete all completed todos for a specific owner, in the background.
         """
         logger.info(f"Deleting completed todos for owner: {owner_id}")
         if owner_id != user.id and user.role != "ADMIN":
@@ -366,20 +739,39 @@ class TodoService:
             )
             raise UserNotAuthorizedException()
 
-        stmt = delete(Todo).where(
-            and_(Todo.owner_id == owner_id, Todo.complete == True)
-        )
-        result = await self.db.execute(stmt)
+        return await self._request_purge(user, owner_id, PurgeKind.completed)
+
+    async def _request_purge(
+        self, user: User, owner_id: str, kind: PurgeKind
+    ) -> TodoPurgeResponse:
+        """
+        Record a bulk delete for the purge workers, which delete the todos in
+        bounded chunks, so no request holds a long transaction or many locks.
+        """
+        purge = await create_purge(self.db, owner_id, kind, user.id)
         await self.db.commit()
-        await self.redis.delete(self._generate_cache_key("todos", "all", "*"))
-        await self.redis.delete(
-            self._generate_cache_key("todos", "completed", f"owner-{owner_id}", "*")
-        )
-        await self.redis.delete(
-            self._generate_cache_key("todos", "user", f"owner-{owner_id}", "*")
+        purge_requested.set()
+        logger.info(f"Scheduled purge {purge.id} of {kind.value} todos for owner: {owner_id}")
+        return TodoPurgeResponse.model_validate(purge)
+
+    async def on_todos_purged(self, owner_id: str, completed_only: bool) -> None:
+        """
+        Invalidate everything cached about an owner's todos once a purge of them
+        has finished, and tell the owner's live feeds.
+        """
+        await self._mark_write(owner_id)
+        await self._invalidate_todos(owner_id, drop_suggestions=True)
+        await publish_todo_event(
+            self.cache, owner_id, "cleared", completed_only=completed_only
         )
-        logger.info(f"Successfully deleted {result.rowcount} completed todos.")
-        return result.rowcount
+
+    async def on_todos_archived(self, owner_id: str, todo_ids: List[int]) -> None:
+        """
+        Invalidate what is cached about an owner's todos the archive mover moved;
+        they are now listed with the completed todos and read from the archive.
+        """
+        await self._mark_write(owner_id, *todo_ids)
+        await self._invalidate_todos(owner_id, *todo_ids, drop_suggestions=True)
 
     async def search_by_fulltext(
         self,
@@ -388,9 +780,14 @@ class TodoService:
         search_term: str,
         limit: int = 10,
         offset: int = 0,
+        mode: SearchMode = SearchMode.natural,
+        cursor: Optional[str] = None,
     ) -> Page[TodoResponse]:
         """
-        Search todos using full-text search.
+        Search todos using full-text search, most relevant first.
+
+        The ranked results are cached per normalized term and owner generation, so
+        repeated searches and further pages do not run the full-text query again.
         """
         logger.info(f"Searching todos for owner: {owner_id} with term: {search_term}")
         if owner_id != user.id and user.role != "ADMIN":
@@ -399,32 +796,103 @@ class TodoService:
             )
             raise UserNotAuthorizedException()
 
-        query = (
-            select(Todo)
-            .filter(Todo.owner_id == owner_id)
-            .where(text("MATCH(title, description) AGAINST(:search_term)"))
-        ).params(search_term=search_term)
-
-        # Get total count before applying pagination
-        count_query = select(func.count()).select_from(query.subquery())
-        result = await self.db.execute(count_query)
-        total_count = result.scalar()
-        logger.debug(f"Total todos found: {total_count}")
-
-        # Apply default sorting and pagination
-        query = (
-            query.order_by(
-                desc(Todo.priority), asc(Todo.complete), desc(Todo.created_at)
+        term = normalize_term(search_term)
+
+        async def load(db: AsyncSession):
+            query, relevance = search_dialect.search(
+                select(Todo).filter(Todo.owner_id == owner_id),
+                TODOS_SEARCH_INDEX,
+                term,
+                mode,
             )
-            .offset(offset)
-            .limit(limit)
+            query = query.order_by(relevance.desc(), desc(Todo.id)).limit(
+                ENVConfig.SEARCH_MAX_RESULTS
+            )
+            todos = (await db.execute(query)).scalars().all()
+            logger.debug(f"Total todos found: {len(todos)}")
+            return [TodoResponse.model_validate(todo.__dict__) for todo in todos]
+
+        todos_page = await cached_search(
+            self.cache_loader,
+            self._owner_scope(owner_id),
+            term,
+            mode,
+            TodoResponse,
+            self._on_replica(load, self._owner_scope(owner_id)),
+            limit,
+            offset,
+            cursor,
         )
+        logger.info("Successfully searched todos.")
+        return todos_page
 
-        results = await self.db.execute(query)
-        todos = results.scalars().all()
-        logger.debug(f"Retrieved {len(todos)} todos from the database.")
+    async def suggest_titles(
+        self, user: User, owner_id: str, prefix: str, limit: int = 10
+    ) -> List[Suggestion]:
+        """
+        Suggest todo titles of an owner starting with `prefix`, for search-as-you-type.
 
-        # Convert to response objects
-        todos_response = [TodoResponse.model_validate(todo.__dict__) for todo in todos]
-        logger.info("Successfully searched todos.")
-        return Page.create(todos_response, offset, limit, total_count)
+        Served from the owner's prefix index in Redis, not from the full-text index.
+        """
+        logger.info(f"Suggesting todo titles for owner: {owner_id}")
+        if owner_id != user.id and user.role != "ADMIN":
+            logger.warning(
+                f"User {user.id} is not authorized to search todos for owner {owner_id}."
+            )
+            raise UserNotAuthorizedException()
+
+        async def load_chunk(db: AsyncSession, after: Optional[int], size: int):
+            query = select(Todo.id, Todo.title).filter(Todo.owner_id == owner_id)
+            if after is not None:
+                query = query.filter(Todo.id > after)
+            return (await db.execute(query.order_by(Todo.id).limit(size))).all()
+
+        async def load_matches(db: AsyncSession, prefix: str, limit: int):
+            query = (
+                select(Todo.id, Todo.title)
+                .filter(Todo.owner_id == owner_id)
+                .filter(Todo.title.istartswith(prefix, autoescape=True))
+                .order_by(Todo.title, Todo.id)
+                .limit(limit)
+            )
+            return (await db.execute(query)).all()
+
+        return await self._suggestions(owner_id).suggest(
+            self.db,
+            prefix,
+            limit,
+            load_chunk,
+            load_matches,
+        )
+
+    async def get_todo_stats(self, user: User, owner_id: str) -> TodoStatsResponse:
+        """
+        Get an owner's todo statistics from the aggregates kept up to date by every
+        todo write, without reading the todos themselves.
+        """
+        logger.info(f"Fetching todo statistics for owner: {owner_id}")
+        if owner_id != user.id and user.role != "ADMIN":
+            logger.warning(
+                f"User {user.id} is not authorized to fetch statistics for owner {owner_id}."
+            )
+            raise UserNotAuthorizedException()
+
+        stats = await self._on_replica(
+            lambda db: load_todo_stats(db, owner_id), self._owner_scope(owner_id)
+        )(self.db)
+        logger.info("Successfully fetched todo statistics.")
+        return stats
+
+    async def recompute_todo_stats(self, user: User, owner_id: str) -> TodoStatsResponse:
+        """
+        Rebuild an owner's todo statistics from their todos (admin only).
+        """
+        logger.info(f"Recomputing todo statistics for owner: {owner_id}")
+        if user.role != "ADMIN":
+            logger.warning(f"User {user.id} is not authorized to recompute statistics.")
+            raise UserNotAuthorizedException()
+
+        await recompute_todo_stats(self.db, owner_id)
+        await self.db.commit()
+        await self.read_your_writes.mark_write(self._owner_scope(owner_id))
+        return await load_todo_stats(self.db, owner_id)
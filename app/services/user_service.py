@@ -1,27 +1,56 @@
+import hashlib
+from typing import List, Optional, Tuple, Union
 from fastapi import BackgroundTasks, Depends
 from redis import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select, text, delete
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from app.core.change_feed import publish_todo_event
+from app.core.etag import check_not_modified, make_etag
+from app.core.load_env import ENVConfig
 from app.core.logger_config import get_logger
 from app.database.database import get_db
-from app.database.redis_cahce import get_redis_cache, serializer
+from app.database.cache_loader import CacheLoader
+from app.database.pagination import fetch_page
+from app.database.redis_cahce import CacheOps, get_redis_cache
+from app.database.routing import ReadYourWrites, replica_reads
+from app.database.generations import current_generation, generation_key
+from app.database.purges import create_purge, purge_requested
+from app.database.search import (
+    USERS_SEARCH_INDEX,
+    cached_search,
+    normalize_term,
+    search_dialect,
+)
+from app.database.suggest import PrefixIndex
+from app.database.todo_stats import load_todo_counts
 from app.exceptions.UserNotAuthorizedException import UserNotAuthorizedException
 from app.exceptions.UserNotFoundException import UserNotFoundException
 from app.models.user import User
 from app.schemas.page import Page
+from app.schemas.purge import PurgeKind, TodoPurgeResponse
+from app.schemas.search import SearchMode, Suggestion
 from app.schemas.user import (
     PasswordUpdate,
     RoleUpdate,
     UserCreate,
     UserResponse,
     UserUpdate,
+    UserWithTodoCountsResponse,
 )
+from app.schemas.todo import TodoCountsByUser
 from app.services.auth_service import AuthService
+from app.services.todo_service import ALL_TODOS_SCOPE, TodoService
 
 logger = get_logger(__name__)
 
+# Generation scope of cached user pages and user search results
+USERS_SCOPE = "users"
+
+# Typeahead index over usernames and emails
+USERS_SUGGEST_KEY = "suggest:users"
+
 
 class UserService:
     def __init__(
@@ -33,6 +62,9 @@ class UserService:
         self.background_tasks = background_tasks
         self.db = db
         self.redis = redis
+        self.cache = CacheOps(redis)
+        self.cache_loader = CacheLoader(self.cache, db)
+        self.read_your_writes = ReadYourWrites(self.cache)
 
     def get_user_service(
         background_tasks: BackgroundTasks,
@@ -50,32 +82,93 @@ class UserService:
         logger.debug(f"Generated cache key: {cache_key}")
         return cache_key
 
-    async def cache_data(self, key: str, data, ex: int = 60) -> None:
-        """Store data in Redis asynchronously with error handling."""
-        try:
-            serialized_data = serializer.serialize(data.model_dump())
-            await self.redis.set(key, serialized_data, ex=ex)
-            logger.debug(f"Data cached successfully with key: {key}")
-        except Exception as e:
-            logger.error(f"Failed to cache data: {e}")
+    def _on_replica(self, loader, *scopes: str):
+        """
+        Wrap a cache loader so its queries run on a read replica, unless one of the
+        `scopes` it reads was written within the read-your-writes window.
+        """
+
+        async def load(db: AsyncSession):
+            async with replica_reads(db, self.cache, *scopes):
+                return await loader(db)
+
+        return load
+
+    @staticmethod
+    def _user_scope(user_id: str) -> str:
+        """Read-your-writes and generation scope of a single user."""
+        return f"user-{user_id}"
+
+    @staticmethod
+    def suggestions(cache: CacheOps) -> PrefixIndex:
+        """Typeahead index over usernames and emails, also updated on registration."""
+        return PrefixIndex(cache, USERS_SUGGEST_KEY)
+
+    async def _invalidate_user(self, user_id: str, email: str) -> None:
+        """
+        Invalidate a cached user and its auth record, and reset the generations of
+        the user, of cached user pages and of user search results.
+        """
+        await self.read_your_writes.mark_write(USERS_SCOPE, self._user_scope(user_id))
+        await self.cache.invalidate(
+            keys=[
+                self._generate_cache_key("user", user_id),
+                generation_key(AuthService.auth_scope(email)),
+                generation_key(USERS_SCOPE),
+                generation_key(self._user_scope(user_id)),
+            ]
+        )
+
+    async def _with_todo_counts(
+        self, users_page: Page[UserResponse]
+    ) -> Page[UserWithTodoCountsResponse]:
+        """
+        Add each listed user's open and completed todo counts to a page of users.
+
+        The counts come from the maintained todo statistics, read for the whole
+        page in one grouped query and cached per page under the users namespace
+        until the next todo write resets the all-todos generation.
+        """
+        user_ids = sorted(user.id for user in users_page.items)
+        load = self._on_replica(
+            lambda db: load_todo_counts(db, user_ids), ALL_TODOS_SCOPE
+        )
+        generation = await current_generation(self.cache, ALL_TODOS_SCOPE)
+        if generation is None:
+            todo_counts = await self.cache_loader.load_uncached(load)
+        else:
+            ids_hash = hashlib.sha1(",".join(user_ids).encode()).hexdigest()
+            cache_key = self._generate_cache_key(
+                "users", "todo-counts", f"gen-{generation}", ids_hash
+            )
+            todo_counts = await self.cache_loader.get_or_load(
+                cache_key, TodoCountsByUser, load, ttl=60
+            )
+
+        return Page[UserWithTodoCountsResponse](
+            **users_page.model_dump(exclude={"items"}),
+            items=[
+                UserWithTodoCountsResponse(
+                    **user.model_dump(), todo_counts=todo_counts.counts.get(user.id)
+                )
+                for user in users_page.items
+            ],
+        )
 
     async def _create_user_page(
-        self, query, limit: int = 10, offset: int = 0
+        self,
+        query,
+        limit: int = 10,
+        offset: int = 0,
+        db: Optional[AsyncSession] = None,
     ) -> Page[UserResponse]:
         """
         Helper method to create a page of users based on query parameters.
         """
         logger.info("Creating a page of users.")
-        # Get total count for pagination
-        count_query = select(func.count()).select_from(query.subquery())
-        result = await self.db.execute(count_query)
-        user_count = result.scalar()
+        # Fetch the page together with the total count
+        users, user_count = await fetch_page(db or self.db, query, limit, offset)
         logger.debug(f"Total users found: {user_count}")
-
-        # Apply pagination
-        query = query.offset(offset).limit(limit)
-        users = await self.db.execute(query)
-        users = users.scalars().all()
         logger.debug(f"Retrieved {len(users)} users from the database.")
 
         # Convert to response objects
@@ -84,61 +177,82 @@ class UserService:
         return Page.create(users_response, offset, limit, user_count)
 
     async def get_all_users(
-        self, user: User, limit: int = 10, offset: int = 0
-    ) -> Page[UserResponse]:
+        self,
+        user: User,
+        limit: int = 10,
+        offset: int = 0,
+        include_todo_stats: bool = False,
+    ) -> Union[Page[UserResponse], Page[UserWithTodoCountsResponse]]:
         """
-        Get all users with pagination.
+        Get all users with pagination, optionally with each user's todo counts.
         """
         logger.info(f"Fetching all users for admin: {user.id}")
         if user.role != "ADMIN":
             logger.warning(f"User {user.id} is not authorized to fetch all users.")
             raise UserNotAuthorizedException()
 
-        cache_key = self._generate_cache_key(
-            "users", "all", f"limit-{limit}", f"offset-{offset}"
+        load = self._on_replica(
+            lambda db: self._create_user_page(
+                select(User), limit=limit, offset=offset, db=db
+            ),
+            USERS_SCOPE,
         )
-        cached_data = await self.redis.get(cache_key)
-
-        if cached_data:
-            logger.debug("Returning users from cache.")
-            return Page[UserResponse].model_validate(
-                serializer.deserialize(cached_data)
+        generation = await current_generation(self.cache, USERS_SCOPE)
+        if generation is None:
+            users_page = await self.cache_loader.load_uncached(load)
+        else:
+            cache_key = self._generate_cache_key(
+                "users", "all", f"gen-{generation}", f"limit-{limit}", f"offset-{offset}"
             )
-
-        query = select(User)
-        users_page = await self._create_user_page(query, limit=limit, offset=offset)
-
-        self.background_tasks.add_task(self.cache_data, cache_key, users_page)
-        logger.info("Successfully fetched all users from the database.")
+            users_page = await self.cache_loader.get_or_load(
+                cache_key, Page[UserResponse], load, ttl=60
+            )
+        if include_todo_stats:
+            users_page = await self._with_todo_counts(users_page)
+        logger.info("Successfully fetched all users.")
         return users_page
 
-    async def get_user(self, user: User, user_id: str) -> UserResponse:
+    async def get_user(
+        self, user: User, user_id: str, if_none_match: Optional[str] = None
+    ) -> Tuple[UserResponse, Optional[str]]:
         """
-        Get a single user by ID.
+        Get a single user by ID, together with its ETag.
         """
         logger.info(f"Fetching user with ID: {user_id} for user: {user.id}")
         if user.role != "ADMIN" and user.id != user_id:
             logger.warning(f"User {user.id} is not authorized to fetch user {user_id}.")
             raise UserNotAuthorizedException()
 
-        cache_key = self._generate_cache_key("user", user_id)
-        cached_data = await self.redis.get(cache_key)
+        generation = await current_generation(self.cache, self._user_scope(user_id))
+        etag = None
+        if generation is not None:
+            etag = make_etag("user", user_id, generation)
+            check_not_modified(if_none_match, etag)
 
-        if cached_data:
-            logger.debug("Returning user from cache.")
-            return UserResponse.model_validate(serializer.deserialize(cached_data))
+        cache_key = self._generate_cache_key("user", user_id)
+        user_response = await self.cache_loader.get_or_load(
+            cache_key,
+            UserResponse,
+            self._on_replica(
+                lambda db: self._load_user(db, user_id), self._user_scope(user_id)
+            ),
+            ttl=60,
+        )
+        logger.info("Successfully fetched user.")
+        return user_response, etag
 
-        result = await self.db.execute(select(User).filter(User.id == user_id))
+    async def _load_user(self, db: AsyncSession, user_id: str) -> UserResponse:
+        """
+        Load a single user from the database.
+        """
+        result = await db.execute(select(User).filter(User.id == user_id))
         user = result.scalars().first()
 
         if not user:
             logger.error(f"User with ID {user_id} not found.")
             raise UserNotFoundException(id=user_id)
 
-        user_response = UserResponse.model_validate(user.__dict__)
-        self.background_tasks.add_task(self.cache_data, cache_key, user_response)
-        logger.info("Successfully fetched user from the database.")
-        return user_response
+        return UserResponse.model_validate(user.__dict__)
 
     async def update_user(
         self, user: User, user_id: str, update_user: UserUpdate
@@ -160,6 +274,8 @@ class UserService:
             logger.error(f"User with ID {user_id} not found.")
             raise UserNotFoundException(id=user_id)
 
+        old_username = user.username
+
         # Update user fields
         for field, value in update_user.model_dump(exclude={"id"}).items():
             setattr(user, field, value)
@@ -169,14 +285,19 @@ class UserService:
         user_response = UserResponse.model_validate(user.__dict__)
 
         # Invalidate cache
-        await self.redis.delete(self._generate_cache_key("user", user_id))
-        await self.redis.delete(self._generate_cache_key("users", "all", "*"))
+        await self._invalidate_user(user_id, user.email)
+        await self.suggestions(self.cache).replace(
+            (user_id, old_username), (user_id, user.username)
+        )
         logger.info("Successfully updated the user.")
         return user_response
 
-    async def delete_user(self, user: User, user_id: str) -> None:
+    async def delete_user(self, user: User, user_id: str) -> TodoPurgeResponse:
         """
         Delete a user by ID.
+
+        The user is deactivated and their tokens revoked right away; their todos
+        and then the user are deleted in the background by a purge.
         """
         logger.info(f"Deleting user with ID: {user_id} for user: {user.id}")
         if user.role != "ADMIN" and user.id != user_id:
@@ -186,23 +307,51 @@ class UserService:
             raise UserNotAuthorizedException()
 
         result = await self.db.execute(select(User).filter(User.id == user_id))
-        user = result.scalars().first()
+        deleted_user = result.scalars().first()
 
-        if not user:
+        if not deleted_user or not deleted_user.is_active:
             logger.error(f"User with ID {user_id} not found.")
             raise UserNotFoundException(id=user_id)
 
-        await self.db.execute(delete(User).where(User.id == user_id))
+        deleted_user.is_active = False
+        await AuthService.revoke_user_tokens(self.db, deleted_user)
+        purge = await create_purge(self.db, user_id, PurgeKind.user, user.id)
         await self.db.commit()
 
         # Invalidate cache
-        await self.redis.delete(self._generate_cache_key("user", user_id))
-        await self.redis.delete(self._generate_cache_key("users", "all", "*"))
-        await self.redis.delete(self._generate_cache_key("todos", "all", "*"))
-        await self.redis.delete(
-            self._generate_cache_key("todos", "user", f"owner-{user_id}", "*")
+        await self._invalidate_user(user_id, deleted_user.email)
+        purge_requested.set()
+        logger.info(f"Scheduled purge {purge.id} of the user.")
+        return TodoPurgeResponse.model_validate(purge)
+
+    async def on_user_purged(self, user: User) -> None:
+        """
+        Invalidate everything cached about a user once a purge has deleted them
+        and their todos, and tell their live feeds.
+        """
+        user_id = user.id
+        await self.read_your_writes.mark_write(
+            USERS_SCOPE,
+            self._user_scope(user_id),
+            TodoService._owner_scope(user_id),
+            ALL_TODOS_SCOPE,
+        )
+        await self.cache.invalidate(
+            keys=[
+                self._generate_cache_key("user", user_id),
+                generation_key(AuthService.auth_scope(user.email)),
+                generation_key(USERS_SCOPE),
+                generation_key(self._user_scope(user_id)),
+                generation_key(TodoService._owner_scope(user_id)),
+                generation_key(ALL_TODOS_SCOPE),
+                *PrefixIndex.keys_of(TodoService._suggest_key(user_id)),
+            ]
+        )
+        await self.suggestions(self.cache).remove(
+            (user_id, user.username), (user_id, user.email)
         )
-        logger.info("Successfully deleted the user.")
+        await publish_todo_event(self.cache, user_id, "cleared", completed_only=False)
+        logger.info(f"Successfully deleted user {user_id}.")
 
     async def update_password(
         self, user: User, user_id: str, new_password: PasswordUpdate
@@ -229,8 +378,7 @@ class UserService:
         await self.db.refresh(user)
 
         # Invalidate cache
-        await self.redis.delete(self._generate_cache_key("user", user_id))
-        await self.redis.delete(self._generate_cache_key("users", "all", "*"))
+        await self._invalidate_user(user_id, user.email)
         logger.info("Successfully updated the user's password.")
         return UserResponse.model_validate(user.__dict__)
 
@@ -252,6 +400,10 @@ class UserService:
             logger.error(f"User with ID {user_id} not found.")
             raise UserNotFoundException(id=user_id)
 
+        # Deactivation logs the user out everywhere
+        if user.is_active and not new_role.is_active:
+            await AuthService.revoke_user_tokens(self.db, user)
+
         # Update user role
         for field, value in new_role.model_dump().items():
             setattr(user, field, value)
@@ -261,31 +413,99 @@ class UserService:
         user_response = UserResponse.model_validate(user.__dict__)
 
         # Invalidate cache
-        await self.redis.delete(self._generate_cache_key("user", user_id))
-        await self.redis.delete(self._generate_cache_key("users", "all", "*"))
+        await self._invalidate_user(user_id, user.email)
         logger.info("Successfully changed the user's role.")
         return user_response
 
     async def search_users(
-        self, user: User, search_term: str, limit: int = 10, offset: int = 0
-    ) -> Page[UserResponse]:
+        self,
+        user: User,
+        search_term: str,
+        limit: int = 10,
+        offset: int = 0,
+        mode: SearchMode = SearchMode.natural,
+        cursor: Optional[str] = None,
+        include_todo_stats: bool = False,
+    ) -> Union[Page[UserResponse], Page[UserWithTodoCountsResponse]]:
         """
-        Search users using full-text search.
+        Search users using full-text search, most relevant first, optionally with
+        each user's todo counts.
+
+        The ranked results are cached per normalized term and users generation.
         """
         logger.info(f"Searching users with term: {search_term}")
         if user.role != "ADMIN":
             logger.warning(f"User {user.id} is not authorized to search users.")
             raise UserNotAuthorizedException()
 
-        query = (
-            select(User)
-            .where(
-                text(
-                    "MATCH(id, username, email, first_name, last_name, country_code, phone_number) AGAINST(:search_term)"
-                )
+        term = normalize_term(search_term)
+
+        async def load(db: AsyncSession):
+            query, relevance = search_dialect.search(
+                select(User), USERS_SEARCH_INDEX, term, mode
+            )
+            query = query.order_by(relevance.desc(), User.id).limit(
+                ENVConfig.SEARCH_MAX_RESULTS
             )
-            .params(search_term=search_term)
+            logger.debug(f"Executing search query for term: {term}")
+            users = (await db.execute(query)).scalars().all()
+            return [UserResponse.model_validate(user.__dict__) for user in users]
+
+        users_page = await cached_search(
+            self.cache_loader,
+            USERS_SCOPE,
+            term,
+            mode,
+            UserResponse,
+            self._on_replica(load, USERS_SCOPE),
+            limit,
+            offset,
+            cursor,
         )
+        if include_todo_stats:
+            users_page = await self._with_todo_counts(users_page)
+        return users_page
 
-        logger.debug(f"Executing search query for term: {search_term}")
-        return await self._create_user_page(query, limit, offset)
+    async def suggest_users(
+        self, user: User, prefix: str, limit: int = 10
+    ) -> List[Suggestion]:
+        """
+        Suggest usernames and emails starting with `prefix`, for search-as-you-type.
+
+        Served from the prefix index in Redis, not from the full-text index.
+        """
+        logger.info(f"Suggesting users for prefix: {prefix}")
+        if user.role != "ADMIN":
+            logger.warning(f"User {user.id} is not authorized to search users.")
+            raise UserNotAuthorizedException()
+
+        async def load_chunk(db: AsyncSession, after: Optional[str], size: int):
+            query = select(User.id, User.username, User.email)
+            if after is not None:
+                query = query.filter(User.id > after)
+            rows = (await db.execute(query.order_by(User.id).limit(size))).all()
+            return [
+                entry
+                for id, username, email in rows
+                for entry in ((id, username), (id, email))
+            ]
+
+        async def load_matches(db: AsyncSession, prefix: str, limit: int):
+            entries = []
+            for column in (User.username, User.email):
+                query = (
+                    select(User.id, column)
+                    .filter(column.istartswith(prefix, autoescape=True))
+                    .order_by(column)
+                    .limit(limit)
+                )
+                entries.extend((await db.execute(query)).all())
+            return sorted(entries, key=lambda entry: entry[1].lower())[:limit]
+
+        return await self.suggestions(self.cache).suggest(
+            self.db,
+            prefix,
+            limit,
+            load_chunk,
+            load_matches,
+        )
@@ -1,9 +1,26 @@
 # app/main.py
+import asyncio
 from contextlib import asynccontextmanager
 import time
 from fastapi import FastAPI, Request
+from app.core.load_env import ENVConfig
 from app.core.logger_config import get_logger
-from app.database.redis_cahce import close_redis, init_redis
+from app.core.change_feed import change_feed
+from app.core.metrics import metrics
+from app.core.revocation import revocation_list
+from app.database.database import engine, pool_hold_time
+from app.database.rollups import run_rollups_forever
+from app.database.sqlite import init_sqlite
+from app.jobs.purge_refresh_tokens import purge_forever as purge_refresh_tokens_forever
+from app.jobs.archive_todos import archive_forever as archive_todos_forever
+from app.jobs.purge_tombstones import purge_forever as purge_tombstones_forever
+from app.services.purge_service import run_purges_forever
+from app.database.redis_cahce import (
+    close_redis,
+    get_redis_cache,
+    init_redis,
+    redis_round_trips,
+)
 from app.exceptions.exception_handlers import (
     integrity_error_handler,
     mysql_error_handler,
@@ -14,6 +31,8 @@ from aiomysql import MySQLError
 from app.api.routers.auth import router as auth_router
 from app.api.routers.users import router as user_router
 from app.api.routers.todos import router as todo_router
+from app.api.routers.metrics import router as metrics_router
+from app.api.routers.analytics import router as analytics_router
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.openapi.models import SecurityScheme
@@ -22,10 +41,41 @@ logger = get_logger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if ENVConfig.DATABASE_BACKEND == "sqlite":
+        await init_sqlite(engine)
     await init_redis()
+    # Keep this worker's revoked-token filter in sync with Redis
+    revocation_sync = asyncio.create_task(
+        revocation_list.sync_forever(get_redis_cache)
+    )
+    background_tasks = [revocation_sync]
+    if ENVConfig.ROLLUP_INTERVAL_SECONDS > 0:
+        # Fold todo changes into the daily analytics rollups
+        background_tasks.append(
+            asyncio.create_task(run_rollups_forever(get_redis_cache))
+        )
+    if ENVConfig.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        # Drop refresh tokens past their expiry
+        background_tasks.append(asyncio.create_task(purge_refresh_tokens_forever()))
+    if ENVConfig.PURGE_POLL_SECONDS > 0:
+        # Carry out bulk deletes in chunks
+        background_tasks.append(
+            asyncio.create_task(run_purges_forever(get_redis_cache))
+        )
+    if ENVConfig.TOMBSTONE_PURGE_INTERVAL_SECONDS > 0:
+        # Drop todo tombstones past the delta sync retention
+        background_tasks.append(asyncio.create_task(purge_tombstones_forever()))
+    if ENVConfig.ARCHIVE_INTERVAL_SECONDS > 0:
+        # Move old completed todos out of the hot table
+        background_tasks.append(
+            asyncio.create_task(archive_todos_forever(get_redis_cache))
+        )
     
     yield
     
+    for task in background_tasks:
+        task.cancel()
+    await change_feed.close()
     await close_redis()
     logger.info("Application is closing...")
 
@@ -42,12 +92,26 @@ app.add_exception_handler(Exception, generic_exception_handler)
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(todo_router)
+app.include_router(metrics_router)
+app.include_router(analytics_router)
 
 
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     logger.info(f"Incoming request: {request.method} {request.url}")
-    response = await call_next(request)
+    # Shared lists so cache and pool events in the request task can update them
+    round_trips, hold_time = [0], [0.0]
+    round_trips_token = redis_round_trips.set(round_trips)
+    hold_time_token = pool_hold_time.set(hold_time)
+    try:
+        response = await call_next(request)
+    finally:
+        redis_round_trips.reset(round_trips_token)
+        pool_hold_time.reset(hold_time_token)
+    metrics.observe("redis.round_trips_per_request", round_trips[0])
+    metrics.observe("db.pool.hold_seconds_per_request", hold_time[0])
+    metrics.set_gauge("db.pool.hold_seconds_last_request", hold_time[0])
+    metrics.set_gauge("db.pool.checked_out", engine.sync_engine.pool.checkedout())
     logger.info(f"Outgoing response: {response.status_code}")
 
     return response
@@ -110,23 +174,35 @@ def custom_openapi():
     # Apply the security scheme to specific endpoints
     protected_paths = [
         "/api/v1/auth",  # GET /api/v1/auth
+        "/api/v1/auth/logout",  # POST /api/v1/auth/logout
         "/api/v1/users",  # GET /api/v1/users
         "/api/v1/users/{user_id}",  # GET /api/v1/users/{user_id}
         "/api/v1/users/{user_id}",  # PUT /api/v1/users/{user_id}
         "/api/v1/users/{user_id}",  # DELETE /api/v1/users/{user_id}
         "/api/v1/users/search",  # GET /api/v1/users/search
+        "/api/v1/users/suggest",  # GET /api/v1/users/suggest
         "/api/v1/users/{user_id}/password",  # PATCH /api/v1/users/{user_id}/password
         "/api/v1/users/{user_id}/role",  # PATCH /api/v1/users/{user_id}/role
         "/api/v1/todos",  # GET /api/v1/todos
         "/api/v1/todos",  # POST /api/v1/todos
+        "/api/v1/todos/batch",  # GET /api/v1/todos/batch
         "/api/v1/todos/user/{user_id}/uncompleted",  # GET /api/v1/todos/user/{user_id}/uncompleted
         "/api/v1/todos/user/{user_id}/completed",  # GET /api/v1/todos/user/{user_id}/completed
         "/api/v1/todos/user/{user_id}/completed",  # DELETE /api/v1/todos/user/{user_id}/completed
         "/api/v1/todos/user/{user_id}/search",  # GET /api/v1/todos/user/{user_id}/search
+        "/api/v1/todos/user/{user_id}/suggest",  # GET /api/v1/todos/user/{user_id}/suggest
+        "/api/v1/todos/user/{user_id}/stats",  # GET /api/v1/todos/user/{user_id}/stats
+        "/api/v1/todos/user/{user_id}/stats/recompute",  # POST /api/v1/todos/user/{user_id}/stats/recompute
+        "/api/v1/todos/user/{user_id}/changes",  # GET /api/v1/todos/user/{user_id}/changes
+        "/api/v1/todos/purges/{purge_id}",  # GET /api/v1/todos/purges/{purge_id}
         "/api/v1/todos/user/{user_id}",  # GET /api/v1/todos/user/{user_id}
         "/api/v1/todos/{todo_id}",  # GET /api/v1/todos/{todo_id}
         "/api/v1/todos/{todo_id}",  # PUT /api/v1/todos/{todo_id}
         "/api/v1/todos/{todo_id}",  # DELETE /api/v1/todos/{todo_id}
+        "/api/v1/analytics/daily",  # GET /api/v1/analytics/daily
+        "/api/v1/analytics/priorities",  # GET /api/v1/analytics/priorities
+        "/api/v1/analytics/rollups/run",  # POST /api/v1/analytics/rollups/run
+        "/api/v1/metrics",  # GET /api/v1/metrics
     ]
 
     for path in protected_paths:
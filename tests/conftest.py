@@ -0,0 +1,15 @@
+import os
+import tempfile
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Tests run against the example settings with an embedded SQLite database and
+# no reachable Redis; they must be in place before `app` reads its config
+load_dotenv(Path(__file__).resolve().parents[1] / "example.env")
+os.environ["DATABASE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["REDIS_URL"] = "redis://localhost:1"
+
+# Models import the session setup, so it has to be loaded first
+import app.database.database  # noqa: E402,F401
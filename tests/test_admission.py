@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController
+from app.exceptions.ServiceUnavailableException import ServiceUnavailableException
+
+
+def make_controller(limit=2, queue_size=4, max_wait_ms=1000, low_share=0.5):
+    return AdmissionController(limit, queue_size, max_wait_ms, low_share)
+
+
+def test_admits_up_to_the_limit_then_queues():
+    controller = make_controller()
+
+    async def main():
+        await controller.acquire("normal")
+        await controller.acquire("normal")
+        waiter = asyncio.create_task(controller.acquire("normal"))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert len(controller.waiters["normal"]) == 1
+
+        controller.release("normal", 0.01)
+        await waiter
+        assert controller.in_flight == 2
+        assert not controller.waiters["normal"]
+
+    asyncio.run(main())
+
+
+def test_low_lane_is_capped_by_its_share():
+    controller = make_controller(limit=4, low_share=0.5)
+
+    async def main():
+        await controller.acquire("low")
+        await controller.acquire("low")
+        with pytest.raises(ServiceUnavailableException):
+            await controller.acquire("low", timeout=0)
+        # The remaining slots still serve other lanes
+        await controller.acquire("normal")
+        assert controller.in_flight_by_lane == {"high": 0, "normal": 1, "low": 2}
+
+    asyncio.run(main())
+
+
+def test_higher_lane_is_admitted_first():
+    controller = make_controller(limit=1)
+    admitted = []
+
+    async def acquire(lane):
+        await controller.acquire(lane)
+        admitted.append(lane)
+
+    async def main():
+        await controller.acquire("normal")
+        low = asyncio.create_task(acquire("low"))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(acquire("high"))
+        await asyncio.sleep(0)
+
+        controller.release("normal", 0.01)
+        await high
+        controller.release("high", 0.01)
+        await low
+        assert admitted == ["high", "low"]
+
+    asyncio.run(main())
+
+
+def test_rejects_when_the_queue_is_full():
+    controller = make_controller(limit=1, queue_size=1)
+
+    async def main():
+        await controller.acquire("normal")
+        waiter = asyncio.create_task(controller.acquire("normal"))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceUnavailableException):
+            await controller.acquire("normal")
+        controller.release("normal", 0.01)
+        await waiter
+
+    asyncio.run(main())
+
+
+def test_rejects_when_the_expected_wait_exceeds_the_deadline():
+    controller = make_controller(limit=1)
+    controller.service_time = 5.0
+
+    async def main():
+        await controller.acquire("normal")
+        with pytest.raises(ServiceUnavailableException):
+            await controller.acquire("normal", timeout=1.0)
+        assert not controller.waiters["normal"]
+
+    asyncio.run(main())
+
+
+def test_timed_out_waiter_leaves_no_trace():
+    controller = make_controller(limit=1)
+
+    async def main():
+        await controller.acquire("normal")
+        with pytest.raises(ServiceUnavailableException):
+            await controller.acquire("normal", timeout=0.01)
+        assert not controller.waiters["normal"]
+        assert controller.in_flight == 1
+
+        controller.release("normal", 0.01)
+        assert controller.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_is_not_granted_a_slot():
+    controller = make_controller(limit=1)
+
+    async def main():
+        await controller.acquire("normal")
+        waiter = asyncio.create_task(controller.acquire("normal"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert not controller.waiters["normal"]
+
+        controller.release("normal", 0.01)
+        assert controller.in_flight == 0
+        assert controller.in_flight_by_lane["normal"] == 0
+
+    asyncio.run(main())
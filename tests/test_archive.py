@@ -0,0 +1,123 @@
+import asyncio
+from datetime import timedelta
+
+import fakeredis
+from fastapi import BackgroundTasks
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.archive import archive_batch
+from app.database.database import Base
+from app.database.purges import delete_chunk
+from app.models.todo import Todo, change_timestamp
+from app.models.todo_archive import TodoArchive
+from app.models.todo_purge import TodoPurge
+from app.models.todo_tombstone import TodoTombstone
+from app.models.user import User
+from app.services.todo_service import TodoService
+
+OWNER = "0" * 36
+NOW = change_timestamp()
+CUTOFF = NOW - timedelta(days=30)
+
+
+def todo(id: int, finished_days_ago=None) -> Todo:
+    """A todo, completed `finished_days_ago` days ago unless that is None."""
+    finished_at = None
+    if finished_days_ago is not None:
+        finished_at = NOW - timedelta(days=finished_days_ago)
+    return Todo(
+        id=id, title=f"todo {id}", priority=1, owner_id=OWNER,
+        complete=finished_at is not None, finished_at=finished_at,
+        created_at=NOW - timedelta(days=100), updated_at=NOW - timedelta(days=100),
+    )
+
+
+def run(test, todos):
+    """Run `test(db)` against OWNER's `todos`."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all(todos)
+            await db.commit()
+            result = await test(db)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+async def ids(db, model):
+    return list((await db.execute(select(model.id).order_by(model.id))).scalars())
+
+
+def test_moves_old_completed_todos_in_batches():
+    async def test(db):
+        batches = []
+        while moved := await archive_batch(db, CUTOFF, 2):
+            await db.commit()
+            batches.append(moved)
+        archived = (
+            await db.execute(select(TodoArchive).order_by(TodoArchive.id))
+        ).scalars().all()
+        return batches, await ids(db, Todo), [(t.id, t.title, t.complete) for t in archived]
+
+    # Oldest completions first; open and recently completed todos stay hot
+    batches, hot, archived = run(
+        test, [todo(1, 40), todo(2), todo(3, 60), todo(4, 10), todo(5, 31)]
+    )
+    assert batches == [{OWNER: [3, 1]}, {OWNER: [5]}]
+    assert hot == [2, 4]
+    assert archived == [(1, "todo 1", True), (3, "todo 3", True), (5, "todo 5", True)]
+
+
+def test_purge_deletes_archived_todos_in_id_order():
+    async def test(db):
+        await archive_batch(db, CUTOFF, 10)
+        purge = TodoPurge(
+            owner_id=OWNER, requested_by=OWNER, kind="completed", max_todo_id=5
+        )
+        db.add(purge)
+        await db.commit()
+        chunks = []
+        while True:
+            chunks.append(await delete_chunk(db, purge, 2))
+            await db.commit()
+            if chunks[-1] < 2:
+                break
+        tombstones = (
+            await db.execute(select(TodoTombstone.todo_id).order_by(TodoTombstone.todo_id))
+        ).scalars()
+        return chunks, await ids(db, Todo), await ids(db, TodoArchive), list(tombstones)
+
+    chunks, hot, archived, tombstones = run(
+        test, [todo(1, 40), todo(2), todo(3, 1), todo(4, 60), todo(5, 2)]
+    )
+    # Archived 1 and 4 are deleted between hot 3 and 5, in one id order
+    assert chunks == [2, 2, 0]
+    assert (hot, archived) == ([2], [])
+    assert tombstones == [1, 3, 4, 5]
+
+
+def test_single_todo_reads_and_deletes_fall_back_to_the_archive():
+    async def test(db):
+        await archive_batch(db, CUTOFF, 10)
+        await db.commit()
+        service = TodoService(BackgroundTasks(), db, fakeredis.FakeAsyncRedis())
+        owner = User(id=OWNER, role="USER")
+        archived, etag = await service.get_todo(owner, 1)
+        batch = await service.get_todos(owner, [1, 2, 9])
+        await service.delete_todo(owner, 1)
+        tombstones = (await db.execute(select(TodoTombstone.todo_id))).scalars()
+        return archived, etag, batch, await ids(db, TodoArchive), list(tombstones)
+
+    read, etag, batch, archived, tombstones = run(test, [todo(1, 40), todo(2)])
+    assert (read.id, read.complete, etag) == (1, True, '"1"')
+    assert [item.id for item in batch.items] == [1, 2]
+    assert batch.missing == [9]
+    assert archived == []
+    assert tombstones == [1]
+
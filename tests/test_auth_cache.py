@@ -0,0 +1,99 @@
+import asyncio
+
+import fakeredis
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.database import Base
+from app.database.generations import current_generation, generation_key
+from app.database.redis_cahce import CacheOps, CircuitBreaker, serializer
+from app.models.user import User
+from app.services.auth_service import AuthService
+
+EMAIL = "jane@example.com"
+
+
+def run(test, cache=None):
+    """Run `test(db, cache, selects)` against one stored user."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        selects = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add(User(
+                id="1" * 36, username="jane", email=EMAIL, first_name="Jane",
+                last_name="Doe", country_code="+1", phone_number="5550100",
+                hashed_password="x", role="USER", is_active=True,
+            ))
+            await db.commit()
+            selects.clear()
+            ops = cache or CacheOps(
+                fakeredis.FakeAsyncRedis(), CircuitBreaker("test", 5, 10)
+            )
+            result = await test(db, ops, selects)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+async def set_role(db, role):
+    await db.execute(update(User).where(User.email == EMAIL).values(role=role))
+    await db.commit()
+
+
+def test_cache_hit_needs_no_connection():
+    async def test(db, cache, selects):
+        first = await AuthService.load_authenticated_user(db, cache, EMAIL)
+        # The connection went back to the pool as soon as the user was read
+        released = not db.in_transaction()
+        second = await AuthService.load_authenticated_user(db, cache, EMAIL)
+        return first, second, released, len(selects), db.in_transaction()
+
+    first, second, released, selects, in_transaction = run(test)
+    assert released and not in_transaction
+    assert selects == 1
+    assert second.id == first.id and second.hashed_password is None
+
+
+def test_generation_reset_reloads_role():
+    async def test(db, cache, selects):
+        await AuthService.load_authenticated_user(db, cache, EMAIL)
+        await set_role(db, "ADMIN")
+        await cache.invalidate([generation_key(AuthService.auth_scope(EMAIL))])
+        return await AuthService.load_authenticated_user(db, cache, EMAIL)
+
+    assert run(test).role == "ADMIN"
+
+
+def test_record_cached_by_a_racing_load_is_not_served():
+    async def test(db, cache, selects):
+        # A load that read the user before the change stores it after the reset
+        scope = AuthService.auth_scope(EMAIL)
+        generation = await current_generation(cache, scope)
+        await set_role(db, "ADMIN")
+        await cache.invalidate([generation_key(scope)])
+        stale = {"id": "1" * 36, "email": EMAIL, "role": "USER", "is_active": True}
+        await cache.set(
+            AuthService.auth_cache_key(EMAIL, generation), serializer.serialize(stale)
+        )
+        return await AuthService.load_authenticated_user(db, cache, EMAIL)
+
+    assert run(test).role == "ADMIN"
+
+
+def test_loads_from_database_without_redis():
+    async def test(db, cache, selects):
+        for _ in range(2):
+            await AuthService.load_authenticated_user(db, cache, EMAIL)
+        return len(selects)
+
+    assert run(test, CacheOps(None, CircuitBreaker("test", 5, 10))) == 2
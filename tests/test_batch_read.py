@@ -0,0 +1,79 @@
+import asyncio
+
+import fakeredis
+from fastapi import BackgroundTasks
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.database import Base
+from app.models.todo import Todo
+from app.models.user import User
+from app.services.todo_service import TodoService
+
+OWNER = User(id="0" * 36, role="USER")
+OTHER = User(id="1" * 36, role="USER")
+ADMIN = User(id="2" * 36, role="ADMIN")
+
+
+def run(test):
+    """Run `test(service, selects)` with todos 1-3 of OWNER and 4 of OTHER."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        selects = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all(
+                Todo(id=i, title=f"todo {i}", priority=1, owner_id=owner.id)
+                for i, owner in [(1, OWNER), (2, OWNER), (3, OWNER), (4, OTHER)]
+            )
+            await db.commit()
+            selects.clear()
+            service = TodoService(BackgroundTasks(), db, fakeredis.FakeAsyncRedis())
+            result = await test(service, selects)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+def test_misses_are_loaded_with_one_query_and_cached():
+    async def test(service, selects):
+        first = await service.get_todos(OWNER, [3, 1, 3])
+        first_selects = len(selects)
+        second = await service.get_todos(OWNER, [1, 2, 3])
+        return first, first_selects, second, len(selects) - first_selects
+
+    first, first_selects, second, second_selects = run(test)
+    # Duplicates are dropped and the requested order is kept
+    assert [todo.id for todo in first.items] == [3, 1]
+    assert first_selects == 1
+    # Only todo 2 was not cached yet
+    assert [todo.id for todo in second.items] == [1, 2, 3]
+    assert second_selects == 1
+
+
+def test_unknown_ids_are_reported_missing():
+    async def test(service, selects):
+        return await service.get_todos(OWNER, [9, 2])
+
+    batch = run(test)
+    assert ([todo.id for todo in batch.items], batch.missing) == ([2], [9])
+
+
+def test_todos_of_other_users_are_reported_missing():
+    async def test(service, selects):
+        mine = await service.get_todos(OWNER, [1, 4])
+        admin = await service.get_todos(ADMIN, [1, 4])
+        return mine, admin
+
+    mine, admin = run(test)
+    assert ([todo.id for todo in mine.items], mine.missing) == ([1], [4])
+    assert ([todo.id for todo in admin.items], admin.missing) == ([1, 4], [])
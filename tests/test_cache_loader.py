@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import fakeredis
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import cache_loader
+from app.database.cache_loader import CacheLoader
+from app.database.redis_cahce import CacheOps, serializer
+
+
+class Value(BaseModel):
+    n: int
+
+
+def make_loader():
+    """Return a loader over an empty Redis, and the Redis client."""
+    client = fakeredis.FakeAsyncRedis()
+    db = AsyncSession(create_async_engine("sqlite+aiosqlite://"))
+    return CacheLoader(CacheOps(client), db), client
+
+
+def counting_loader(loads, n=1, delay=0.0):
+    async def load(db):
+        loads.append(db)
+        await asyncio.sleep(delay)
+        return Value(n=n)
+
+    return load
+
+
+def test_concurrent_misses_share_one_load():
+    async def main():
+        loader, client = make_loader()
+        loads = []
+        load = counting_loader(loads, delay=0.01)
+        values = await asyncio.gather(
+            *(loader.get_or_load("key", Value, load) for _ in range(5))
+        )
+        again = await loader.get_or_load("key", Value, load)
+        return values, again, loads
+
+    values, again, loads = asyncio.run(main())
+    assert [value.n for value in values] == [1] * 5
+    # One load for the five concurrent misses, none for the later hit
+    assert again.n == 1 and len(loads) == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    async def main():
+        loader, client = make_loader()
+        stale = {"fresh_until": time.time() - 1, "data": {"n": 1}}
+        await client.set("key", serializer.serialize(stale))
+        loads = []
+        load = counting_loader(loads, n=2)
+        served = [await loader.get_or_load("key", Value, load) for _ in range(3)]
+        await asyncio.gather(*cache_loader._background_tasks)
+        fresh = await loader.get_or_load("key", Value, load)
+        return served, fresh, loads
+
+    served, fresh, loads = asyncio.run(main())
+    assert [value.n for value in served] == [1, 1, 1]
+    # The stale entry was refreshed once, in the background
+    assert fresh.n == 2 and len(loads) == 1
+
+
+def test_waits_for_a_load_running_in_another_worker(monkeypatch):
+    monkeypatch.setattr(cache_loader.ENVConfig, "CACHE_LOCK_POLL_MS", 1)
+
+    async def main():
+        loader, client = make_loader()
+        await client.set("lock:key", "other-worker", px=10_000)
+
+        async def publish():
+            await asyncio.sleep(0.01)
+            await loader._store("key", Value(n=3), 60, 60)
+
+        loads = []
+        value, _ = await asyncio.gather(
+            loader.get_or_load("key", Value, counting_loader(loads)), publish()
+        )
+        return value, loads
+
+    value, loads = asyncio.run(main())
+    assert value.n == 3 and loads == []
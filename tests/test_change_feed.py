@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import fakeredis
+
+from app.core.change_feed import (
+    SLOW_CONSUMER,
+    ChangeFeed,
+    Subscription,
+    publish_todo_event,
+)
+from app.database.redis_cahce import CacheOps, CircuitBreaker
+
+
+def test_subscription_stops_a_slow_consumer():
+    subscription = Subscription("owner", queue_size=2)
+    for i in range(3):
+        subscription.offer(f"event {i}")
+
+    assert subscription.stopped == SLOW_CONSUMER
+    # Pending events are dropped and the sender is woken to close the stream
+    assert subscription.queue.get_nowait() is None
+    subscription.offer("later")
+    assert subscription.queue.empty()
+
+
+def test_events_reach_listeners_of_their_owner_only():
+    client = fakeredis.FakeAsyncRedis()
+    cache = CacheOps(client, CircuitBreaker("test", 5, 10))
+    feed = ChangeFeed(max_connections=10, queue_size=10)
+
+    async def main():
+        first = await feed.subscribe(client, "a")
+        second = await feed.subscribe(client, "a")
+        other = await feed.subscribe(client, "b")
+
+        await publish_todo_event(cache, "a", "deleted", todo_id=1)
+        message = await asyncio.wait_for(first.queue.get(), 2)
+        assert json.loads(message) == {"event": "deleted", "owner_id": "a", "todo_id": 1}
+        assert await asyncio.wait_for(second.queue.get(), 2) == message
+        assert other.queue.empty()
+
+        for subscription in (first, second, other):
+            await feed.unsubscribe(subscription)
+        assert feed.connections == 0
+        assert not feed.listeners
+        await feed.close()
+
+    asyncio.run(main())
+
+
+def test_rejects_connections_over_capacity():
+    client = fakeredis.FakeAsyncRedis()
+    feed = ChangeFeed(max_connections=1, queue_size=10)
+
+    async def main():
+        subscription = await feed.subscribe(client, "a")
+        assert await feed.subscribe(client, "a") is None
+        await feed.unsubscribe(subscription)
+        assert await feed.subscribe(client, "a") is not None
+        await feed.close()
+
+    asyncio.run(main())
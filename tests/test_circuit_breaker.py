@@ -0,0 +1,101 @@
+import asyncio
+
+from redis.exceptions import ConnectionError
+
+from app.database.redis_cahce import CacheOps, CircuitBreaker
+
+
+def make_breaker(failure_threshold=3, reset_timeout=10.0):
+    return CircuitBreaker("test", failure_threshold, reset_timeout)
+
+
+def expire_open_period(breaker: CircuitBreaker) -> None:
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_opens_after_consecutive_failures():
+    breaker = make_breaker()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count():
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_opens_with_a_single_probe():
+    breaker = make_breaker(failure_threshold=1)
+    breaker.record_failure()
+    expire_open_period(breaker)
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes():
+    breaker = make_breaker(failure_threshold=1)
+    breaker.record_failure()
+    expire_open_period(breaker)
+    breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_probe_failure_reopens():
+    breaker = make_breaker(failure_threshold=3)
+    for _ in range(3):
+        breaker.record_failure()
+    expire_open_period(breaker)
+    breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_abandoned_probe_lets_another_through():
+    breaker = make_breaker(failure_threshold=1)
+    breaker.record_failure()
+    expire_open_period(breaker)
+    breaker.allow_request()
+
+    breaker.record_abandoned()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+class DownRedis:
+    """Client whose every command fails to connect."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+
+def test_cache_ops_fail_open_and_short_circuit():
+    client = DownRedis()
+    cache = CacheOps(client, make_breaker(failure_threshold=2))
+
+    async def main():
+        return [await cache.get("key") for _ in range(4)]
+
+    assert asyncio.run(main()) == [None] * 4
+    assert client.calls == 2
+    assert not cache.available
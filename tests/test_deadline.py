@@ -0,0 +1,80 @@
+import re
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.deadline import ROUTE_BUDGETS_MS, deadline_for, request_deadline
+from app.database.database import (
+    ER_QUERY_TIMEOUT,
+    _on_before_cursor_execute,
+    _on_handle_error,
+)
+from app.exceptions.DeadlineExceededException import DeadlineExceededException
+
+
+def connection(dialect: str):
+    return SimpleNamespace(dialect=SimpleNamespace(name=dialect))
+
+
+@pytest.fixture
+def seconds_left():
+    """Give the current context a deadline `seconds` from now."""
+    tokens = []
+
+    def set_deadline(seconds):
+        tokens.append(request_deadline.set(time.monotonic() + seconds))
+
+    yield set_deadline
+    for token in reversed(tokens):
+        request_deadline.reset(token)
+
+
+def execute(dialect: str, statement: str) -> str:
+    statement, _ = _on_before_cursor_execute(
+        connection(dialect), None, statement, (), None, False
+    )
+    return statement
+
+
+def test_selects_are_capped_at_the_time_left(seconds_left):
+    seconds_left(0.5)
+    statement = execute("mysql", "  SELECT id FROM todos")
+    hint = re.match(r"SELECT /\*\+ MAX_EXECUTION_TIME\((\d+)\) \*/ id", statement)
+    limit = int(hint[1])
+    assert 400 < limit <= 500
+
+
+def test_only_mysql_selects_get_a_hint(seconds_left):
+    seconds_left(0.5)
+    assert execute("mysql", "UPDATE todos SET title = ?") == "UPDATE todos SET title = ?"
+    assert execute("sqlite", "SELECT id FROM todos") == "SELECT id FROM todos"
+
+
+def test_statements_without_a_deadline_are_unchanged():
+    assert execute("mysql", "SELECT id FROM todos") == "SELECT id FROM todos"
+
+
+def test_statements_are_refused_once_the_budget_is_spent(seconds_left):
+    seconds_left(-0.1)
+    with pytest.raises(DeadlineExceededException):
+        execute("mysql", "SELECT id FROM todos")
+
+
+def test_query_timeouts_become_deadline_errors():
+    timeout = SimpleNamespace(original_exception=Exception(ER_QUERY_TIMEOUT, "timeout"))
+    other = SimpleNamespace(original_exception=Exception(1062, "duplicate"))
+    assert isinstance(_on_handle_error(timeout), DeadlineExceededException)
+    assert _on_handle_error(other) is None
+
+
+NORMAL_MS = ROUTE_BUDGETS_MS["normal"]
+
+
+@pytest.mark.parametrize(
+    "requested, expected_ms",
+    [(None, NORMAL_MS), ("100", 100), ("abc", NORMAL_MS), (str(NORMAL_MS * 2), NORMAL_MS)],
+)
+def test_requested_timeout_only_shortens_the_budget(requested, expected_ms):
+    budget = deadline_for("normal", requested) - time.monotonic()
+    assert expected_ms / 1000 - 0.05 < budget <= expected_ms / 1000
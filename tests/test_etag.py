@@ -0,0 +1,70 @@
+import pytest
+from fastapi import Response
+
+from app.core.etag import (
+    check_not_modified,
+    etag_matches,
+    if_match_versions,
+    make_etag,
+    set_etag,
+    version_etag,
+)
+from app.exceptions.NotModifiedException import NotModifiedException
+
+
+def test_make_etag_is_a_quoted_stable_tag():
+    etag = make_etag("todo", 1, "gen")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("todo", 1, "gen")
+    assert etag != make_etag("todo", 1, "other-gen")
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ('"a"', True),
+        ('W/"a"', True),
+        ('"b", "a"', True),
+        ('"b"', False),
+        ("*", False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"a"') is expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("*", None),
+        ('"3"', [3]),
+        ('"1", "2"', [1, 2]),
+        # If-Match compares strongly
+        ('W/"3"', []),
+        ('"abc"', []),
+    ],
+)
+def test_if_match_versions(header, expected):
+    assert if_match_versions(header) == expected
+
+
+def test_version_etag_round_trips_through_if_match():
+    assert if_match_versions(version_etag(7)) == [7]
+
+
+def test_check_not_modified():
+    with pytest.raises(NotModifiedException) as e:
+        check_not_modified('"a"', '"a"')
+    assert e.value.status_code == 304
+    assert e.value.headers["ETag"] == '"a"'
+    # Without a version stamp there is nothing to compare
+    check_not_modified('"a"', None)
+
+
+def test_set_etag():
+    response = Response()
+    set_etag(response, '"a"')
+    assert response.headers["ETag"] == '"a"'
+    assert response.headers["Cache-Control"] == "private, no-cache"
@@ -0,0 +1,62 @@
+import asyncio
+
+import fakeredis
+from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.metrics import metrics
+from app.database.database import Base
+from app.database.generations import current_generation, generation_key
+from app.database.redis_cahce import CacheOps
+from app.models.user import User
+from app.schemas.todo import TodoCreate
+from app.services.todo_service import TodoService
+
+OWNER = User(id="0" * 36, role="USER")
+
+
+def test_generation_is_kept_until_invalidated():
+    async def main():
+        cache = CacheOps(fakeredis.FakeAsyncRedis())
+        first = await current_generation(cache, "todos:owner-1")
+        same = await current_generation(cache, "todos:owner-1")
+        other = await current_generation(cache, "todos:owner-2")
+        await cache.invalidate([generation_key("todos:owner-1")])
+        return first, same, other, await current_generation(cache, "todos:owner-1")
+
+    first, same, other, reset = asyncio.run(main())
+    assert first == same
+    assert len({first, other, reset}) == 3
+
+
+def test_invalidation_is_one_round_trip():
+    async def main():
+        client = fakeredis.FakeAsyncRedis()
+        cache = CacheOps(client)
+        await client.mset({f"key-{i}": 1 for i in range(10)})
+        before = metrics.counters.get("redis.round_trips", 0)
+        removed = await cache.invalidate(f"key-{i}" for i in range(10))
+        return removed, metrics.counters["redis.round_trips"] - before
+
+    assert asyncio.run(main()) == (10, 1)
+
+
+def test_writes_invalidate_cached_pages():
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            service = TodoService(BackgroundTasks(), db, fakeredis.FakeAsyncRedis())
+            listings = []
+            for title in ("Buy milk", "Buy eggs"):
+                await service.create_todo(OWNER, TodoCreate(title=title, priority=1))
+                # Read twice: the second read is served from the cache
+                for _ in range(2):
+                    page, _ = await service.get_user_todos(OWNER, OWNER.id)
+                    listings.append(sorted(todo.title for todo in page.items))
+        await engine.dispose()
+        return listings
+
+    listings = asyncio.run(main())
+    assert listings == [["Buy milk"]] * 2 + [["Buy eggs", "Buy milk"]] * 2
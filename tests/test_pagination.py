@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from sqlalchemy import Column, Integer, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from app.core.load_env import ENVConfig
+from app.database.pagination import fetch_chained_page, fetch_page
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+
+
+class OldItem(Base):
+    __tablename__ = "old_items"
+
+    id = Column(Integer, primary_key=True)
+
+
+@pytest.fixture(params=[True, False], ids=["window-count", "separate-count"])
+def window_count(request, monkeypatch):
+    monkeypatch.setattr(ENVConfig, "PAGINATION_WINDOW_COUNT", request.param)
+    return request.param
+
+
+def fetch(rows: int, limit: int, offset: int):
+    """Fetch one page of a table of `rows` items, counting the SELECTs issued."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        statements = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            if rows:
+                await connection.execute(
+                    Item.__table__.insert(), [{"id": i} for i in range(1, rows + 1)]
+                )
+        statements.clear()
+
+        async with AsyncSession(engine) as db:
+            items, total = await fetch_page(
+                db, select(Item).order_by(Item.id), limit, offset
+            )
+        await engine.dispose()
+        return [item.id for item in items], total, len(statements)
+
+    return asyncio.run(main())
+
+
+def test_page_with_rows(window_count):
+    ids, total, statements = fetch(rows=5, limit=2, offset=2)
+    assert (ids, total) == ([3, 4], 5)
+    assert statements == (1 if window_count else 2)
+
+
+def test_empty_table(window_count):
+    ids, total, statements = fetch(rows=0, limit=2, offset=0)
+    assert (ids, total) == ([], 0)
+    # An empty first page means an empty table, so no count is needed
+    assert statements == (1 if window_count else 2)
+
+
+def test_page_past_the_end(window_count):
+    ids, total, statements = fetch(rows=5, limit=2, offset=10)
+    assert (ids, total) == ([], 5)
+    assert statements == 2
+
+
+def fetch_chained(limit: int, offset: int):
+    """Fetch one page of items 1 to 3 followed by old items 11 to 14."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            await connection.execute(
+                Item.__table__.insert(), [{"id": i} for i in range(1, 4)]
+            )
+            await connection.execute(
+                OldItem.__table__.insert(), [{"id": i} for i in range(11, 15)]
+            )
+
+        async with AsyncSession(engine) as db:
+            items, total = await fetch_chained_page(
+                db,
+                [select(Item).order_by(Item.id), select(OldItem).order_by(OldItem.id)],
+                limit,
+                offset,
+            )
+        await engine.dispose()
+        return [item.id for item in items], total
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize(
+    "offset, ids",
+    [(0, [1, 2]), (2, [3, 11]), (4, [12, 13]), (6, [14]), (8, [])],
+)
+def test_chained_pages(window_count, offset, ids):
+    assert fetch_chained(limit=2, offset=offset) == (ids, 7)
@@ -0,0 +1,80 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi import BackgroundTasks
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.metrics import metrics
+from app.database import cache_loader
+from app.database.cache_loader import PrefetchPolicy
+from app.database.database import Base
+from app.models.todo import Todo
+from app.models.user import User
+from app.services.todo_service import TodoService
+
+OWNER = User(id="0" * 36, role="USER")
+
+
+def test_policy_only_allows_enabled_endpoints():
+    policy = PrefetchPolicy({"user_todos"}, rate_per_second=5)
+    assert policy.try_acquire("user_todos")
+    assert not policy.try_acquire("all_todos")
+    assert not PrefetchPolicy({"user_todos"}, rate_per_second=0).enabled("user_todos")
+
+
+def test_policy_caps_the_prefetch_rate():
+    policy = PrefetchPolicy({"user_todos"}, rate_per_second=2)
+    assert [policy.try_acquire("user_todos") for _ in range(3)] == [True, True, False]
+
+
+@pytest.fixture
+def prefetching(monkeypatch):
+    policy = PrefetchPolicy({"user_todos"}, rate_per_second=100)
+    monkeypatch.setattr("app.services.todo_service.prefetch_policy", policy)
+    metrics.counters.pop("cache.prefetch.hits", None)
+
+
+def list_pages(pages: int):
+    """Read the owner's first `pages` pages of two todos, counting the SELECTs."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        selects = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all(
+                Todo(id=i, title=f"todo {i}", priority=6 - i, owner_id=OWNER.id)
+                for i in range(1, 6)
+            )
+            await db.commit()
+            service = TodoService(BackgroundTasks(), db, fakeredis.FakeAsyncRedis())
+            results = []
+            for page in range(pages):
+                selects.clear()
+                todo_page, _ = await service.get_user_todos(
+                    OWNER, OWNER.id, limit=2, offset=page * 2
+                )
+                await asyncio.gather(*cache_loader._background_tasks)
+                results.append(([todo.id for todo in todo_page.items], len(selects)))
+        await engine.dispose()
+        return results
+
+    return asyncio.run(main())
+
+
+def test_next_page_is_prefetched(prefetching):
+    first, second, third = list_pages(3)
+    assert first[0] == [1, 2] and first[1] > 0
+    # The second page was cached along with the first, the third was not
+    assert second == ([3, 4], 0)
+    assert third[0] == [5] and third[1] > 0
+    assert metrics.counters["cache.prefetch.hits"] == 1
@@ -0,0 +1,97 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.database import Base
+from app.database.purges import claim_purge, delete_chunk, lock_purge
+from app.models.todo import Todo
+from app.models.todo_purge import TodoPurge
+from app.models.todo_tombstone import TodoTombstone
+
+OWNER = "0" * 36
+
+
+def run(test, kind="todos", max_todo_id=None, completed=()):
+    """
+    Run `test(db, purge)` against todos 1 to 5 of OWNER (those in `completed`
+    being complete) and a purge of them.
+    """
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all(
+                Todo(id=id, title=f"todo {id}", priority=1, owner_id=OWNER,
+                     complete=id in completed)
+                for id in range(1, 6)
+            )
+            purge = TodoPurge(
+                owner_id=OWNER, requested_by=OWNER, kind=kind, max_todo_id=max_todo_id
+            )
+            db.add(purge)
+            await db.commit()
+            result = await test(db, purge)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+async def remaining(db):
+    return list((await db.execute(select(Todo.id).order_by(Todo.id))).scalars())
+
+
+async def tombstones(db):
+    return list(
+        (await db.execute(select(TodoTombstone.todo_id).order_by(TodoTombstone.todo_id))).scalars()
+    )
+
+
+def test_chunks_in_id_order_up_to_the_requested_todos():
+    async def test(db, purge):
+        chunks = []
+        while True:
+            chunks.append(await delete_chunk(db, purge, 2))
+            await db.commit()
+            if chunks[-1] < 2:
+                break
+        return chunks, purge.deleted_count, await remaining(db), await tombstones(db)
+
+    chunks, deleted, left, dead = run(test, max_todo_id=4)
+    assert chunks == [2, 2, 0]
+    assert deleted == 4
+    # Todos created after the request are kept
+    assert left == [5]
+    assert dead == [1, 2, 3, 4]
+
+
+def test_completed_purge_keeps_open_todos():
+    async def test(db, purge):
+        await delete_chunk(db, purge, 10)
+        await db.commit()
+        return await remaining(db)
+
+    assert run(test, kind="completed", max_todo_id=5, completed=(2, 4)) == [1, 3, 5]
+
+
+def test_user_purge_leaves_no_tombstones():
+    async def test(db, purge):
+        await delete_chunk(db, purge, 10)
+        await db.commit()
+        return await remaining(db), await tombstones(db)
+
+    assert run(test, kind="user") == ([], [])
+
+
+def test_lease_keeps_a_purge_on_one_worker():
+    async def test(db, purge):
+        first = await claim_purge(db, purge.id, "a")
+        second = await claim_purge(db, purge.id, "b")
+        stolen = await lock_purge(db, purge.id, "b")
+        held = await lock_purge(db, purge.id, "a")
+        return first, second, stolen, held is not None
+
+    assert run(test) == (True, False, None, True)
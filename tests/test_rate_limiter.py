@@ -0,0 +1,88 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.core import rate_limiter
+from app.core.rate_limiter import RateLimit, RateLimiter
+from app.database.redis_cahce import CacheOps, CircuitBreaker
+from app.exceptions.TooManyRequestsException import TooManyRequestsException
+
+
+class DownRedis:
+    """Client whose every command fails to connect."""
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            raise ConnectionError("connection refused")
+
+        return command
+
+
+@pytest.fixture(params=["redis", "local"])
+def cache(request, monkeypatch):
+    """A Redis-backed cache, or one whose Redis is down so workers limit locally."""
+    monkeypatch.setattr(rate_limiter, "_local_windows", {})
+    client = fakeredis.FakeAsyncRedis() if request.param == "redis" else DownRedis()
+    return CacheOps(client, CircuitBreaker("test", 100, 10))
+
+
+def make_limiter(per_ip="3/60", per_email="2/60"):
+    return RateLimiter("test", RateLimit.parse(per_ip), RateLimit.parse(per_email))
+
+
+def test_parse():
+    assert RateLimit.parse("5/0.5") == RateLimit(5, 500)
+
+
+def test_rejects_once_the_window_is_full(cache):
+    limiter = make_limiter()
+
+    async def main():
+        await limiter.check(cache, "1.1.1.1", "a@example.com")
+        await limiter.check(cache, "1.1.1.1", "A@example.com ")
+        with pytest.raises(TooManyRequestsException) as e:
+            await limiter.check(cache, "1.1.1.1", "a@example.com")
+        assert 1 <= int(e.value.headers["Retry-After"]) <= 60
+
+    asyncio.run(main())
+
+
+def test_every_window_must_have_room(cache):
+    limiter = make_limiter()
+
+    async def main():
+        for i in range(3):
+            await limiter.check(cache, "1.1.1.1", f"{i}@example.com")
+        # The IP window is full even though this email was never seen
+        with pytest.raises(TooManyRequestsException):
+            await limiter.check(cache, "1.1.1.1", "new@example.com")
+        await limiter.check(cache, "2.2.2.2", "new@example.com")
+
+    asyncio.run(main())
+
+
+def test_rejected_requests_are_not_counted(cache):
+    limiter = make_limiter(per_ip="2/60", per_email="1/60")
+
+    async def main():
+        await limiter.check(cache, "1.1.1.1", "a@example.com")
+        with pytest.raises(TooManyRequestsException):
+            await limiter.check(cache, "1.1.1.1", "a@example.com")
+        # Only the accepted request used up the IP window
+        await limiter.check(cache, "1.1.1.1", "b@example.com")
+
+    asyncio.run(main())
+
+
+def test_window_slides(cache):
+    limiter = make_limiter(per_ip="0/60", per_email="1/0.05")
+
+    async def main():
+        await limiter.check(cache, "1.1.1.1", "a@example.com")
+        with pytest.raises(TooManyRequestsException):
+            await limiter.check(cache, "1.1.1.1", "a@example.com")
+        await asyncio.sleep(0.1)
+        await limiter.check(cache, "1.1.1.1", "a@example.com")
+
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.database import Base
+from app.exceptions.InvalidRefreshTokenException import InvalidRefreshTokenException
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services.auth_service import AuthService
+
+USER_ID = "1" * 36
+
+
+def run(test):
+    """Run `test(db)` with one stored user."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add(User(
+                id=USER_ID, username="jane", email="jane@example.com",
+                first_name="Jane", last_name="Doe", country_code="+1",
+                phone_number="5550100", hashed_password="x", is_active=True,
+            ))
+            await db.commit()
+            result = await test(db)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+async def families(db):
+    rows = await db.execute(
+        select(RefreshToken.family_id, RefreshToken.used, RefreshToken.revoked)
+        .order_by(RefreshToken.id)
+    )
+    return [tuple(row) for row in rows]
+
+
+def test_rotation_replaces_the_token_within_its_family():
+    async def test(db):
+        token = await AuthService.create_refresh_token(db, USER_ID)
+        user, rotated = await AuthService.rotate_refresh_token(db, token)
+        await db.commit()
+        _, again = await AuthService.rotate_refresh_token(db, rotated)
+        await db.commit()
+        return user.id, {token, rotated, again}, await families(db)
+
+    user_id, tokens, rows = run(test)
+    assert user_id == USER_ID and len(tokens) == 3
+    assert len({family for family, _, _ in rows}) == 1
+    assert [(used, revoked) for _, used, revoked in rows] == [
+        (True, False), (True, False), (False, False)
+    ]
+
+
+def test_reusing_a_token_revokes_its_family():
+    async def test(db):
+        stolen = await AuthService.create_refresh_token(db, USER_ID)
+        _, rotated = await AuthService.rotate_refresh_token(db, stolen)
+        await db.commit()
+        other_login = await AuthService.create_refresh_token(db, USER_ID)
+        with pytest.raises(InvalidRefreshTokenException):
+            await AuthService.rotate_refresh_token(db, stolen)
+        # The legitimate client's current token is revoked too
+        with pytest.raises(InvalidRefreshTokenException):
+            await AuthService.rotate_refresh_token(db, rotated)
+        _, still_valid = await AuthService.rotate_refresh_token(db, other_login)
+        return still_valid, await families(db)
+
+    still_valid, rows = run(test)
+    assert still_valid
+    assert [revoked for _, _, revoked in rows] == [True, True, False, False]
+
+
+@pytest.mark.parametrize("change", ["expired", "inactive", "unknown"])
+def test_invalid_tokens_are_rejected(change):
+    async def test(db):
+        token = await AuthService.create_refresh_token(db, USER_ID)
+        if change == "expired":
+            past = datetime.now(timezone.utc) - timedelta(seconds=1)
+            await db.execute(update(RefreshToken).values(expires_at=past))
+        elif change == "inactive":
+            await db.execute(update(User).values(is_active=False))
+        else:
+            token = "not-a-token"
+        await db.commit()
+        with pytest.raises(InvalidRefreshTokenException):
+            await AuthService.rotate_refresh_token(db, token)
+
+    run(test)
+
+
+def test_purge_deletes_only_expired_tokens():
+    async def test(db):
+        for _ in range(3):
+            await AuthService.create_refresh_token(db, USER_ID)
+        past = datetime.now(timezone.utc) - timedelta(days=1)
+        await db.execute(
+            update(RefreshToken).where(RefreshToken.id < 3).values(expires_at=past)
+        )
+        await db.commit()
+        deleted = await AuthService.purge_expired_refresh_tokens(db, batch_size=1)
+        left = (await db.execute(select(RefreshToken.id))).scalars().all()
+        return deleted, left
+
+    assert run(test) == (2, [3])
@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from app.core.revocation import (
+    REVOCATION_LOG_KEY,
+    REVOKED_JTIS_KEY,
+    BloomFilter,
+    RevocationList,
+)
+from app.database.redis_cahce import CacheOps, CircuitBreaker
+from app.exceptions.ServiceUnavailableException import ServiceUnavailableException
+
+
+class DownRedis:
+    """Client whose every command fails to connect."""
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            raise ConnectionError("connection refused")
+
+        return command
+
+
+def make_cache(client=None) -> CacheOps:
+    client = fakeredis.FakeAsyncRedis() if client is None else client
+    return CacheOps(client, CircuitBreaker("test", 5, 10))
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_revoked_token_is_rejected():
+    cache = make_cache()
+    revocations = RevocationList(100, 0.01)
+
+    async def main():
+        await revocations.revoke(cache, "a", time.time() + 60)
+        assert await revocations.is_revoked(cache, "a")
+        assert not await revocations.is_revoked(cache, "b")
+
+    asyncio.run(main())
+
+
+def test_sync_picks_up_revocations_of_other_workers():
+    client = fakeredis.FakeAsyncRedis()
+    here, there = RevocationList(100, 0.01), RevocationList(100, 0.01)
+
+    async def main():
+        await there.revoke(make_cache(client), "a", time.time() + 60)
+        assert not await here.is_revoked(make_cache(client), "a")
+
+        await here.sync(make_cache(client))
+        assert await here.is_revoked(make_cache(client), "a")
+
+    asyncio.run(main())
+
+
+def test_sync_reads_only_new_revocations():
+    client = fakeredis.FakeAsyncRedis()
+    here, there = RevocationList(100, 0.01), RevocationList(100, 0.01)
+
+    async def main():
+        await there.revoke(make_cache(client), "a", time.time() + 60)
+        await here.sync(make_cache(client))
+        bloom, sequence = here.filter, here.sequence
+
+        await there.revoke(make_cache(client), "b", time.time() + 60)
+        await here.sync(make_cache(client))
+        # Added to the existing filter, not rebuilt
+        assert here.filter is bloom
+        assert here.sequence == sequence + 1
+        assert await here.is_revoked(make_cache(client), "b")
+
+    asyncio.run(main())
+
+
+def test_sync_rebuilds_when_the_log_restarts():
+    client = fakeredis.FakeAsyncRedis()
+    here, there = RevocationList(100, 0.01), RevocationList(100, 0.01)
+
+    async def main():
+        for jti in ("a", "b", "c"):
+            await there.revoke(make_cache(client), jti, time.time() + 60)
+        await here.sync(make_cache(client))
+
+        await client.flushall()
+        await there.revoke(make_cache(client), "d", time.time() + 60)
+        await here.sync(make_cache(client))
+        assert "d" in here.filter
+        assert "a" not in here.filter
+        assert here.sequence == 1
+
+    asyncio.run(main())
+
+
+def test_sync_rebuilds_an_overfull_filter():
+    client = fakeredis.FakeAsyncRedis()
+    revocations = RevocationList(2, 0.01)
+
+    async def main():
+        cache = make_cache(client)
+        await revocations.sync(cache)
+        for jti in ("a", "b", "c"):
+            await revocations.revoke(cache, jti, time.time() + 60)
+        await revocations.sync(cache)
+        bloom = revocations.filter
+
+        await revocations.sync(cache)
+        assert revocations.filter is not bloom
+        assert all(jti in revocations.filter for jti in ("a", "b", "c"))
+
+    asyncio.run(main())
+
+
+def test_sync_drops_expired_revocations():
+    client = fakeredis.FakeAsyncRedis()
+    revocations = RevocationList(100, 0.01)
+
+    async def main():
+        cache = make_cache(client)
+        await revocations.revoke(cache, "expired", time.time() - 1)
+        await revocations.revoke(cache, "live", time.time() + 60)
+
+        await revocations.sync(cache)
+        assert await client.zrange(REVOKED_JTIS_KEY, 0, -1) == [b"live"]
+        assert await client.zrange(REVOCATION_LOG_KEY, 0, -1) == [b"live"]
+        assert "expired" not in revocations.filter
+        assert "live" in revocations.filter
+
+    asyncio.run(main())
+
+
+def test_sync_keeps_the_filter_when_redis_is_down():
+    revocations = RevocationList(100, 0.01)
+
+    async def main():
+        await revocations.revoke(make_cache(), "a", time.time() + 60)
+        await revocations.sync(make_cache(DownRedis()))
+        assert "a" in revocations.filter
+
+    asyncio.run(main())
+
+
+def test_unconfirmed_filter_hit_is_treated_as_revoked():
+    revocations = RevocationList(100, 0.01)
+
+    async def main():
+        await revocations.revoke(make_cache(), "a", time.time() + 60)
+        assert await revocations.is_revoked(make_cache(DownRedis()), "a")
+
+    asyncio.run(main())
+
+
+def test_revoke_fails_when_redis_is_down():
+    revocations = RevocationList(100, 0.01)
+
+    async def main():
+        with pytest.raises(ServiceUnavailableException):
+            await revocations.revoke(make_cache(DownRedis()), "a", time.time() + 60)
+        assert "a" not in revocations.filter
+
+    asyncio.run(main())
+
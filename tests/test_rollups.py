@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.load_env import ENVConfig
+from app.database import rollups
+from app.database.database import Base
+from app.database.rollups import run_rollups
+from app.models.rollup import DailyActiveUser, DailyTodoRollup
+from app.models.todo import Todo
+
+NOW = datetime(2026, 10, 19, 12, 0)
+DAY = NOW.date()
+
+
+@pytest.fixture
+def session_factory(monkeypatch, tmp_path):
+    """Point the aggregator at an empty database; yields its session factory."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rollups.db'}")
+
+    async def create():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(rollups, "SessionLocal", factory)
+    monkeypatch.setattr(ENVConfig, "ROLLUP_LAG_SECONDS", 60)
+    yield factory
+    asyncio.run(engine.dispose())
+
+
+def todo(id, owner, priority, created_ago, finished_ago=None) -> Todo:
+    finished_at = NOW - finished_ago if finished_ago is not None else None
+    return Todo(
+        id=id, title=f"todo {id}", owner_id=owner, priority=priority,
+        complete=finished_at is not None, created_at=NOW - created_ago,
+        finished_at=finished_at,
+    )
+
+
+def run(factory, *steps):
+    """Run `(todos, now)` steps: add the todos, then the aggregator at `now`."""
+
+    async def main():
+        counted = []
+        for todos, now in steps:
+            async with factory() as db:
+                db.add_all(todos)
+                await db.commit()
+            counted.append(await run_rollups(now))
+        async with factory() as db:
+            rows = (await db.execute(select(DailyTodoRollup))).scalars().all()
+            active = (await db.execute(select(DailyActiveUser))).scalars().all()
+        totals = {
+            (row.day, row.priority): (row.created_count, row.completed_count)
+            for row in rows
+        }
+        return counted, totals, sorted((row.day, row.user_id) for row in active)
+
+    return asyncio.run(main())
+
+
+def test_changes_are_counted_once(session_factory):
+    hour = timedelta(hours=1)
+    counted, totals, active = run(
+        session_factory,
+        ([todo(1, "a", 1, 3 * hour), todo(2, "b", 1, 2 * hour, hour)], NOW),
+        ([], NOW + hour),
+        ([todo(3, "a", 2, -hour)], NOW + 2 * hour),
+    )
+    assert counted == [
+        {"todos_created": 2, "todos_completed": 1},
+        {"todos_created": 0, "todos_completed": 0},
+        {"todos_created": 1, "todos_completed": 0},
+    ]
+    assert totals == {(DAY, 1): (2, 1), (DAY, 2): (1, 0)}
+    assert active == [(DAY, "a"), (DAY, "b")]
+
+
+def test_changes_inside_the_lag_wait_for_the_next_run(session_factory):
+    recent = todo(1, "a", 1, timedelta(seconds=10))
+    counted, totals, _ = run(
+        session_factory, ([recent], NOW), ([], NOW + timedelta(minutes=1))
+    )
+    assert [counts["todos_created"] for counts in counted] == [0, 1]
+    assert totals == {(DAY, 1): (1, 0)}
+
+
+def test_backlog_is_aggregated_one_day_at_a_time(session_factory, monkeypatch):
+    windows = []
+    aggregate_window = rollups._aggregate_window
+
+    async def record(db, column, counter, start, end):
+        windows.append(end - start)
+        return await aggregate_window(db, column, counter, start, end)
+
+    monkeypatch.setattr(rollups, "_aggregate_window", record)
+    todos = [todo(i, "a", 3, timedelta(days=i, hours=1)) for i in range(1, 4)]
+    counted, totals, active = run(session_factory, (todos, NOW))
+    assert counted[0]["todos_created"] == 3
+    assert len(windows) > 3 and max(windows) <= rollups.MAX_WINDOW
+    assert totals == {
+        (DAY - timedelta(days=i), 3): (1, 0) for i in range(1, 4)
+    }
+    assert [day for day, _ in active] == [
+        DAY - timedelta(days=i) for i in range(3, 0, -1)
+    ]
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+
+import fakeredis
+import pytest
+from sqlalchemy import Column, Integer, String, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from app.database import database, routing
+from app.database.database import RoutingSession
+from app.database.redis_cahce import CacheOps
+from app.database.routing import ReadYourWrites, replica_reads
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(10))
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Route replica reads to a second database; yields `(primary, replica)`."""
+    primary = create_async_engine("sqlite+aiosqlite://")
+    replica = create_async_engine("sqlite+aiosqlite://")
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([replica]))
+    monkeypatch.setattr(routing, "replica_engines", [replica])
+    monkeypatch.setattr(routing, "_recent_writes", {})
+    return primary, replica
+
+
+def run(engines, test):
+    async def main():
+        for engine in engines:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+                await connection.execute(
+                    Item.__table__.insert(), [{"id": 1, "source": "replica"}]
+                )
+        async with engines[0].begin() as connection:
+            await connection.execute(update(Item).values(source="primary"))
+        cache = CacheOps(fakeredis.FakeAsyncRedis())
+        async with AsyncSession(sync_session_class=RoutingSession) as db:
+            result = await test(db, cache)
+        for engine in engines:
+            await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+async def read(db):
+    return (await db.execute(select(Item.source))).scalar()
+
+
+def test_only_reads_inside_the_block_go_to_a_replica(replica):
+    async def test(db, cache):
+        outside = await read(db)
+        async with replica_reads(db, cache, "items") as on_replica:
+            inside = await read(db)
+            locked = (
+                await db.execute(select(Item.source).with_for_update())
+            ).scalar()
+        return on_replica, outside, inside, locked
+
+    on_replica, outside, inside, locked = run(replica, test)
+    assert on_replica
+    assert (outside, inside) == ("primary", "replica")
+    # Locking reads always go to the primary
+    assert locked == "primary"
+
+
+def test_written_scopes_stay_on_the_primary(replica):
+    async def test(db, cache):
+        await ReadYourWrites(cache).mark_write("items")
+        async with replica_reads(db, cache, "items") as written:
+            written_source = await read(db)
+        async with replica_reads(db, cache, "other") as other:
+            pass
+        # Other workers see the window through Redis
+        routing._recent_writes.clear()
+        shared = await ReadYourWrites(cache).is_sticky("items")
+        return written, written_source, other, shared
+
+    written, written_source, other, shared = run(replica, test)
+    assert (written, written_source) == (False, "primary")
+    assert other and shared
+
+
+def test_nothing_is_tracked_without_replicas(monkeypatch):
+    monkeypatch.setattr(routing, "replica_engines", [])
+    monkeypatch.setattr(routing, "_recent_writes", {})
+
+    async def main():
+        cache = CacheOps(fakeredis.FakeAsyncRedis())
+        await ReadYourWrites(cache).mark_write("items")
+        return routing._recent_writes, await cache.client.keys("*")
+
+    assert asyncio.run(main()) == ({}, [])
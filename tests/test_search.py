@@ -0,0 +1,161 @@
+import asyncio
+import sqlite3
+
+import fakeredis
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.cache_loader import CacheLoader
+from app.database.generations import current_generation, generation_key
+from app.database.redis_cahce import CacheOps, CircuitBreaker
+from app.database.search import (
+    BooleanClause,
+    against_term,
+    boolean_clauses,
+    cached_search,
+    decode_cursor,
+    encode_cursor,
+    fts5_query,
+    normalize_term,
+)
+from app.exceptions.InvalidSearchQueryException import InvalidSearchQueryException
+from app.schemas.search import SearchMode
+
+
+def test_normalize_term():
+    assert normalize_term("  Buy   MILK ") == "buy milk"
+
+
+def test_boolean_clauses():
+    assert boolean_clauses('+milk -eggs "oat milk" bre*') == [
+        BooleanClause("+", ["milk"], False),
+        BooleanClause("-", ["eggs"], False),
+        BooleanClause("", ["oat", "milk"], False),
+        BooleanClause("", ["bre"], True),
+    ]
+
+
+def test_boolean_clauses_keep_only_word_characters():
+    assert boolean_clauses("john@example.com (x) ~") == [
+        BooleanClause("", ["john", "example", "com"], False),
+        BooleanClause("", ["x"], False),
+    ]
+
+
+def test_boolean_clauses_reject_unbalanced_quotes():
+    with pytest.raises(InvalidSearchQueryException):
+        boolean_clauses('"oat milk')
+
+
+def test_against_term():
+    assert against_term("buy mil", SearchMode.prefix) == "+buy* +mil*"
+    assert (
+        against_term('+milk -"oat milk" john@example.com*', SearchMode.boolean)
+        == '+milk -"oat milk" "john example com"'
+    )
+    assert against_term("buy milk", SearchMode.natural) == "buy milk"
+
+
+@pytest.mark.parametrize(
+    "term, mode, expected",
+    [
+        ("buy milk", SearchMode.natural, '"buy" OR "milk"'),
+        ("buy mil", SearchMode.prefix, '"buy"* AND "mil"*'),
+        ("+milk +bread", SearchMode.boolean, '("milk" AND "bread")'),
+        ("milk bread", SearchMode.boolean, '("milk" OR "bread")'),
+        ('milk -"oat milk"', SearchMode.boolean, '("milk") NOT "oat milk"'),
+        ("+mil* -eggs", SearchMode.boolean, '("mil"*) NOT "eggs"'),
+        ("-eggs", SearchMode.boolean, None),
+        ("!!", SearchMode.natural, None),
+    ],
+)
+def test_fts5_query(term, mode, expected):
+    assert fts5_query(term, mode) == expected
+
+
+@pytest.mark.parametrize(
+    "term",
+    ['+a -"b c"', "(x) AND OR NOT", '"near x y"*', "*^:-+", "col:val -", 'x"y z"'],
+)
+def test_fts5_query_is_always_valid_syntax(term):
+    query = fts5_query(normalize_term(term), SearchMode.boolean)
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE VIRTUAL TABLE docs USING fts5(body)")
+    connection.execute("INSERT INTO docs VALUES ('a b c near x y col val')")
+    if query is not None:
+        connection.execute("SELECT * FROM docs WHERE docs MATCH ?", (query,))
+
+
+class Hit(BaseModel):
+    id: int
+
+
+def paged_search():
+    """
+    A search over a mutable result list: returns the cache, `search(cursor)`
+    fetching one page of two hits, the results and a list counting the loads.
+    """
+    cache = CacheOps(fakeredis.FakeAsyncRedis(), CircuitBreaker("test", 5, 10))
+    db = AsyncSession(create_async_engine("sqlite+aiosqlite://"))
+    loader = CacheLoader(cache, db)
+    results = [Hit(id=i) for i in range(5)]
+    loads = []
+
+    async def load(db):
+        loads.append(1)
+        return list(results)
+
+    async def search(cursor=None):
+        return await cached_search(
+            loader, "items", "milk", SearchMode.natural, Hit, load,
+            limit=2, cursor=cursor,
+        )
+
+    return cache, search, results, loads
+
+
+def test_cursor_pages_over_its_generation():
+    async def main():
+        cache, search, results, loads = paged_search()
+        first = await search()
+        results.reverse()
+        await cache.invalidate([generation_key("items")])
+        second = await search(first.next_cursor)
+        return first, second, loads
+
+    first, second, loads = asyncio.run(main())
+    assert [hit.id for hit in first.items] == [0, 1]
+    # Still cached under the cursor's generation, so the page does not shift
+    assert [hit.id for hit in second.items] == [2, 3]
+    assert len(loads) == 1
+
+
+def test_outdated_cursor_restarts_under_current_generation():
+    async def main():
+        cache, search, results, loads = paged_search()
+        first = await search()
+        results.reverse()
+        await cache.invalidate([generation_key("items")])
+        await cache.client.flushdb()
+        second = await search(first.next_cursor)
+        generation = await current_generation(cache, "items")
+        return second, generation, loads
+
+    second, generation, loads = asyncio.run(main())
+    assert second.page_number == 0
+    assert [hit.id for hit in second.items] == [4, 3]
+    assert decode_cursor(second.next_cursor) == (generation, 2)
+    assert len(loads) == 2
+
+
+def test_forged_cursor_generation_is_never_cached():
+    async def main():
+        cache, search, results, loads = paged_search()
+        page = await search(encode_cursor("forged", 2))
+        keys = await cache.client.keys("search:*")
+        return page, keys
+
+    page, keys = asyncio.run(main())
+    assert page.page_number == 0
+    assert keys and all(b"forged" not in key for key in keys)
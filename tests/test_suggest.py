@@ -0,0 +1,116 @@
+import asyncio
+
+import fakeredis
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import suggest
+from app.database.redis_cahce import CacheOps, CircuitBreaker
+from app.database.suggest import PrefixIndex
+
+FRUITS = [(1, "Apple"), (2, "banana"), (3, "Blackberry"), (4, "apricot"), (5, "Cherry")]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(suggest, "BUILD_CHUNK_SIZE", 2)
+
+
+def run(test, redis=True):
+    """Run `test(index, db, rows)` with an index over a mutable list of rows."""
+
+    async def main():
+        client = fakeredis.FakeAsyncRedis() if redis else None
+        cache = CacheOps(client, CircuitBreaker("test", 5, 10))
+        async with AsyncSession(create_async_engine("sqlite+aiosqlite://")) as db:
+            return await test(PrefixIndex(cache, "suggest:fruits"), db, list(FRUITS))
+
+    return asyncio.run(main())
+
+
+def loaders(rows, on_chunk=None, lookups=None):
+    """`load_chunk` and `load_matches` over `rows`, calling `on_chunk(after)` per chunk."""
+
+    async def load_chunk(db, after, size):
+        chunk = [row for row in sorted(rows) if after is None or row[0] > after][:size]
+        if on_chunk:
+            await on_chunk(after)
+        return chunk
+
+    async def load_matches(db, prefix, limit):
+        if lookups is not None:
+            lookups.append(prefix)
+        matches = [row for row in rows if row[1].lower().startswith(prefix)]
+        return sorted(matches, key=lambda row: row[1].lower())[:limit]
+
+    return load_chunk, load_matches
+
+
+async def suggest_after_build(index, db, prefix, limit, load_chunk, load_matches):
+    """Look up `prefix` once to start the build, wait for it, then look up again."""
+    first = await index.suggest(db, prefix, limit, load_chunk, load_matches)
+    await asyncio.gather(*suggest._build_tasks)
+    return first, await index.suggest(db, prefix, limit, load_chunk, load_matches)
+
+
+def texts(suggestions):
+    return [suggestion.text for suggestion in suggestions]
+
+
+def test_missing_index_is_built_in_the_background():
+    async def test(index, db, rows):
+        lookups = []
+        load_chunk, load_matches = loaders(rows, lookups=lookups)
+        first, second = await suggest_after_build(
+            index, db, "Ap", 5, load_chunk, load_matches
+        )
+        limited = await index.suggest(db, "b", 1, load_chunk, load_matches)
+        return first, second, limited, lookups
+
+    first, second, limited, lookups = run(test)
+    # The first lookup is answered by the database while the index is built
+    assert texts(first) == texts(second) == ["Apple", "apricot"]
+    assert [suggestion.id for suggestion in second] == ["1", "4"]
+    assert texts(limited) == ["banana"]
+    assert lookups == ["ap"]
+
+
+def test_writes_during_a_build_are_kept():
+    async def test(index, db, rows):
+        async def write(after):
+            if after is None:
+                # Written after the first chunk was read, before it was added
+                rows[1:3] = [(3, "Boysenberry")]
+                rows.append((6, "Blueberry"))
+                await index.remove((2, "banana"))
+                await index.add((6, "Blueberry"))
+                await index.replace((3, "Blackberry"), (3, "Boysenberry"))
+
+        load_chunk, load_matches = loaders(rows, on_chunk=write)
+        _, built = await suggest_after_build(index, db, "b", 5, load_chunk, load_matches)
+        return built
+
+    assert texts(run(test)) == ["Blueberry", "Boysenberry"]
+
+
+def test_empty_index_is_not_rebuilt():
+    async def test(index, db, rows):
+        rows.clear()
+        lookups = []
+        load_chunk, load_matches = loaders(rows, lookups=lookups)
+        await suggest_after_build(index, db, "a", 5, load_chunk, load_matches)
+        return lookups
+
+    assert run(test) == ["a"]
+
+
+def test_lookups_fall_back_to_the_database_without_redis():
+    async def test(index, db, rows):
+        lookups = []
+        load_chunk, load_matches = loaders(rows, lookups=lookups)
+        first, second = await suggest_after_build(
+            index, db, "c", 5, load_chunk, load_matches
+        )
+        return texts(first), texts(second), lookups
+
+    assert run(test, redis=False) == (["Cherry"], ["Cherry"], ["c", "c"])
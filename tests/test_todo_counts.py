@@ -0,0 +1,59 @@
+import asyncio
+
+import fakeredis
+from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.database import Base
+from app.models.user import User
+from app.schemas.todo import TodoCreate, TodoUpdate
+from app.services.todo_service import TodoService
+from app.services.user_service import UserService
+
+
+def user(n: int, role="USER") -> User:
+    return User(
+        id=str(n) * 36, username=f"user{n}", email=f"user{n}@example.com",
+        first_name="Jane", last_name="Doe", country_code="+1",
+        phone_number=f"555010{n}", hashed_password="x", role=role,
+    )
+
+
+ADMIN, JANE, JOHN = user(1, "ADMIN"), user(2), user(3)
+
+
+def counts(page):
+    return {
+        item.username: (item.todo_counts.open_total, item.todo_counts.completed_total)
+        for item in page.items
+    }
+
+
+def test_listing_includes_todo_counts_kept_current_by_writes():
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all([ADMIN, JANE, JOHN])
+            await db.commit()
+            redis = fakeredis.FakeAsyncRedis()
+            todos = TodoService(BackgroundTasks(), db, redis)
+            users = UserService(BackgroundTasks(), db, redis)
+            for title in ("Buy milk", "Buy eggs"):
+                await todos.create_todo(JANE, TodoCreate(title=title, priority=1))
+            listings = [await users.get_all_users(ADMIN, include_todo_stats=True)]
+
+            todo = await todos.create_todo(JOHN, TodoCreate(title="Walk dog", priority=2))
+            await todos.update_todo(
+                JOHN, todo.id, TodoUpdate(title="Walk dog", priority=2, complete=True)
+            )
+            listings.append(await users.get_all_users(ADMIN, include_todo_stats=True))
+            plain = await users.get_all_users(ADMIN)
+        await engine.dispose()
+        return listings, plain
+
+    (before, after), plain = asyncio.run(main())
+    assert counts(before) == {"user1": (0, 0), "user2": (2, 0), "user3": (0, 0)}
+    assert counts(after) == {"user1": (0, 0), "user2": (2, 0), "user3": (0, 1)}
+    assert not hasattr(plain.items[0], "todo_counts")
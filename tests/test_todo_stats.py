@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.database import Base
+from app.database.todo_stats import (
+    TodoState,
+    apply_todo_change,
+    load_todo_stats,
+    recompute_todo_stats,
+)
+from app.models.todo import Todo
+from app.models.todo_stats import TodoStats
+
+OWNER = "0" * 36
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def run(test):
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            result = await test(db)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+def state(priority, finished_hours_after=None) -> TodoState:
+    """A todo created an hour ago, finished the given hours after that if not None."""
+    created_at = NOW - timedelta(hours=1)
+    finished_at = None
+    if finished_hours_after is not None:
+        finished_at = created_at + timedelta(hours=finished_hours_after)
+    return TodoState(priority, finished_at is not None, created_at, finished_at)
+
+
+async def write(db, todos, id, before, after):
+    """Apply one todo write to `todos` and to the statistics."""
+    if after is None:
+        await db.delete(todos.pop(id))
+    elif id in todos:
+        todos[id].priority, todos[id].complete = after.priority, after.complete
+        todos[id].finished_at = after.finished_at
+    else:
+        todos[id] = Todo(
+            id=id, title=f"todo {id}", owner_id=OWNER, priority=after.priority,
+            complete=after.complete, created_at=after.created_at,
+            finished_at=after.finished_at,
+        )
+        db.add(todos[id])
+    await apply_todo_change(db, OWNER, before, after)
+    await db.commit()
+
+
+def test_incremental_updates_match_a_recompute():
+    async def test(db):
+        todos = {}
+        await write(db, todos, 1, None, state(1))
+        await write(db, todos, 2, None, state(1))
+        await write(db, todos, 3, None, state(3, 0.5))
+        await write(db, todos, 1, state(1), state(1, 1))
+        await write(db, todos, 2, state(1), state(2))
+        await write(db, todos, 3, state(3, 0.5), None)
+        incremental = await load_todo_stats(db, OWNER)
+        rows = (await db.execute(select(TodoStats.priority))).scalars().all()
+        await recompute_todo_stats(db, OWNER)
+        await db.commit()
+        return incremental, sorted(rows), await load_todo_stats(db, OWNER)
+
+    incremental, priorities, recomputed = run(test)
+    assert incremental == recomputed
+    # One upserted row per priority, however many writes touched it
+    assert priorities == [1, 2, 3]
+    assert incremental.open_total == 1
+    assert incremental.open_by_priority == {1: 0, 2: 1, 3: 0, 4: 0, 5: 0}
+    assert incremental.completed_total == 1
+    assert incremental.average_completion_seconds == 3600
+
+
+def test_recompute_repairs_drift():
+    async def test(db):
+        todos = {}
+        await write(db, todos, 1, None, state(2))
+        # A write that bypassed the statistics
+        db.add(Todo(id=2, title="todo 2", owner_id=OWNER, priority=4, complete=False))
+        await db.commit()
+        drifted = await load_todo_stats(db, OWNER)
+        await recompute_todo_stats(db, OWNER)
+        await db.commit()
+        return drifted, await load_todo_stats(db, OWNER)
+
+    drifted, repaired = run(test)
+    assert (drifted.open_total, repaired.open_total) == (1, 2)
+    assert repaired.open_by_priority[4] == 1
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.load_env import ENVConfig
+from app.database import todo_sync
+from app.database.database import Base
+from app.database.todo_sync import (
+    SyncPosition,
+    decode_sync_cursor,
+    encode_sync_cursor,
+    load_changes,
+)
+from app.exceptions import InvalidCursorException, SyncCursorExpiredException
+from app.models.todo import Todo
+from app.models.todo_tombstone import TodoTombstone
+
+OWNER = "0" * 36
+OTHER = "1" * 36
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(todo_sync, "change_timestamp", lambda: NOW)
+    monkeypatch.setattr(ENVConfig, "SYNC_LAG_SECONDS", 0)
+
+
+def todo(id: int, seconds_ago: int, owner_id: str = OWNER) -> Todo:
+    at = NOW - timedelta(seconds=seconds_ago)
+    return Todo(
+        id=id, title=f"todo {id}", priority=1, owner_id=owner_id,
+        created_at=at, updated_at=at,
+    )
+
+
+def tombstone(id: int, seconds_ago: int) -> TodoTombstone:
+    return TodoTombstone(
+        todo_id=id, owner_id=OWNER, deleted_at=NOW - timedelta(seconds=seconds_ago)
+    )
+
+
+def sync(rows, *calls, since=None):
+    """
+    Store `rows`, then run `load_changes(db, OWNER, since, limit)` once per limit
+    in `calls`, passing each cursor on to the next call.
+    """
+
+    async def main(since):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            db.add_all(rows)
+            await db.commit()
+            results = []
+            for limit in calls:
+                changes = await load_changes(db, OWNER, since, limit)
+                results.append(changes)
+                since = changes.cursor
+        await engine.dispose()
+        return results
+
+    return asyncio.run(main(since))
+
+
+def test_cursor_round_trip():
+    changed = SyncPosition(NOW, 7)
+    deleted = SyncPosition(NOW - timedelta(days=1))
+    assert decode_sync_cursor(encode_sync_cursor(changed, deleted)) == (changed, deleted)
+
+
+def test_invalid_cursor():
+    with pytest.raises(InvalidCursorException):
+        decode_sync_cursor("not-a-cursor")
+
+
+def test_first_sync_pages_through_every_todo():
+    rows = [todo(1, 30), todo(2, 20), todo(3, 20), todo(4, 10, OTHER), tombstone(9, 5)]
+    first, second, caught_up = sync(rows, 2, 2, 2)
+    assert ([t.id for t in first.changed], first.has_more) == ([1, 2], True)
+    # Deletions before the first sync are irrelevant to it
+    assert (second.deleted, [t.id for t in second.changed]) == ([], [3])
+    assert not second.has_more
+    assert (caught_up.changed, caught_up.deleted) == ([], [])
+
+
+def test_changes_after_cursor():
+    changed = SyncPosition(NOW - timedelta(seconds=20), 2)
+    deleted = SyncPosition(NOW - timedelta(seconds=20))
+    rows = [
+        todo(1, 30), todo(2, 20), todo(3, 20), todo(5, 10),
+        tombstone(6, 25), tombstone(7, 15),
+    ]
+    (changes,) = sync(rows, 10, since=encode_sync_cursor(changed, deleted))
+    assert [t.id for t in changes.changed] == [3, 5]
+    assert changes.deleted == [7]
+
+
+def test_current_second_is_not_read():
+    (changes,) = sync([todo(1, 0), todo(2, 1)], 10)
+    assert [t.id for t in changes.changed] == [2]
+
+
+def test_expired_cursor():
+    old = SyncPosition(NOW - timedelta(days=ENVConfig.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with AsyncSession(engine) as db:
+            await load_changes(db, OWNER, encode_sync_cursor(old, old), 10)
+        await engine.dispose()
+
+    with pytest.raises(SyncCursorExpiredException):
+        asyncio.run(main())
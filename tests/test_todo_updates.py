@@ -0,0 +1,78 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi import BackgroundTasks
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.database import Base
+from app.exceptions import PreconditionFailedException, TodoUpdateConflictException
+from app.models.todo import Todo, change_timestamp
+from app.models.user import User
+from app.schemas.todo import TodoUpdate
+from app.services.todo_service import UPDATE_ATTEMPTS, TodoService
+
+OWNER = User(id="0" * 36, role="USER")
+CHANGES = TodoUpdate(title="Buy milk", priority=2, complete=True)
+
+
+def update(lost_races: int, if_match=None):
+    """
+    Update todo 1 while another writer wins its first `lost_races` attempts.
+
+    Returns the outcome (a response or the exception) and the attempts made.
+    """
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        attempts = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute", retval=True)
+        def race(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE todos SET"):
+                attempts.append(1)
+                if len(attempts) <= lost_races:
+                    # The compare-and-set expects a version nobody holds
+                    parameters = (*parameters[:-1], -1)
+            return statement, parameters
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            now = change_timestamp()
+            db.add(Todo(
+                id=1, title="Buy eggs", priority=1, owner_id=OWNER.id,
+                complete=False, created_at=now, updated_at=now,
+            ))
+            await db.commit()
+            service = TodoService(BackgroundTasks(), db, fakeredis.FakeAsyncRedis())
+            try:
+                outcome = await service.update_todo(OWNER, 1, CHANGES, if_match)
+            except Exception as e:
+                outcome = e
+        await engine.dispose()
+        return outcome, len(attempts)
+
+    return asyncio.run(main())
+
+
+def test_update_retries_a_lost_race():
+    (todo, etag), attempts = update(lost_races=UPDATE_ATTEMPTS - 1)
+    assert attempts == UPDATE_ATTEMPTS
+    assert (todo.title, todo.complete, todo.version) == ("Buy milk", True, 2)
+    assert todo.finished_at is not None
+
+
+def test_update_gives_up_on_a_contended_todo():
+    error, attempts = update(lost_races=UPDATE_ATTEMPTS)
+    assert isinstance(error, TodoUpdateConflictException)
+    assert error.status_code == 409
+    assert attempts == UPDATE_ATTEMPTS
+
+
+@pytest.mark.parametrize("if_match, lost_races", [('"7"', 0), ('"1"', 1)])
+def test_update_with_if_match_is_never_retried(if_match, lost_races):
+    error, attempts = update(lost_races, if_match)
+    assert isinstance(error, PreconditionFailedException)
+    assert attempts == lost_races